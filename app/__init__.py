@@ -8,9 +8,11 @@ import logging
 from app.babel import configure_babel
 from flask_migrate import Migrate
 from flask_babel import _, format_datetime
+from app.services.model_registry import model_registry
+from config import Config
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Configure logging (LOG_LEVEL=DEBUG also logs the registered routes and every Whisper segment)
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper())
 logger = logging.getLogger(__name__)
 
 # Load environment variables
@@ -31,7 +33,61 @@ def create_app():
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-key-please-change')
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///app.db')
     app.config['UPLOAD_FOLDER'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
-    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+    app.config['MAX_CONTENT_LENGTH'] = Config.MAX_CONTENT_LENGTH  # Per request; large files use resumable uploads
+    app.config['UPLOAD_MAX_BYTES'] = Config.UPLOAD_MAX_BYTES
+    app.config['UPLOAD_CHUNK_BYTES'] = Config.UPLOAD_CHUNK_BYTES
+    app.config['UPLOAD_PROBE_WORKERS'] = Config.UPLOAD_PROBE_WORKERS
+    app.config['HISTORY_COUNT_TTL'] = Config.HISTORY_COUNT_TTL
+    app.config['STORAGE_MEDIA_RETENTION_HOURS'] = Config.STORAGE_MEDIA_RETENTION_HOURS
+    app.config['STORAGE_USER_QUOTA_BYTES'] = Config.STORAGE_USER_QUOTA_BYTES
+    app.config['STORAGE_JANITOR_INTERVAL'] = Config.STORAGE_JANITOR_INTERVAL
+    app.config['SUBTITLE_GZIP'] = Config.SUBTITLE_GZIP
+    app.config['THROUGHPUT_STATS_WINDOW'] = Config.THROUGHPUT_STATS_WINDOW
+    app.config['THROUGHPUT_STATS_TTL'] = Config.THROUGHPUT_STATS_TTL
+    app.config['METRICS_ENABLED'] = Config.METRICS_ENABLED
+    app.config['METRICS_TOKEN'] = Config.METRICS_TOKEN
+    app.config['PROFILE_SAMPLE_RATE'] = Config.PROFILE_SAMPLE_RATE
+    app.config['PROFILE_TORCH'] = Config.PROFILE_TORCH
+    app.config['ADMIN_EMAILS'] = Config.ADMIN_EMAILS
+    
+    # Whisper configuration
+    app.config['WHISPER_MODEL'] = Config.WHISPER_MODEL
+    app.config['WHISPER_MODEL_CACHE_BYTES'] = Config.WHISPER_MODEL_CACHE_BYTES
+    app.config['WHISPER_PRECISION'] = Config.WHISPER_PRECISION
+    app.config['WHISPER_MODEL_PRECISIONS'] = Config.WHISPER_MODEL_PRECISIONS
+    app.config['TORCH_NUM_THREADS'] = Config.TORCH_NUM_THREADS
+    app.config['TORCH_INTEROP_THREADS'] = Config.TORCH_INTEROP_THREADS
+    app.config['LANGUAGE_DETECT_MODEL'] = Config.LANGUAGE_DETECT_MODEL
+    app.config['LANGUAGE_DETECT_MIN_PROBABILITY'] = Config.LANGUAGE_DETECT_MIN_PROBABILITY
+    app.config['TRANSCRIBE_STREAM_SECONDS'] = Config.TRANSCRIBE_STREAM_SECONDS
+    app.config['PROGRESS_MIN_INTERVAL'] = Config.PROGRESS_MIN_INTERVAL
+    app.config['PROGRESS_MIN_DELTA'] = Config.PROGRESS_MIN_DELTA
+    app.config['PROGRESS_STREAM_KEEPALIVE'] = Config.PROGRESS_STREAM_KEEPALIVE
+    app.config['PROGRESS_STREAM_POLL_INTERVAL'] = Config.PROGRESS_STREAM_POLL_INTERVAL
+    app.config['TRANSCRIBE_PARALLEL'] = Config.TRANSCRIBE_PARALLEL
+    app.config['TRANSCRIBE_PARALLEL_MIN_SECONDS'] = Config.TRANSCRIBE_PARALLEL_MIN_SECONDS
+    app.config['TRANSCRIBE_CHUNK_SECONDS'] = Config.TRANSCRIBE_CHUNK_SECONDS
+    app.config['TRANSCRIBE_CHUNK_OVERLAP'] = Config.TRANSCRIBE_CHUNK_OVERLAP
+    app.config['TRANSCRIBE_CHUNK_WORKERS'] = Config.TRANSCRIBE_CHUNK_WORKERS
+    app.config['AUDIO_STORE_PATH'] = Config.AUDIO_STORE_PATH
+    app.config['TRANSCRIPTION_CACHE_BYTES'] = Config.TRANSCRIPTION_CACHE_BYTES
+    app.config['TRANSLATION_MEMORY_PATH'] = Config.TRANSLATION_MEMORY_PATH
+    app.config['TRANSLATION_MEMORY_MAX_ENTRIES'] = Config.TRANSLATION_MEMORY_MAX_ENTRIES
+    app.config['TRANSLATION_BACKEND'] = Config.TRANSLATION_BACKEND
+    app.config['TRANSLATION_SERVICE_URL'] = Config.TRANSLATION_SERVICE_URL
+    app.config['TRANSLATION_SERVICE_API_KEY'] = Config.TRANSLATION_SERVICE_API_KEY
+    app.config['TRANSLATION_RATE_LIMIT'] = Config.TRANSLATION_RATE_LIMIT
+    app.config['TRANSLATION_RATE_BURST'] = Config.TRANSLATION_RATE_BURST
+    app.config['TRANSLATION_MAX_CONCURRENCY'] = Config.TRANSLATION_MAX_CONCURRENCY
+    app.config['TRANSLATION_WORKERS'] = Config.TRANSLATION_WORKERS
+    app.config['TRANSLATION_MAX_LANGUAGES'] = Config.TRANSLATION_MAX_LANGUAGES
+    
+    # Job queue configuration
+    app.config['JOB_WORKERS'] = Config.JOB_WORKERS
+    app.config['JOB_WORKER_MODE'] = Config.JOB_WORKER_MODE
+    app.config['JOB_POLL_INTERVAL'] = Config.JOB_POLL_INTERVAL
+    app.config['JOB_HEARTBEAT_INTERVAL'] = Config.JOB_HEARTBEAT_INTERVAL
+    app.config['JOB_LEASE_SECONDS'] = Config.JOB_LEASE_SECONDS
     
     # CSRF Configuration
     app.config['WTF_CSRF_ENABLED'] = True
@@ -48,6 +104,49 @@ def create_app():
     csrf.init_app(app)
     configure_babel(app)
     migrate.init_app(app, db)
+    model_registry.init_app(app)
+    
+    from app.services.metrics import metrics
+    metrics.init_app(app)
+    
+    from app.services.audio_store import audio_store
+    audio_store.init_app(app)
+    
+    from app.services.transcription_cache import transcription_cache
+    transcription_cache.init_app(app)
+    
+    from app.services.translation_memory import translation_memory
+    translation_memory.init_app(app)
+
+    from app.services.translated_variants import translated_variants
+    translated_variants.init_app(app)
+    
+    from app.services.history import extraction_history
+    extraction_history.init_app(app)
+
+    from app.services.credits import credit_ledger
+    credit_ledger.init_app(app)
+    
+    from app.services.throughput import throughput_stats
+    throughput_stats.init_app(app)
+    
+    from app.services.profiling import job_profiler
+    job_profiler.init_app(app)
+    
+    from app.services.transcript_index import transcript_index
+    transcript_index.init_app(app)
+    
+    from app.services.job_queue import job_queue
+    job_queue.init_app(app)
+    
+    from app.services.progress_poller import progress_poller
+    progress_poller.init_app(app)
+    
+    from app.services.uploads import upload_manager
+    upload_manager.init_app(app)
+
+    from app.services.storage import storage_janitor
+    storage_janitor.init_app(app)
     login_manager.login_view = 'auth.login'
     login_manager.login_message = _('Please log in to access this page.')
     login_manager.login_message_category = 'info'
@@ -67,12 +166,15 @@ def create_app():
     logger.debug('Auth blueprint registered successfully')
     logger.debug('Main blueprint registered successfully')
     
-    # Create database tables and upload folder
-    with app.app_context():
-        db.create_all()
-        os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-        
-        # Print registered routes for debugging
+    # Create the upload folder, and the database tables unless the schema is managed by
+    # migrations (DB_CREATE_ALL=0, also set in worker processes)
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    if os.getenv('DB_CREATE_ALL', '1') != '0':
+        with app.app_context():
+            db.create_all()
+    
+    # Print registered routes for debugging
+    if app.debug:
         logger.debug('Registered routes:')
         for rule in app.url_map.iter_rules():
             logger.debug(f'{rule.endpoint}: {rule.rule}')
@@ -85,4 +187,18 @@ def create_app():
             return jsonify({"error": "CSRF validation failed"}), 403
         return render_template('error.html', message="CSRF validation failed. Please try again."), 403
     
-    return app 
\ No newline at end of file
+    return app
+
+
+def start_background_services(app):
+    """Start the extraction workers and the storage janitor of a serving process.
+
+    Called from wsgi.py rather than create_app(), so that flask CLI commands
+    (migrations among them) never start them. Disabled with JOB_QUEUE_AUTOSTART=0
+    in worker processes and web-only nodes.
+    """
+    if os.getenv('JOB_QUEUE_AUTOSTART', '1') != '0':
+        from app.services.job_queue import job_queue
+        from app.services.storage import storage_janitor
+        job_queue.start(app)
+        storage_janitor.start(app)
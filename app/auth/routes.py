@@ -17,8 +17,6 @@ def login():
         return redirect(url_for('main.dashboard'))
     
     logger.debug('Accessing login route')
-    logger.debug(f'Request method: {request.method}')
-    logger.debug(f'Form data: {request.form}')
     
     form = LoginForm()
     if request.method == 'POST':
@@ -35,7 +33,7 @@ def login():
                 next_page = url_for('main.dashboard')
             return redirect(next_page)
         else:
-            logger.debug(f'Form validation errors: {form.errors}')
+            logger.debug('Form validation errors on fields: %s', list(form.errors))
     
     return render_template('auth/login.html', title=_('Sign In'), form=form, hide_nav=True)
 
@@ -45,8 +43,6 @@ def register():
         return redirect(url_for('main.dashboard'))
     
     logger.debug('Accessing register route')
-    logger.debug(f'Request method: {request.method}')
-    logger.debug(f'Form data: {request.form}')
     
     form = RegistrationForm()
     if request.method == 'POST':
@@ -64,7 +60,7 @@ def register():
             flash(_('Congratulations, you are now registered!'), 'success')
             return redirect(url_for('auth.login'))
         else:
-            logger.debug(f'Form validation errors: {form.errors}')
+            logger.debug('Form validation errors on fields: %s', list(form.errors))
     
     return render_template('auth/register.html', title=_('Register'), form=form, hide_nav=True)
 
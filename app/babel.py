@@ -13,14 +13,14 @@ def get_locale():
         # Convert from pt-BR to pt_BR for Babel
         lang = session['language'].replace('-', '_')
         if lang in SUPPORTED_LANGUAGES:
-            logger.debug(f"Using language from session: {lang}")
+            logger.debug('Using language from session: %s', lang)
             return lang
     
     # If no manual selection, use browser's preferred language
     supported_codes = list(SUPPORTED_LANGUAGES.keys())
     browser_lang = request.accept_languages.best_match(supported_codes, 'en')
     if browser_lang:
-        logger.debug(f"Using browser language: {browser_lang}")
+        logger.debug('Using browser language: %s', browser_lang)
         return browser_lang
     
     logger.debug("Using default language: en")
@@ -35,6 +35,6 @@ def configure_babel(app):
     @app.before_request
     def before_request():
         g.lang_code = get_locale()
-        logger.debug(f"Setting lang_code to: {g.lang_code}")
+        logger.debug('Setting lang_code to: %s', g.lang_code)
     
     return babel 
\ No newline at end of file
@@ -32,4 +32,19 @@ def get_language_flag(code):
 
 def get_whisper_model(code):
     """Get the Whisper model to use for a language code."""
-    return SUPPORTED_LANGUAGES.get(code, {}).get('whisper_model', 'base') 
\ No newline at end of file
+    return SUPPORTED_LANGUAGES.get(code, {}).get('whisper_model', 'base')
+
+def whisper_language_code(code):
+    """Get the Whisper language code (e.g. 'pt') for a supported language code (e.g. 'pt_BR')."""
+    if not code or code == 'unknown':
+        return None
+    return code.split('_')[0].lower()
+
+def supported_language_for(whisper_code):
+    """Get the supported language code matching a Whisper language code, or None."""
+    if whisper_code in SUPPORTED_LANGUAGES:
+        return whisper_code
+    for code in SUPPORTED_LANGUAGES:
+        if whisper_language_code(code) == whisper_code:
+            return code
+    return None
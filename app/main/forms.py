@@ -5,9 +5,11 @@ from wtforms.validators import DataRequired
 from flask_babel import lazy_gettext as _l
 from app.config.languages import SUPPORTED_LANGUAGES
 
+ALLOWED_EXTENSIONS = ['mp4', 'avi', 'mkv', 'mov', 'mp3', 'wav', 'm4a', 'aac', 'flac', 'ogg']
+
 class UploadForm(FlaskForm):
     file = FileField('File', validators=[
         FileRequired(),
-        FileAllowed(['mp4', 'avi', 'mkv', 'mov', 'mp3', 'wav', 'm4a', 'aac', 'flac', 'ogg'], 'Only audio and video files are allowed!')
+        FileAllowed(ALLOWED_EXTENSIONS, 'Only audio and video files are allowed!')
     ])
     submit = SubmitField('Upload') 
\ No newline at end of file
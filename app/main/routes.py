@@ -1,27 +1,41 @@
-from flask import Blueprint, render_template, request, send_from_directory, current_app, flash, redirect, url_for, jsonify, session, get_flashed_messages
+from flask import Blueprint, render_template, request, send_from_directory, current_app, flash, redirect, url_for, jsonify, session, get_flashed_messages, Response, stream_with_context
 from flask_login import login_required, current_user
 import os
+import gzip
+import uuid
+import json
+import base64
 import logging
-from app.main.forms import UploadForm
+from app.main.forms import UploadForm, ALLOWED_EXTENSIONS
 from app.models import SubtitleExtraction
-from app.services.subtitle_extractor import SubtitleExtractor
-from app import db
-import threading
-from app import create_app
+from app.services.job_queue import job_queue
+from app.services.progress_events import progress_broker
+from app.services.progress_poller import progress_poller, extraction_state, ACTIVE_STATUSES
+from app.services.transcription_cache import transcription_cache, save_with_hash
+from app.services.uploads import upload_manager, required_credits_for
+from app.services.credits import credit_ledger
+from app.services import subtitle_files
+from app.services.subtitle_files import PARTIAL_SUFFIX
+from app.services.cue_store import CueStore, EXPORT_FORMATS, load_cues, save_cues
+from app.services.storage import storage_janitor
+from app.services.transcript_index import transcript_index
+from app.services.history import encode_cursor, extraction_history, serialize_extraction
+from app.services.throughput import throughput_stats
+from app.services.metrics import metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from app.services.profiling import job_profiler, profile_path_for, torch_profile_path_for, srt_filename_of, top_functions, SORT_KEYS
+from app import db, csrf
 from flask_babel import _, format_datetime
 from app.config.languages import SUPPORTED_LANGUAGES
 from datetime import datetime
 from werkzeug.utils import secure_filename
-from threading import Thread
-from app.services.translator import SubtitleTranslator
+from app.services.translation_memory import translation_memory
+from app.services.translated_variants import translated_variants
 
 logger = logging.getLogger(__name__)
 
 # Get the blueprint instance
 from app.main import main
 
-# Initialize translator
-translator = SubtitleTranslator()
 
 @main.route('/')
 def index():
@@ -39,14 +53,28 @@ def dashboard():
     logger.debug('Accessing dashboard route')
     form = UploadForm()
     
-    # Get pagination parameters with defaults
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
+    # Get pagination parameters with defaults; pages are walked by keyset cursor like /api/extractions,
+    # and ``page`` is only carried along to show the page number
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 10, type=int), 1), 100)
+    cursor = request.args.get('cursor') or None
+    before = request.args.get('before') or None
     
-    # Get user's extractions with pagination
-    extractions = SubtitleExtraction.query.filter_by(user_id=current_user.id)\
-        .order_by(SubtitleExtraction.created_at.desc())\
-        .paginate(page=page, per_page=per_page, error_out=False)
+    # Get user's extractions; the total comes from the cached count
+    try:
+        if before:
+            extractions, has_newer = extraction_history.newer_page(current_user.id, per_page, before)
+            next_cursor = encode_cursor(extractions[-1]) if extractions else None
+        else:
+            extractions, next_cursor = extraction_history.page(current_user.id, per_page, cursor=cursor)
+            has_newer = cursor is not None
+    except ValueError:
+        extractions, next_cursor = extraction_history.page(current_user.id, per_page)
+        has_newer = False
+    if not has_newer:
+        page = 1
+    prev_cursor = encode_cursor(extractions[0]) if has_newer and extractions else None
+    total_pages = max(1, -(-extraction_history.count(current_user.id) // per_page))
     
     # Get available languages for the dropdown
     language_options = [
@@ -66,68 +94,53 @@ def dashboard():
         try:
             logger.info(f"Processing file upload: {form.file.data.filename}")
             
-            # Initialize subtitle extractor
+            # Initialize subtitle extractor (imported here so web processes do not load numpy and the models)
+            from app.services.subtitle_extractor import SubtitleExtractor
             extractor = SubtitleExtractor(current_app.config['UPLOAD_FOLDER'])
             
-            # Save the file first
-            filename = secure_filename(form.file.data.filename)
+            # Save the file first, under a unique name: jobs for files with the same name must not
+            # overwrite each other's media or share its decoded audio
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            filename = f"{timestamp}_{uuid.uuid4().hex[:8]}_{secure_filename(form.file.data.filename)}"
             file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-            form.file.data.save(file_path)
+            media_hash = save_with_hash(form.file.data, file_path)
             
             # Get media duration and check credits
             duration_seconds = extractor.get_media_duration(file_path)  # Already in seconds
             
             # Calculate required credits (1 credit per minute)
-            required_credits = max(1, int((duration_seconds / 60) + 0.5))  # Round to nearest minute, minimum 1 credit
-            
-            # Get user's credit balance
-            credit_balance = current_user.credit_balance or 0.0
+            required_credits = required_credits_for(duration_seconds)
             
-            logger.info(f"Media duration: {duration_seconds} seconds, Required credits: {required_credits}, User balance: {credit_balance}")
+            logger.info(f"Media duration: {duration_seconds} seconds, Required credits: {required_credits}")
             
-            if credit_balance < required_credits:
+            # Create the extraction record and reserve its credits in one transaction
+            extraction = SubtitleExtraction(
+                user_id=current_user.id,
+                original_filename=filename,
+                target_language='unknown',
+                status='pending',
+                media_hash=media_hash,
+                duration_seconds=duration_seconds,
+                profile_requested=_profile_requested(request.values.get('profile'))
+            )
+            db.session.add(extraction)
+            if not credit_ledger.reserve(extraction, required_credits):
+                db.session.rollback()
                 # Clean up the saved file since we're not processing it
                 if os.path.exists(file_path):
                     os.remove(file_path)
                     
                 error_message = _('Insufficient credits! You have {} credits, but need {} credits for this media file. Please add more credits to continue.').format(
-                    credit_balance,
+                    current_user.credit_balance or 0.0,
                     required_credits
                 )
                 flash(error_message, 'error')
                 return jsonify({'error': error_message})
-            
-            # Deduct credits from user's balance
-            current_user.credit_balance = credit_balance - required_credits
             db.session.commit()
+            extraction_history.invalidate(current_user.id)
             
-            # Create extraction record
-            extraction = SubtitleExtraction(
-                user_id=current_user.id,
-                original_filename=filename,
-                target_language='unknown',
-                status='pending'
-            )
-            db.session.add(extraction)
-            db.session.commit()
-            
-            # Start background processing
-            def process_file(extraction_id):
-                with create_app().app_context():
-                    try:
-                        # Get a fresh reference to the extraction object
-                        extraction = SubtitleExtraction.query.get(extraction_id)
-                        extractor = SubtitleExtractor(current_app.config['UPLOAD_FOLDER'])
-                        extractor.process_extraction(extraction_id)
-                    except Exception as e:
-                        logger.error(f"Error processing file: {str(e)}")
-                        # Get a fresh reference to update the status
-                        extraction = SubtitleExtraction.query.get(extraction_id)
-                        extraction.status = 'failed'
-                        db.session.commit()
-            
-            thread = Thread(target=process_file, args=(extraction.id,))
-            thread.start()
+            # Hand the job to the worker pool
+            job_queue.enqueue(extraction.id)
             
             flash(_('File uploaded successfully. Extraction started.'), 'success')
             return jsonify({'success': True})
@@ -141,19 +154,150 @@ def dashboard():
     return render_template('main/dashboard.html', 
                          title=_('Dashboard'),
                          form=form,
+                         upload_chunk_bytes=current_app.config['UPLOAD_CHUNK_BYTES'],
                          language_options=language_options,
                          credit_balance=current_user.credit_balance or 0.0,
-                         extractions=extractions.items,
+                         extractions=extractions,
                          page=page,
                          per_page=per_page,
-                         total_pages=extractions.pages,
-                         has_next=extractions.has_next,
-                         has_prev=extractions.has_prev)
+                         total_pages=total_pages,
+                         next_cursor=next_cursor,
+                         prev_cursor=prev_cursor,
+                         has_next=next_cursor is not None,
+                         has_prev=has_newer)
+
+def _protect_csrf():
+    """Check the X-CSRFToken header on endpoints that don't go through a form."""
+    if current_app.config.get('WTF_CSRF_ENABLED', True):
+        csrf.protect()
+
+def _upload_status(upload):
+    """Serialize an upload session for the client."""
+    data = {
+        'id': upload.id,
+        'offset': upload.offset,
+        'length': upload.length,
+        'status': upload.status,
+        'extraction_id': upload.extraction_id,
+    }
+    if upload.status == 'rejected':
+        data['error'] = _('Insufficient credits! You have {} credits, but need {} credits for this media file. Please add more credits to continue.').format(
+            current_user.credit_balance or 0.0,
+            upload.required_credits
+        )
+    elif upload.status == 'failed':
+        data['error'] = _('Error processing media file. Please try again.')
+    return data
+
+@main.route('/uploads', methods=['POST'])
+@login_required
+def create_upload():
+    """Start a resumable upload (tus-style). The file name is sent base64 encoded in Upload-Metadata."""
+    _protect_csrf()
+    try:
+        length = int(request.headers.get('Upload-Length', ''))
+    except ValueError:
+        return jsonify({'error': _('Missing required data')}), 400
+
+    filename = None
+    profile = None
+    for item in request.headers.get('Upload-Metadata', '').split(','):
+        key, _sep, value = item.strip().partition(' ')
+        if key == 'filename' and value:
+            filename = base64.b64decode(value).decode('utf-8', errors='replace')
+        elif key == 'profile':
+            profile = base64.b64decode(value).decode('utf-8', errors='replace') if value else '1'
+    if not filename or filename.rsplit('.', 1)[-1].lower() not in ALLOWED_EXTENSIONS:
+        return jsonify({'error': _('Only audio and video files are allowed!')}), 400
+
+    try:
+        upload = upload_manager.create(current_user.id, filename, length, profile=_profile_requested(profile))
+    except ValueError as e:
+        logger.error(f"Error creating upload: {str(e)}")
+        return jsonify({'error': _('File is too large.')}), 413
+
+    data = _upload_status(upload)
+    # Let the client tell the user how long the job would wait with the current backlog
+    data['estimated_wait_seconds'] = throughput_stats.estimate_queue_wait(job_queue.num_workers)
+    response = jsonify(data)
+    response.status_code = 201
+    response.headers['Location'] = url_for('main.upload_status', upload_id=upload.id)
+    response.headers['Upload-Offset'] = str(upload.offset)
+    response.headers['Tus-Resumable'] = '1.0.0'
+    return response
+
+@main.route('/uploads/<upload_id>', methods=['HEAD', 'GET'])
+@login_required
+def upload_status(upload_id):
+    """Report how many bytes of an upload were received and what happened to it since."""
+    upload = upload_manager.get(upload_id, current_user.id)
+    if not upload:
+        return jsonify({'error': _('File not found')}), 404
+
+    response = jsonify(_upload_status(upload))
+    response.headers['Upload-Offset'] = str(upload.offset)
+    response.headers['Upload-Length'] = str(upload.length)
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['Tus-Resumable'] = '1.0.0'
+    return response
+
+@main.route('/uploads/<upload_id>', methods=['PATCH'])
+@login_required
+def upload_chunk(upload_id):
+    """Append a chunk to an upload at the offset given in Upload-Offset."""
+    _protect_csrf()
+    upload = upload_manager.get(upload_id, current_user.id)
+    if not upload:
+        return jsonify({'error': _('File not found')}), 404
+    if request.content_type != 'application/offset+octet-stream':
+        return jsonify({'error': _('Missing required data')}), 415
+    try:
+        offset = int(request.headers.get('Upload-Offset', ''))
+    except ValueError:
+        return jsonify({'error': _('Missing required data')}), 400
+
+    try:
+        new_offset = upload_manager.write_chunk(upload, offset, request.stream)
+    except ValueError as e:
+        logger.warning(f"Rejected chunk for upload {upload_id}: {str(e)}")
+        response = jsonify({'error': str(e), 'offset': upload.offset})
+        response.status_code = 409
+        response.headers['Upload-Offset'] = str(upload.offset)
+        return response
+
+    response = jsonify(_upload_status(upload))
+    response.headers['Upload-Offset'] = str(new_offset)
+    response.headers['Tus-Resumable'] = '1.0.0'
+    return response
+
+# Rendered subtitles smaller than this are not worth compressing
+GZIP_MIN_BYTES = 1024
+
+def _subtitle_response(body, mimetype, download_name, compressed=False):
+    """Send subtitle bytes as an attachment, gzip-encoded when the client accepts it.
+
+    ``compressed`` tells that ``body`` is already gzipped (a stored .gz file).
+    """
+    accepts_gzip = 'gzip' in request.accept_encodings
+    if compressed and not accepts_gzip:
+        body = gzip.decompress(body)
+        compressed = False
+    elif not compressed and accepts_gzip and len(body) >= GZIP_MIN_BYTES:
+        body = gzip.compress(body, compresslevel=subtitle_files.GZIP_LEVEL)
+        compressed = True
+    response = Response(
+        body,
+        content_type=f'{mimetype}; charset=utf-8',
+        headers={'Content-Disposition': f'attachment; filename="{download_name}"', 'Vary': 'Accept-Encoding'}
+    )
+    if compressed:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
 
 @main.route('/download/<filename>')
 @login_required
 def download_file(filename):
-    """Download SRT file."""
+    """Download subtitles as SRT, or rendered as VTT, ASS or JSON with ?format=."""
     try:
         # Verify file ownership
         extraction = SubtitleExtraction.query.filter_by(
@@ -161,25 +305,95 @@ def download_file(filename):
             srt_filename=filename
         ).first_or_404()
         
+        fmt = request.args.get('format', 'srt').lower()
+        if fmt not in EXPORT_FORMATS:
+            return "Unsupported format", 400
+        
         # Get language from query parameter, default to original language
         language = request.args.get('language', extraction.target_language)
         
-        # Get the base filename without language suffix
-        base_filename = filename.replace('_' + extraction.target_language + '.srt', '.srt')
-        
-        # Construct the language-specific filename
-        lang_filename = base_filename.replace('.srt', f'_{language}.srt')
+        if language == extraction.target_language:
+            lang_filename = filename
+        elif extraction.status != 'completed':
+            return "Subtitles are not ready yet", 409
+        else:
+            # Translated variants are generated on first request and served from disk afterwards
+            try:
+                lang_filename = translated_variants.ensure(extraction, language, current_app.config['UPLOAD_FOLDER'])
+            except ValueError as e:
+                return str(e), 400
         lang_path = os.path.join(current_app.config['UPLOAD_FOLDER'], lang_filename)
         
         # If the language-specific file doesn't exist, return 404
-        if not os.path.exists(lang_path):
+        stored_path = subtitle_files.stored_path(lang_path)
+        if stored_path is None:
             return "File not found", 404
             
-        return send_from_directory(current_app.config['UPLOAD_FOLDER'], lang_filename, as_attachment=True)
+        mimetype, extension = EXPORT_FORMATS[fmt]
+        if fmt == 'srt':
+            if not subtitle_files.is_compressed(stored_path):
+                return send_from_directory(current_app.config['UPLOAD_FOLDER'], lang_filename, as_attachment=True)
+            # Stored gzipped: sent as is to clients that accept gzip
+            with open(stored_path, 'rb') as f:
+                return _subtitle_response(f.read(), mimetype, lang_filename, compressed=True)
+        
+        # Other formats are rendered from the stored cues, without re-parsing the SRT
+        cues = load_cues(lang_path)
+        download_name = os.path.splitext(lang_filename)[0] + extension
+        return _subtitle_response(cues.render(fmt).encode('utf-8'), mimetype, download_name)
     except Exception as e:
         current_app.logger.error(f"Error downloading SRT file: {str(e)}")
         return str(e), 500
 
+@main.route('/translate/<filename>', methods=['POST'])
+@login_required
+def translate_languages(filename):
+    """Generate the translated variants of a subtitle file in several languages at once."""
+    try:
+        extraction = SubtitleExtraction.query.filter_by(
+            user_id=current_user.id,
+            srt_filename=filename
+        ).first_or_404()
+        if extraction.status != 'completed':
+            return jsonify({'success': False, 'message': _('Subtitles are still being generated')}), 409
+
+        data = request.get_json(silent=True) or {}
+        languages = data.get('languages')
+        if not isinstance(languages, list) or not languages \
+                or not all(isinstance(language, str) for language in languages):
+            return jsonify({'success': False, 'message': _('Missing required data')}), 400
+        if len(languages) > current_app.config['TRANSLATION_MAX_LANGUAGES']:
+            return jsonify({'success': False, 'message': _('Too many languages')}), 400
+
+        try:
+            filenames = translated_variants.ensure_many(extraction, languages, current_app.config['UPLOAD_FOLDER'])
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+
+        return jsonify({
+            'success': all(filenames.values()),
+            'languages': {
+                language: {
+                    'status': 'ready' if variant else 'failed',
+                    'url': url_for('main.download_file', filename=filename, language=language) if variant else None,
+                }
+                for language, variant in filenames.items()
+            }
+        })
+    except Exception as e:
+        logger.error(f"Error translating subtitles: {str(e)}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@main.route('/translation-progress/<filename>')
+@login_required
+def translation_progress(filename):
+    """Report the progress of each language being translated for a subtitle file."""
+    extraction = SubtitleExtraction.query.filter_by(
+        user_id=current_user.id,
+        srt_filename=filename
+    ).first_or_404()
+    return jsonify(translated_variants.progress(extraction, current_app.config['UPLOAD_FOLDER']))
+
 @main.route('/preview/<filename>')
 @login_required
 def preview_srt(filename):
@@ -191,20 +405,29 @@ def preview_srt(filename):
             srt_filename=filename
         ).first_or_404()
         
-        # Read the original SRT content
+        # Read the original SRT content, or the cues written so far while the job runs
         file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-        if not os.path.exists(file_path):
+        partial = False
+        if not subtitle_files.exists(file_path) and extraction.status == 'processing':
+            file_path += PARTIAL_SUFFIX
+            partial = True
+        if not subtitle_files.exists(file_path):
             return jsonify({
                 'error': _('File not found'),
                 'status': 'error'
             }), 404
             
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        content = subtitle_files.read_text(file_path)
+        
+        if partial:
+            # Drop a cue that may still be half written
+            content = content[:content.rfind('\n\n') + 2] if '\n\n' in content else ''
             
         return jsonify({
             'content': content,
             'detected_language': extraction.target_language,
+            'partial': partial,
+            'progress': extraction.progress,
             'status': 'success'
         })
         
@@ -226,12 +449,13 @@ def extraction_progress():
             status='processing'
         ).all()
         
-        # Return progress data
+        # Return progress data, with the remaining time estimated from measured throughput
         progress_data = [{
             'id': e.id,
             'progress': e.progress,
             'status': e.status,
-            'error_message': e.error_message
+            'error_message': e.error_message,
+            'eta_seconds': throughput_stats.eta(e)
         } for e in extractions]
         
         return jsonify(progress_data)
@@ -239,6 +463,202 @@ def extraction_progress():
         logger.error(f"Error getting extraction progress: {str(e)}")
         return jsonify([])
 
+@main.route('/extraction-progress/stream')
+@login_required
+def extraction_progress_stream():
+    """Stream progress and status changes of the user's unfinished extractions as Server-Sent Events.
+
+    Jobs run by this process publish their events to the in-process progress
+    broker; the per-process progress poller relays those of jobs run
+    elsewhere. The user's unfinished jobs are read once when the stream
+    opens, and the stream ends with a ``done`` event once none of them is
+    pending or processing.
+    """
+    logger.debug('Accessing extraction progress stream route')
+    user_id = current_user.id
+    subscription = progress_broker.subscribe(user_id)
+    keepalive = current_app.config.get('PROGRESS_STREAM_KEEPALIVE', 15)
+    states = {
+        extraction.id: extraction_state(extraction)
+        for extraction in SubtitleExtraction.query.filter(
+            SubtitleExtraction.user_id == user_id,
+            SubtitleExtraction.status.in_(ACTIVE_STATUSES)
+        ).all()
+    }
+    # Return the connection used to load the user to the pool for the life of the stream
+    db.session.close()
+    progress_poller.watch(states)
+
+    def generate():
+        unfinished = set(states)
+        try:
+            yield 'retry: 5000\n'
+            yield f"event: hello\ndata: {json.dumps({'live': True})}\n\n"
+            while unfinished:
+                events = subscription.wait(timeout=keepalive)
+                if not events:
+                    yield ': keep-alive\n\n'
+                    continue
+                for event in events:
+                    yield f"event: progress\ndata: {json.dumps(event)}\n\n"
+                    if event['status'] not in ACTIVE_STATUSES:
+                        unfinished.discard(event['id'])
+            yield 'event: done\ndata: {}\n\n'
+        finally:
+            progress_broker.unsubscribe(subscription)
+            progress_poller.unwatch(states)
+
+    return Response(stream_with_context(generate()),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@main.route('/queue-status')
+@login_required
+def queue_status():
+    """Report the extraction queue depth and wait times."""
+    try:
+        stats = job_queue.stats()
+        stats['estimated_wait_seconds'] = throughput_stats.estimate_queue_wait(job_queue.num_workers)
+        return jsonify(stats)
+    except Exception as e:
+        logger.error(f"Error getting queue status: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@main.route('/cache-status')
+@login_required
+def cache_status():
+    """Report transcription cache size and hit rate."""
+    try:
+        return jsonify(transcription_cache.stats())
+    except Exception as e:
+        logger.error(f"Error getting cache status: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@main.route('/throughput-status')
+@login_required
+def throughput_status():
+    """Report real-time factor percentiles per model, engine and thread configuration."""
+    try:
+        return jsonify(throughput_stats.summary(workers=job_queue.num_workers))
+    except Exception as e:
+        logger.error(f"Error getting throughput status: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@main.route('/metrics')
+def metrics_endpoint():
+    """Expose the pipeline metrics in the Prometheus text format."""
+    if not metrics.exposed:
+        return jsonify({'error': _('Not found')}), 404
+    if not metrics.authorized(request.headers.get('Authorization')):
+        return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
+def _profile_requested(value) -> bool:
+    """Whether the current user asked for the job to be profiled; only admins may."""
+    return value in ('1', 'true', 'on') and job_profiler.is_admin(current_user)
+
+@main.route('/profile/<int:extraction_id>')
+@login_required
+def job_profile(extraction_id):
+    """List the top functions of a profiled job (admins only); ``?format=prof`` downloads the raw profile."""
+    if not job_profiler.is_admin(current_user):
+        return jsonify({'error': _('Access denied')}), 403
+    extraction = db.session.get(SubtitleExtraction, extraction_id)
+    if extraction is None or not extraction.profiled_at:
+        return jsonify({'error': _('File not found')}), 404
+
+    srt_path = os.path.join(current_app.config['UPLOAD_FOLDER'], srt_filename_of(extraction))
+    path = profile_path_for(srt_path)
+    if not os.path.exists(path):
+        return jsonify({'error': _('File not found')}), 404
+    if request.args.get('format') == 'prof':
+        return send_from_directory(current_app.config['UPLOAD_FOLDER'], os.path.basename(path), as_attachment=True)
+
+    sort = request.args.get('sort', 'cumulative')
+    if sort not in SORT_KEYS:
+        return jsonify({'error': _('Invalid sort key')}), 400
+    limit = min(max(request.args.get('limit', 30, type=int), 1), 200)
+    try:
+        data = top_functions(path, limit=limit, sort=sort)
+    except Exception as e:
+        logger.error(f"Error reading profile of extraction {extraction_id}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+    data['extraction_id'] = extraction.id
+    data['profiled_at'] = extraction.profiled_at.isoformat()
+    torch_path = torch_profile_path_for(srt_path)
+    if os.path.exists(torch_path):
+        with open(torch_path, encoding='utf-8') as f:
+            data['torch'] = f.read()
+    return jsonify(data)
+
+@main.route('/storage-status')
+@login_required
+def storage_status():
+    """Report disk usage of the upload folder, the last janitor sweep and the user's usage."""
+    try:
+        stats = storage_janitor.stats()
+        stats['last_sweep'] = storage_janitor.last_sweep
+        stats['user_bytes'] = storage_janitor.usage(current_user.id)
+        return jsonify(stats)
+    except Exception as e:
+        logger.error(f"Error getting storage status: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@main.route('/translation-memory-status')
+@login_required
+def translation_memory_status():
+    """Report translation memory hit rate and bytes kept off the translation backend."""
+    try:
+        return jsonify(translation_memory.stats())
+    except Exception as e:
+        logger.error(f"Error getting translation memory status: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@main.route('/api/extractions')
+@login_required
+def list_extractions():
+    """List the user's extractions newest first, paginated by cursor.
+
+    Pass the returned ``next_cursor`` as ``cursor`` to get the next page;
+    ``include_total=1`` adds the (cached) total number of extractions.
+    """
+    try:
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        items, next_cursor = extraction_history.page(
+            current_user.id,
+            limit,
+            cursor=request.args.get('cursor') or None,
+            status=request.args.get('status') or None
+        )
+        response = {
+            'items': [serialize_extraction(extraction) for extraction in items],
+            'next_cursor': next_cursor,
+        }
+        if request.args.get('include_total', type=int):
+            response['total'] = extraction_history.count(current_user.id)
+        return jsonify(response)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error listing extractions: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@main.route('/search')
+@login_required
+def search_transcripts():
+    """Find the user's extractions where a phrase is spoken, with timestamps."""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': _('Missing search query')}), 400
+    try:
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        results = transcript_index.search(current_user.id, query, current_app.config['UPLOAD_FOLDER'], limit=limit)
+        return jsonify({'query': query, 'results': results})
+    except Exception as e:
+        logger.error(f"Error searching transcripts: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @main.route('/set-language', methods=['POST'])
 def set_language():
     try:
@@ -249,7 +669,7 @@ def set_language():
             if language.lower() == 'pt-br':
                 language = 'pt_BR'
             session['language'] = language
-            logger.debug(f"Language set to: {language}")
+            logger.debug('Language set to: %s', language)
             return jsonify({'success': True})
         return jsonify({'success': False, 'message': _('No language specified')}), 400
     except Exception as e:
@@ -273,11 +693,17 @@ def save_srt():
             user_id=current_user.id,
             srt_filename=filename
         ).first_or_404()
+        
+        if extraction.status != 'completed':
+            return jsonify({'success': False, 'message': _('Subtitles are still being generated')}), 409
 
         # Save the content to the file
         file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        subtitle_files.write_text(file_path, content, compress=current_app.config.get('SUBTITLE_GZIP', False))
+        save_cues(file_path, CueStore.from_srt(content))
+        # Translations of the previous text are generated again when next requested
+        translated_variants.invalidate(extraction, current_app.config['UPLOAD_FOLDER'])
+        db.session.commit()
 
         logger.info(f"SRT file updated successfully: {filename}")
         return jsonify({'success': True})
@@ -300,7 +726,7 @@ def add_credits():
                 return redirect(url_for('main.add_credits'))
             
             # Update user's credit balance
-            current_user.credit_balance = (current_user.credit_balance or 0.0) + amount
+            credit_ledger.add(current_user.id, amount)
             db.session.commit()
             
             flash(_('Credits added successfully!'), 'success')
@@ -13,7 +13,7 @@ class User(UserMixin, db.Model):
     last_name = db.Column(db.String(50), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(128))
-    credit_balance = db.Column(db.Float, default=0.0)  # Credit balance in minutes
+    credit_balance = db.Column(db.Float, default=0.0)  # Available credits in minutes, materialized from the ledger
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     extractions = db.relationship('SubtitleExtraction', backref='user', lazy=True)
     
@@ -22,17 +22,6 @@ class User(UserMixin, db.Model):
         
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
-        
-    def has_sufficient_credits(self, duration_minutes):
-        """Check if user has enough credits for the given duration."""
-        return self.credit_balance >= duration_minutes
-        
-    def deduct_credits(self, duration_minutes):
-        """Deduct credits for the given duration."""
-        if self.has_sufficient_credits(duration_minutes):
-            self.credit_balance -= duration_minutes
-            return True
-        return False
 
 class SubtitleExtraction(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -44,4 +33,88 @@ class SubtitleExtraction(db.Model):
     progress = db.Column(db.Float, default=0.0)  # Progress percentage
     error_message = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    completed_at = db.Column(db.DateTime) 
\ No newline at end of file
+    started_at = db.Column(db.DateTime)  # When a worker claimed the job
+    claimed_by = db.Column(db.String(255))  # hostname:pid:thread of the worker running the job
+    heartbeat_at = db.Column(db.DateTime)  # Renewed by the worker's process while the job runs
+    completed_at = db.Column(db.DateTime)
+    media_hash = db.Column(db.String(64))  # SHA-256 of the uploaded media
+    duration_seconds = db.Column(db.Float)  # Media duration, used for ETAs
+    media_deleted_at = db.Column(db.DateTime)  # When the storage janitor deleted the source media
+    storage_bytes = db.Column(db.BigInteger)  # Bytes on disk, NULL until (re)measured by the janitor
+    variant_languages = db.Column(db.String(255))  # Comma separated languages of generated translated variants
+    profile_requested = db.Column(db.Boolean, default=False)  # Run the job under the profiler (admins only)
+    profiled_at = db.Column(db.DateTime)  # When the profile artifacts of the job were saved
+    reserved_credits = db.Column(db.Float)  # Credits reserved for the job when it was queued
+    credit_status = db.Column(db.String(20))  # reserved, captured or refunded; NULL for jobs before the ledger
+    cache_entry_id = db.Column(db.Integer, db.ForeignKey('transcription_cache_entry.id'))
+    cache_entry = db.relationship('TranscriptionCacheEntry')
+    __table_args__ = (
+        db.Index('ix_subtitle_extraction_user_id_created_at', 'user_id', 'created_at'),  # History listing
+        db.Index('ix_subtitle_extraction_user_id_status', 'user_id', 'status'),
+        db.Index('ix_subtitle_extraction_user_id_srt_filename', 'user_id', 'srt_filename'),  # Download, preview, save
+        db.Index('ix_subtitle_extraction_status_completed_at', 'status', 'completed_at'),  # Storage retention
+    )
+
+class TranscriptionCacheEntry(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    cache_key = db.Column(db.String(64), unique=True, nullable=False)  # SHA-256 of media hash + decode options
+    media_hash = db.Column(db.String(64), nullable=False, index=True)
+    model = db.Column(db.String(50), nullable=False)
+    task = db.Column(db.String(20), nullable=False)
+    word_timestamps = db.Column(db.Boolean, default=True)
+    language = db.Column(db.String(10), nullable=False)  # Requested language, 'auto' for detection
+    srt_filename = db.Column(db.String(255), nullable=False)  # Relative to the cache folder
+    detected_language = db.Column(db.String(10))
+    size_bytes = db.Column(db.Integer, default=0)
+    hits = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+class UploadSession(db.Model):
+    id = db.Column(db.String(32), primary_key=True)  # Random hex id, used in upload URLs
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)  # Name given by the client
+    stored_filename = db.Column(db.String(255), nullable=False)  # Name in the upload folder
+    length = db.Column(db.BigInteger, nullable=False)  # Declared size in bytes
+    offset = db.Column(db.BigInteger, default=0)  # Bytes received so far
+    sha256 = db.Column(db.String(64))  # Set once the upload is complete
+    status = db.Column(db.String(20), default='uploading')  # uploading, probing, queued, rejected, failed
+    duration = db.Column(db.Float)  # Media duration in seconds
+    required_credits = db.Column(db.Float)
+    extraction_id = db.Column(db.Integer, db.ForeignKey('subtitle_extraction.id'))
+    profile_requested = db.Column(db.Boolean, default=False)  # Passed on to the extraction
+    error_message = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class TranscriptTerm(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    extraction_id = db.Column(db.Integer, db.ForeignKey('subtitle_extraction.id'), nullable=False, index=True)
+    term = db.Column(db.String(64), nullable=False)  # Casefolded token
+    positions = db.Column(db.LargeBinary, nullable=False)  # Token positions in the transcript, packed int32
+    __table_args__ = (db.Index('ix_transcript_term_user_id_term', 'user_id', 'term'),)
+
+class JobStat(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    extraction_id = db.Column(db.Integer, db.ForeignKey('subtitle_extraction.id'), index=True)
+    model = db.Column(db.String(50), nullable=False)  # Model name, with @precision when explicit
+    engine = db.Column(db.String(20), nullable=False)  # stream or chunked
+    device = db.Column(db.String(10), nullable=False)
+    threads = db.Column(db.Integer, nullable=False)  # Torch intra-op threads per worker
+    workers = db.Column(db.Integer, nullable=False)  # Chunk workers transcribing the job
+    media_seconds = db.Column(db.Float, nullable=False)
+    wall_seconds = db.Column(db.Float, nullable=False)  # From claim to completion
+    real_time_factor = db.Column(db.Float, nullable=False)  # Media seconds per wall second
+    queue_wait_seconds = db.Column(db.Float)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    __table_args__ = (db.Index('ix_job_stat_model_engine_threads', 'model', 'engine', 'threads'),)
+
+class CreditTransaction(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    extraction_id = db.Column(db.Integer, db.ForeignKey('subtitle_extraction.id'), index=True)
+    kind = db.Column(db.String(20), nullable=False)  # opening, purchase, reserve, capture, refund, adjustment
+    amount = db.Column(db.Float, nullable=False)  # Change of the available balance (negative for reservations)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (db.Index('ix_credit_transaction_user_id_created_at', 'user_id', 'created_at'),)
@@ -0,0 +1,134 @@
+import os
+import uuid
+import hashlib
+import logging
+import threading
+import subprocess
+from typing import TYPE_CHECKING, Optional
+
+from app.services.metrics import STAGE_SECONDS
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000  # whisper.audio.SAMPLE_RATE
+SAMPLE_BYTES = 4  # float32
+SUFFIX = '.f32'
+
+
+class AudioStore:
+    """Decode-once store of 16 kHz mono float32 PCM, read through memory maps.
+
+    Media is decoded by a single ffmpeg run straight into a raw array file,
+    so the samples never pass through Python memory. Duration checks,
+    sequential transcription and the chunk worker processes all map the
+    same file instead of decoding the media again or pickling the audio.
+    Arrays are keyed by the full path of the media and removed with
+    ``evict`` once the job is done.
+    """
+
+    def __init__(self):
+        self.folder = None
+        self.decodes = 0
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.folder = app.config.get('AUDIO_STORE_PATH') or os.path.join(app.config['UPLOAD_FOLDER'], 'cache', 'audio')
+        os.makedirs(self.folder, exist_ok=True)
+        app.extensions['audio_store'] = self
+
+    def path_for(self, media_path: str) -> str:
+        # Media with the same file name in different folders must not share an array
+        media_path = os.path.abspath(media_path)
+        digest = hashlib.sha1(media_path.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.folder, f"{digest}_{os.path.basename(media_path)}{SUFFIX}")
+
+    def _media_lock(self, media_path: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(self.path_for(media_path), threading.Lock())
+
+    def decode(self, media_path: str) -> str:
+        """Decode ``media_path`` into the store (if not already there) and return the array path."""
+        path = self.path_for(media_path)
+        with self._media_lock(media_path):
+            if os.path.exists(path):
+                return path
+
+            os.makedirs(self.folder, exist_ok=True)
+            tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+            cmd = [
+                'ffmpeg',
+                '-nostdin',
+                '-threads', '0',
+                '-i', media_path,
+                '-vn',
+                '-f', 'f32le',
+                '-ac', '1',
+                '-acodec', 'pcm_f32le',
+                '-ar', str(SAMPLE_RATE),
+                '-'
+            ]
+            try:
+                with STAGE_SECONDS.time(stage='decode'), open(tmp_path, 'wb') as f:
+                    result = subprocess.run(cmd, stdout=f, stderr=subprocess.PIPE)
+                if result.returncode != 0:
+                    raise RuntimeError(f"Failed to decode audio: {result.stderr.decode(errors='replace')[-500:]}")
+                if os.path.getsize(tmp_path) < SAMPLE_BYTES:
+                    raise RuntimeError('No audio stream found in media')
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+            self.decodes += 1
+            logger.info(f"Decoded {media_path} to {path} ({self.duration(media_path):.1f} seconds)")
+            return path
+
+    def load(self, media_path: str) -> 'np.memmap':
+        """Return the decoded samples of ``media_path`` as a memory-mapped array."""
+        return open_samples(self.decode(media_path))
+
+    def duration(self, media_path: str) -> Optional[float]:
+        """Duration in seconds of already decoded media, or None if it is not in the store."""
+        try:
+            return os.path.getsize(self.path_for(media_path)) / SAMPLE_BYTES / SAMPLE_RATE
+        except OSError:
+            return None
+
+    def evict(self, media_path: str):
+        """Remove the decoded array of ``media_path``; open maps stay valid until closed."""
+        path = self.path_for(media_path)
+        try:
+            os.remove(path)
+            logger.info(f"Evicted decoded audio {path}")
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            self._locks.pop(path, None)
+
+    def stats(self) -> dict:
+        files = [entry for entry in os.scandir(self.folder) if entry.name.endswith(SUFFIX)] \
+            if self.folder and os.path.isdir(self.folder) else []
+        return {
+            'arrays': len(files),
+            'bytes': sum(entry.stat().st_size for entry in files),
+            'decodes': self.decodes,
+        }
+
+
+def open_samples(path: str, start: int = 0, end: Optional[int] = None) -> 'np.memmap':
+    """Map a decoded array file, optionally only the samples in [start, end).
+
+    The map is copy-on-write: Whisper may write into its input, which must
+    never reach the shared file.
+    """
+    import numpy as np
+
+    samples = np.memmap(path, dtype=np.float32, mode='c')
+    return samples[start:end]
+
+
+audio_store = AudioStore()
@@ -0,0 +1,295 @@
+import os
+import atexit
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+from app.services.audio_store import open_samples
+from app.services.model_registry import model_registry
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000  # whisper.audio.SAMPLE_RATE
+DETECT_SAMPLES = 30 * SAMPLE_RATE  # whisper.audio.N_SAMPLES, the audio language detection listens to
+FRAME_SECONDS = 0.02  # Energy frame used when looking for silence
+ENERGY_BLOCK_FRAMES = 4096  # Frames squared at a time, so memory does not grow with the file
+
+
+def find_split_points(audio: np.ndarray, window_seconds: float, search_seconds: float,
+                      sample_rate: int = SAMPLE_RATE) -> list:
+    """Return sample offsets that cut the audio into windows at quiet points.
+
+    A cut is placed roughly every ``window_seconds``; within
+    ``search_seconds`` of each target the lowest-energy frame is chosen so
+    cuts fall in pauses between words rather than in the middle of speech.
+    """
+    total = len(audio)
+    window = int(window_seconds * sample_rate)
+    if window <= 0 or total <= window:
+        return []
+
+    frame = max(1, int(FRAME_SECONDS * sample_rate))
+    frames = total // frame
+    energy = np.empty(frames, dtype=np.float32)
+    for first in range(0, frames, ENERGY_BLOCK_FRAMES):
+        last = min(frames, first + ENERGY_BLOCK_FRAMES)
+        block = audio[first * frame:last * frame].reshape(-1, frame)
+        energy[first:last] = np.sqrt(np.mean(np.square(block, dtype=np.float32), axis=1))
+
+    search = int(search_seconds * sample_rate) // frame
+    splits = []
+    target = window
+    while target < total - window // 4:
+        center = target // frame
+        lo = max(0, center - search)
+        hi = min(len(energy), center + search + 1)
+        if hi <= lo:
+            break
+        split = (lo + int(np.argmin(energy[lo:hi]))) * frame
+        if splits and split <= splits[-1]:
+            split = target
+        splits.append(split)
+        target = split + window
+    return splits
+
+
+def plan_chunks(total_samples: int, splits: list, overlap_seconds: float,
+                sample_rate: int = SAMPLE_RATE) -> list:
+    """Turn split points into (start, end, core_start, core_end) sample ranges.
+
+    ``core`` is the part of the audio a chunk owns; ``start``/``end`` widen it
+    by the overlap so words straddling a cut are heard in full by both sides.
+    """
+    overlap = int(overlap_seconds * sample_rate)
+    bounds = [0] + list(splits) + [total_samples]
+    chunks = []
+    for core_start, core_end in zip(bounds, bounds[1:]):
+        start = max(0, core_start - overlap)
+        end = min(total_samples, core_end + overlap)
+        chunks.append((start, end, core_start, core_end))
+    return chunks
+
+
+def _normalize(text: str) -> str:
+    return ' '.join(text.lower().split())
+
+
+class SegmentStitcher:
+    """Merge per-chunk segments into one timeline, one chunk at a time.
+
+    Chunks must be added in order. Timestamps are shifted by the chunk
+    offset, segments whose midpoint falls outside the chunk's core are
+    dropped (the neighbour owns them), and a segment repeating the previous
+    one across a boundary is removed. Segments returned by ``add`` are final,
+    so callers can write them out immediately.
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.count = 0
+        self._previous = None
+
+    def add(self, chunk: tuple, segments: list) -> list:
+        start, end, core_start, core_end = chunk
+        offset = start / self.sample_rate
+        core_from = core_start / self.sample_rate
+        core_to = core_end / self.sample_rate
+
+        merged = []
+        for segment in segments:
+            seg_start = segment['start'] + offset
+            seg_end = segment['end'] + offset
+            middle = (seg_start + seg_end) / 2
+            if middle < core_from or middle >= core_to:
+                continue
+
+            previous = self._previous
+            if previous is not None and seg_start < previous['end']:
+                if _normalize(segment['text']) == _normalize(previous['text']):
+                    continue
+                seg_start = previous['end']
+
+            shifted = dict(segment, id=self.count, start=seg_start, end=max(seg_start, seg_end))
+            if segment.get('words'):
+                # Words are clamped like the segment, so they never start before it
+                words = []
+                for word in segment['words']:
+                    word_start = max(seg_start, word['start'] + offset)
+                    words.append(dict(word, start=word_start, end=max(word_start, word['end'] + offset)))
+                shifted['words'] = words
+            merged.append(shifted)
+            self._previous = shifted
+            self.count += 1
+        return merged
+
+
+def stitch_segments(chunk_results: list, sample_rate: int = SAMPLE_RATE) -> list:
+    """Merge (chunk, segments) pairs, given in chunk order, into one renumbered timeline."""
+    stitcher = SegmentStitcher(sample_rate)
+    merged = []
+    for chunk, segments in chunk_results:
+        merged.extend(stitcher.add(chunk, segments))
+    return merged
+
+
+# Worker process state -------------------------------------------------------
+
+_worker_model_name = None
+_worker_precision = None
+
+
+def _init_worker(model_name, threads, precision=None):
+    global _worker_model_name, _worker_precision
+    _worker_model_name = model_name
+    _worker_precision = precision
+    # Applied by the registry when the worker loads its model
+    model_registry.num_threads = threads
+
+
+def _transcribe_chunk(audio, options):
+    device = 'cpu' if _worker_precision == 'int8' else None
+    model = model_registry.get(_worker_model_name, device=device, precision=_worker_precision)
+    result = model.transcribe(audio, **options)
+    return result.get('segments', []), result.get('language')
+
+
+def _transcribe_chunk_from_file(path, start, end, options):
+    """Transcribe samples [start, end) of a decoded array file, mapped rather than pickled."""
+    return _transcribe_chunk(open_samples(path, start, end), options)
+
+
+def _detect_language(audio):
+    """Whisper language code of the first 30 seconds of ``audio``."""
+    import whisper
+
+    device = 'cpu' if _worker_precision == 'int8' else None
+    model = model_registry.get(_worker_model_name, device=device, precision=_worker_precision)
+    window = whisper.pad_or_trim(np.asarray(audio[:DETECT_SAMPLES]))
+    mel = whisper.log_mel_spectrogram(window, n_mels=model.dims.n_mels).to(model.device)
+    _, probabilities = model.detect_language(mel)
+    return max(probabilities, key=probabilities.get)
+
+
+def _detect_language_from_file(path, start, end):
+    return _detect_language(open_samples(path, start, end))
+
+
+class ChunkedTranscriber:
+    """Transcribe long audio by fanning silence-aligned windows out to a process pool.
+
+    Each worker process loads the model once (through its own model registry)
+    and keeps it for the lifetime of the pool, so the pool is reused across
+    jobs rather than created per file.
+    """
+
+    def __init__(self, model_name: str, workers: Optional[int] = None,
+                 chunk_seconds: float = 300.0, overlap_seconds: float = 2.0,
+                 search_seconds: float = 10.0, precision: Optional[str] = None):
+        self.model_name = model_name
+        self.precision = precision
+        self.workers = workers or max(1, (os.cpu_count() or 2) // 2)
+        self.chunk_seconds = chunk_seconds
+        self.overlap_seconds = overlap_seconds
+        self.search_seconds = search_seconds
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                threads = max(1, (os.cpu_count() or 1) // self.workers)
+                logger.info(f"Starting {self.workers} chunk worker(s) for {self.model_name} "
+                            f"with {threads} thread(s) each")
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(self.model_name, threads, self.precision),
+                )
+            return self._pool
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def split(self, audio: np.ndarray) -> list:
+        splits = find_split_points(audio, self.chunk_seconds, self.search_seconds)
+        return plan_chunks(len(audio), splits, self.overlap_seconds)
+
+    def iter_transcribe(self, audio: np.ndarray, info: dict, language: Optional[str] = None,
+                        samples_path: Optional[str] = None, **options):
+        """Yield stitched segments in order as soon as each chunk is transcribed.
+
+        Without ``language``, it is detected once on the first 30 seconds
+        and every chunk is transcribed in it, so chunks can't disagree; it is
+        stored in ``info['language']``. All chunks are then submitted up
+        front. When ``samples_path`` names the decoded array file ``audio``
+        was mapped from, workers map their window of it instead of receiving
+        a copy.
+        """
+        chunks = self.split(audio)
+        logger.info(f"Transcribing {len(audio) / SAMPLE_RATE:.1f}s of audio in {len(chunks)} chunk(s)")
+
+        if not language:
+            detect_end = min(len(audio), DETECT_SAMPLES)
+            if samples_path:
+                language = self.pool.submit(_detect_language_from_file, samples_path, 0, detect_end).result()
+            else:
+                language = self.pool.submit(_detect_language, audio[:detect_end]).result()
+            logger.info(f"Detected language {language} for all chunks")
+
+        options = dict(options, language=language)
+        options.setdefault('verbose', None)
+        if samples_path:
+            futures = [
+                self.pool.submit(_transcribe_chunk_from_file, samples_path, start, end, options)
+                for start, end, _, _ in chunks
+            ]
+        else:
+            futures = [
+                self.pool.submit(_transcribe_chunk, audio[start:end], options)
+                for start, end, _, _ in chunks
+            ]
+
+        info['language'] = language
+        stitcher = SegmentStitcher()
+        for chunk, future in zip(chunks, futures):
+            segments, _ = future.result()
+            yield from stitcher.add(chunk, segments)
+
+    def transcribe(self, audio: np.ndarray, language: Optional[str] = None, **options) -> dict:
+        """Transcribe ``audio`` (16 kHz mono float32) and return a Whisper-style result."""
+        info = {}
+        segments = list(self.iter_transcribe(audio, info, language=language, **options))
+        return {
+            'text': ''.join(segment['text'] for segment in segments),
+            'segments': segments,
+            'language': info.get('language') or 'unknown',
+        }
+
+
+_transcribers = {}
+_transcribers_lock = threading.Lock()
+
+
+def get_chunked_transcriber(model_name: str, precision: Optional[str] = None, **kwargs) -> ChunkedTranscriber:
+    """Return the shared transcriber (and process pool) for a model and precision."""
+    with _transcribers_lock:
+        transcriber = _transcribers.get((model_name, precision))
+        if transcriber is None:
+            transcriber = ChunkedTranscriber(model_name, precision=precision, **kwargs)
+            _transcribers[(model_name, precision)] = transcriber
+        return transcriber
+
+
+@atexit.register
+def _shutdown_pools():
+    for transcriber in list(_transcribers.values()):
+        transcriber.shutdown()
@@ -0,0 +1,128 @@
+import logging
+from typing import Optional
+
+import click
+from app import db
+from app.models import CreditTransaction, SubtitleExtraction, User
+
+logger = logging.getLogger(__name__)
+
+
+class CreditLedger:
+    """Credit balances kept as an append-only ledger.
+
+    Every change of a user's available credits is a CreditTransaction row,
+    and ``User.credit_balance`` is its materialized sum. Balances only
+    change through single conditional UPDATE statements
+    (``credit_balance = credit_balance - n WHERE credit_balance >= n``), so
+    concurrent uploads of the same account can never overdraw it or lose
+    an update, without any lock in the application. Credits are reserved
+    when a job is queued and the reservation is captured when it completes
+    or refunded when it fails, exactly once (guarded by ``credit_status``).
+    None of the methods commit: callers commit the ledger rows together
+    with the job they belong to.
+    """
+
+    def init_app(self, app):
+        app.extensions['credit_ledger'] = self
+
+        @app.cli.group('credits')
+        def credits_command():
+            """Inspect and repair the credit ledger."""
+
+        @credits_command.command('reconcile')
+        @click.option('--fix', is_flag=True, help='Set balances that drifted to the ledger sum')
+        def reconcile_command(fix):
+            """Compare materialized balances with the ledger."""
+            drifted = self.reconcile(fix=fix)
+            db.session.commit()
+            for user_id, balance, ledger in drifted:
+                click.echo(f"user {user_id}: balance {balance}, ledger {ledger}")
+            click.echo(f"{len(drifted)} balance(s) {'fixed' if fix else 'drifted'}")
+
+    def _record(self, user_id: int, kind: str, amount: float, extraction_id: Optional[int] = None):
+        db.session.add(CreditTransaction(user_id=user_id, extraction_id=extraction_id, kind=kind, amount=amount))
+
+    def _change_balance(self, user_id: int, amount: float, require_funds: bool = False) -> bool:
+        condition = [User.id == user_id]
+        if require_funds:
+            condition.append(User.credit_balance >= -amount)
+        result = db.session.execute(
+            db.update(User).where(*condition)
+            .values(credit_balance=db.func.coalesce(User.credit_balance, 0.0) + amount)
+        )
+        return result.rowcount == 1
+
+    def add(self, user_id: int, amount: float, kind: str = 'purchase'):
+        """Credit a user's balance."""
+        self._change_balance(user_id, amount)
+        self._record(user_id, kind, amount)
+
+    def reserve(self, extraction: SubtitleExtraction, amount: float) -> bool:
+        """Take ``amount`` credits from the owner of a new extraction. False if the balance is too low.
+
+        The extraction must be added to the session; it is flushed to link it to the ledger.
+        """
+        if not self._change_balance(extraction.user_id, -amount, require_funds=True):
+            return False
+        db.session.flush()
+        extraction.reserved_credits = amount
+        extraction.credit_status = 'reserved'
+        self._record(extraction.user_id, 'reserve', -amount, extraction.id)
+        return True
+
+    def _settle(self, extraction: SubtitleExtraction, status: str) -> bool:
+        # Moves the reservation out of 'reserved' once, whoever gets there first
+        result = db.session.execute(
+            db.update(SubtitleExtraction)
+            .where(SubtitleExtraction.id == extraction.id, SubtitleExtraction.credit_status == 'reserved')
+            .values(credit_status=status)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            return False
+        db.session.expire(extraction, ['credit_status'])
+        return True
+
+    def capture(self, extraction: SubtitleExtraction):
+        """Make the reservation of a completed job final."""
+        if self._settle(extraction, 'captured'):
+            self._record(extraction.user_id, 'capture', 0.0, extraction.id)
+
+    def refund(self, extraction: SubtitleExtraction):
+        """Give the credits reserved for a failed job back."""
+        if self._settle(extraction, 'refunded'):
+            amount = extraction.reserved_credits or 0.0
+            self._change_balance(extraction.user_id, amount)
+            self._record(extraction.user_id, 'refund', amount, extraction.id)
+            logger.info(f"Refunded {amount} credit(s) of extraction {extraction.id} to user {extraction.user_id}")
+
+    def ledger_balance(self, user_id: int) -> float:
+        return db.session.query(db.func.coalesce(db.func.sum(CreditTransaction.amount), 0.0))\
+            .filter(CreditTransaction.user_id == user_id).scalar()
+
+    def history(self, user_id: int, limit: int = 50) -> list:
+        return CreditTransaction.query.filter_by(user_id=user_id)\
+            .order_by(CreditTransaction.created_at.desc(), CreditTransaction.id.desc())\
+            .limit(limit).all()
+
+    def reconcile(self, fix: bool = False) -> list:
+        """Users whose materialized balance differs from the ledger sum, as (user id, balance, ledger sum).
+
+        With ``fix``, their balance is rebuilt from the ledger. Run it while
+        no jobs are being queued.
+        """
+        ledger = db.session.query(CreditTransaction.user_id, db.func.sum(CreditTransaction.amount).label('total'))\
+            .group_by(CreditTransaction.user_id).subquery()
+        total = db.func.coalesce(ledger.c.total, 0.0)
+        rows = db.session.query(User.id, db.func.coalesce(User.credit_balance, 0.0), total)\
+            .outerjoin(ledger, ledger.c.user_id == User.id)\
+            .filter(db.func.abs(db.func.coalesce(User.credit_balance, 0.0) - total) > 1e-9)\
+            .all()
+        if fix:
+            for user_id, _, ledger_sum in rows:
+                db.session.execute(db.update(User).where(User.id == user_id).values(credit_balance=ledger_sum))
+        return rows
+
+
+credit_ledger = CreditLedger()
@@ -0,0 +1,250 @@
+import os
+import re
+import json
+import sys
+import struct
+import logging
+from array import array
+from typing import Iterable, Optional
+
+from app.services import subtitle_files
+
+logger = logging.getLogger(__name__)
+
+CUES_SUFFIX = '.cues'
+MAGIC = b'CUES1\n'
+HEADER = struct.Struct('<Q')  # Number of cues
+
+BLOCK_SEPARATOR_RE = re.compile(r'\n[ \t\r]*\n')
+TIMING_RE = re.compile(r'(\d+):(\d{1,2}):(\d{1,2})[,.](\d{1,3})\s*-->\s*(\d+):(\d{1,2}):(\d{1,2})[,.](\d{1,3})')
+
+ASS_HEADER = """[Script Info]
+ScriptType: v4.00+
+WrapStyle: 0
+ScaledBorderAndShadow: yes
+PlayResX: 1920
+PlayResY: 1080
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,Arial,64,&H00FFFFFF,&H000000FF,&H00000000,&H64000000,0,0,0,0,100,100,0,0,1,3,1,2,60,60,50,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+
+def _timing_ms(groups) -> int:
+    hours, minutes, seconds, millis = groups
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(millis.ljust(3, '0'))
+
+
+def _timestamp(ms: int, separator: str = ',') -> str:
+    hours, ms = divmod(ms, 3600000)
+    minutes, ms = divmod(ms, 60000)
+    seconds, ms = divmod(ms, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{ms:03d}"
+
+
+def _ass_timestamp(ms: int) -> str:
+    hours, ms = divmod(ms, 3600000)
+    minutes, ms = divmod(ms, 60000)
+    seconds, ms = divmod(ms, 1000)
+    return f"{hours:d}:{minutes:02d}:{seconds:02d}.{ms // 10:02d}"
+
+
+def _ass_text(text: str) -> str:
+    return text.replace('\n', '\\N')
+
+
+class CueStore:
+    """Compact subtitle cues: integer millisecond timings and one text buffer.
+
+    ``starts`` and ``ends`` are arrays of milliseconds and cue ``i``'s text is
+    ``text[offsets[i]:offsets[i + 1]]``. A store is built once from Whisper
+    segments (or by parsing an SRT once), persisted next to the SRT, and
+    rendered to SRT, WebVTT, ASS or JSON on demand.
+    """
+
+    def __init__(self):
+        self.starts = array('q')
+        self.ends = array('q')
+        self.offsets = array('q', [0])
+        self._text = ''
+        self._parts = []
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def text(self) -> str:
+        if self._parts:
+            self._text += ''.join(self._parts)
+            self._parts = []
+        return self._text
+
+    def append(self, start_ms: int, end_ms: int, text: str):
+        self.starts.append(start_ms)
+        self.ends.append(end_ms)
+        self._parts.append(text)
+        self.offsets.append(self.offsets[-1] + len(text))
+
+    def add_segment(self, segment: dict):
+        """Append a Whisper segment (times in seconds)."""
+        self.append(int(round(segment['start'] * 1000)), int(round(segment['end'] * 1000)),
+                    segment['text'].strip())
+
+    def texts(self) -> list:
+        text = self.text
+        offsets = self.offsets
+        return [text[offsets[i]:offsets[i + 1]] for i in range(len(self))]
+
+    def __iter__(self):
+        return zip(self.starts, self.ends, self.texts())
+
+    def with_texts(self, texts: Iterable[str]) -> 'CueStore':
+        """Return a store with the same timings and new texts (e.g. a translation)."""
+        cues = CueStore()
+        cues.starts = array('q', self.starts)
+        cues.ends = array('q', self.ends)
+        for text in texts:
+            cues._parts.append(text)
+            cues.offsets.append(cues.offsets[-1] + len(text))
+        if len(cues.offsets) != len(cues.starts) + 1:
+            raise ValueError('Number of texts does not match the number of cues')
+        return cues
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[dict]) -> 'CueStore':
+        cues = cls()
+        for segment in segments:
+            cues.add_segment(segment)
+        return cues
+
+    @classmethod
+    def from_srt(cls, content: str) -> 'CueStore':
+        """Parse SRT content, skipping invalid blocks."""
+        cues = cls()
+        content = content.replace('\r\n', '\n').lstrip('\ufeff')
+        for block in BLOCK_SEPARATOR_RE.split(content.strip()):
+            lines = block.split('\n', 2)
+            if len(lines) < 3:  # Skip invalid blocks
+                continue
+            match = TIMING_RE.match(lines[1])
+            if not match:
+                continue
+            groups = match.groups()
+            cues.append(_timing_ms(groups[:4]), _timing_ms(groups[4:]), lines[2].strip())
+        return cues
+
+    # Serializers ---------------------------------------------------------
+
+    def to_srt(self) -> str:
+        return ''.join(
+            f"{i}\n{_timestamp(start)} --> {_timestamp(end)}\n{text}\n\n"
+            for i, (start, end, text) in enumerate(self, start=1)
+        )
+
+    def to_vtt(self) -> str:
+        return 'WEBVTT\n\n' + ''.join(
+            f"{i}\n{_timestamp(start, '.')} --> {_timestamp(end, '.')}\n{text.replace('-->', '->')}\n\n"
+            for i, (start, end, text) in enumerate(self, start=1)
+        )
+
+    def to_ass(self) -> str:
+        return ASS_HEADER + ''.join(
+            f"Dialogue: 0,{_ass_timestamp(start)},{_ass_timestamp(end)},Default,,0,0,0,,{_ass_text(text)}\n"
+            for start, end, text in self
+        )
+
+    def to_json(self) -> str:
+        return json.dumps({
+            'cues': [
+                {'index': i, 'start': start / 1000, 'end': end / 1000, 'text': text}
+                for i, (start, end, text) in enumerate(self, start=1)
+            ]
+        }, ensure_ascii=False)
+
+    def render(self, fmt: str) -> str:
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported subtitle format: {fmt}")
+        return getattr(self, f'to_{fmt}')()
+
+    # Persistence ---------------------------------------------------------
+
+    def save(self, path: str):
+        """Write the store atomically: header, timing arrays, offsets, UTF-8 text."""
+        tmp_path = subtitle_files.temp_path_for(path)
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(HEADER.pack(len(self)))
+            for values in (self.starts, self.ends, self.offsets):
+                f.write(_little_endian(values).tobytes())
+            f.write(self.text.encode('utf-8'))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'CueStore':
+        with open(path, 'rb') as f:
+            data = f.read()
+        if not data.startswith(MAGIC):
+            raise ValueError(f"Not a cue store: {path}")
+        position = len(MAGIC)
+        (count,) = HEADER.unpack_from(data, position)
+        position += HEADER.size
+
+        cues = cls()
+        arrays = []
+        for length in (count, count, count + 1):
+            values = array('q')
+            values.frombytes(data[position:position + length * 8])
+            arrays.append(_little_endian(values))
+            position += length * 8
+        cues.starts, cues.ends, cues.offsets = arrays
+        cues._text = data[position:].decode('utf-8')
+        return cues
+
+
+def _little_endian(values: array) -> array:
+    """Arrays are stored little-endian; swap a copy on big-endian hosts."""
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+EXPORT_FORMATS = {
+    'srt': ('application/x-subrip', '.srt'),
+    'vtt': ('text/vtt', '.vtt'),
+    'ass': ('text/x-ssa', '.ass'),
+    'json': ('application/json', '.json'),
+}
+
+
+def cue_path_for(srt_path: str) -> str:
+    return os.path.splitext(srt_path)[0] + CUES_SUFFIX
+
+
+def save_cues(srt_path: str, cues: CueStore):
+    """Persist the cues of an SRT file next to it."""
+    cues.save(cue_path_for(srt_path))
+
+
+def load_cues(srt_path: str) -> Optional[CueStore]:
+    """Return the cues of an SRT file (plain or gzipped), parsing (and persisting) them only when stale or missing."""
+    cue_path = cue_path_for(srt_path)
+    srt_mtime = subtitle_files.mtime(srt_path)
+    if srt_mtime is None:
+        return None
+    try:
+        if os.path.getmtime(cue_path) >= srt_mtime:
+            return CueStore.load(cue_path)
+    except (OSError, ValueError):
+        pass
+
+    cues = CueStore.from_srt(subtitle_files.read_text(srt_path))
+    try:
+        cues.save(cue_path)
+    except OSError as e:
+        logger.warning(f"Could not persist cues for {srt_path}: {str(e)}")
+    return cues
@@ -0,0 +1,117 @@
+import json
+import time
+import base64
+import threading
+import logging
+from datetime import datetime
+from typing import Optional, Tuple
+
+from app import db
+from app.models import SubtitleExtraction
+
+logger = logging.getLogger(__name__)
+
+
+def encode_cursor(extraction: SubtitleExtraction) -> str:
+    """Opaque cursor pointing just after ``extraction`` in newest-first order."""
+    raw = json.dumps([extraction.created_at.isoformat(), extraction.id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Return the (created_at, id) position in a cursor. Raises ValueError if it is malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, extraction_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(created_at), int(extraction_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def serialize_extraction(extraction: SubtitleExtraction) -> dict:
+    return {
+        'id': extraction.id,
+        'original_filename': extraction.original_filename,
+        'srt_filename': extraction.srt_filename,
+        'language': extraction.target_language,
+        'status': extraction.status,
+        'progress': extraction.progress,
+        'error_message': extraction.error_message,
+        'created_at': extraction.created_at.isoformat() if extraction.created_at else None,
+        'completed_at': extraction.completed_at.isoformat() if extraction.completed_at else None,
+    }
+
+
+class ExtractionHistory:
+    """Per-user extraction listing that stays O(page) for large histories.
+
+    Pages are fetched by keyset on (created_at, id) through the
+    (user_id, created_at) index instead of OFFSET, and the total number of
+    extractions per user is cached for ``count_ttl`` seconds instead of
+    running COUNT(*) on every page load. Code creating extractions calls
+    ``invalidate`` so the owner sees the new total immediately.
+    """
+
+    def __init__(self):
+        self.count_ttl = 60.0
+        self._counts = {}  # user id -> (count, expires at)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.count_ttl = app.config.get('HISTORY_COUNT_TTL', self.count_ttl)
+        app.extensions['extraction_history'] = self
+
+    def page(self, user_id: int, limit: int, cursor: Optional[str] = None,
+             status: Optional[str] = None) -> Tuple[list, Optional[str]]:
+        """Return up to ``limit`` extractions, newest first, and the cursor of the next page."""
+        query = SubtitleExtraction.query.filter(SubtitleExtraction.user_id == user_id)
+        if status:
+            query = query.filter(SubtitleExtraction.status == status)
+        if cursor:
+            created_at, extraction_id = decode_cursor(cursor)
+            query = query.filter(db.or_(
+                SubtitleExtraction.created_at < created_at,
+                db.and_(SubtitleExtraction.created_at == created_at, SubtitleExtraction.id < extraction_id)
+            ))
+        rows = query.order_by(SubtitleExtraction.created_at.desc(), SubtitleExtraction.id.desc())\
+            .limit(limit + 1).all()
+
+        items = rows[:limit]
+        next_cursor = encode_cursor(items[-1]) if len(rows) > limit else None
+        return items, next_cursor
+
+    def newer_page(self, user_id: int, limit: int, cursor: str) -> Tuple[list, bool]:
+        """Return the ``limit`` extractions just newer than ``cursor``, newest first, and whether there are newer ones.
+
+        Walks back from a cursor page to the one before it, with the same keyset.
+        """
+        created_at, extraction_id = decode_cursor(cursor)
+        rows = SubtitleExtraction.query.filter(
+            SubtitleExtraction.user_id == user_id,
+            db.or_(
+                SubtitleExtraction.created_at > created_at,
+                db.and_(SubtitleExtraction.created_at == created_at, SubtitleExtraction.id > extraction_id)
+            )
+        ).order_by(SubtitleExtraction.created_at, SubtitleExtraction.id).limit(limit + 1).all()
+        return list(reversed(rows[:limit])), len(rows) > limit
+
+    def count(self, user_id: int) -> int:
+        """Number of extractions of a user, cached for ``count_ttl`` seconds."""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._counts.get(user_id)
+        if cached and cached[1] > now:
+            return cached[0]
+
+        count = db.session.query(db.func.count(SubtitleExtraction.id))\
+            .filter(SubtitleExtraction.user_id == user_id).scalar()
+        with self._lock:
+            self._counts[user_id] = (count, now + self.count_ttl)
+        return count
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._counts.pop(user_id, None)
+
+
+extraction_history = ExtractionHistory()
@@ -0,0 +1,345 @@
+import os
+import socket
+import threading
+import time
+import logging
+import multiprocessing
+from datetime import datetime, timedelta
+from typing import Optional
+
+import click
+from app import db
+from app.models import SubtitleExtraction
+from app.services.progress_events import publish_extraction
+from app.services.credits import credit_ledger
+from app.services.metrics import metrics, JOB_DB_COMMITS, QUEUE_JOBS, QUEUE_OLDEST_WAIT
+
+logger = logging.getLogger(__name__)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _process_worker_main(index, poll_interval):
+    """Entry point for worker processes: build one app and run jobs forever."""
+    # The parent process already started the workers and created the tables
+    os.environ['JOB_QUEUE_AUTOSTART'] = '0'
+    os.environ['DB_CREATE_ALL'] = '0'
+    from app import create_app
+    app = create_app()
+    job_queue.poll_interval = poll_interval
+    job_queue._worker_loop(app, index)
+
+
+class JobQueue:
+    """Durable job queue backed by the SubtitleExtraction table.
+
+    Pending extractions are the queue. Workers claim a row atomically by
+    flipping its status from 'pending' to 'processing' in a single
+    conditional UPDATE, so several worker pools (threads in this process,
+    worker processes, or other web processes) can safely share one database.
+    A claim is a lease: every process running jobs renews ``heartbeat_at``
+    of its jobs every ``heartbeat_interval`` seconds, and jobs whose lease
+    is older than ``lease_seconds`` are put back in the queue by any
+    process, whatever host claimed them.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.num_workers = 1
+        self.mode = 'thread'
+        self.poll_interval = 5.0
+        self.heartbeat_interval = 30.0
+        self.lease_seconds = 300.0
+        self._heartbeat = None
+        self._heartbeat_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._workers = []
+        self._running = set()
+        self._running_lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.num_workers = app.config.get('JOB_WORKERS', self.num_workers)
+        self.mode = app.config.get('JOB_WORKER_MODE', self.mode)
+        self.poll_interval = app.config.get('JOB_POLL_INTERVAL', self.poll_interval)
+        self.heartbeat_interval = app.config.get('JOB_HEARTBEAT_INTERVAL', self.heartbeat_interval)
+        self.lease_seconds = app.config.get('JOB_LEASE_SECONDS', self.lease_seconds)
+        app.extensions['job_queue'] = self
+        metrics.add_collector(self._collect_metrics)
+
+        @app.cli.command('worker')
+        @click.option('--workers', '-w', type=int, default=None, help='Number of workers to run')
+        def worker_command(workers):
+            """Run the extraction workers in the foreground."""
+            from app.services.storage import storage_janitor
+
+            if workers is not None:
+                self.num_workers = workers
+            self.start(app)
+            storage_janitor.start(app)
+            try:
+                while True:
+                    time.sleep(3600)
+            except KeyboardInterrupt:
+                storage_janitor.stop()
+                self.stop()
+
+    def running_here(self) -> set:
+        """Ids of the extractions run by worker threads of this process."""
+        with self._running_lock:
+            return set(self._running)
+
+    @property
+    def process_id(self) -> str:
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    @property
+    def worker_id(self) -> str:
+        return f"{self.process_id}:{threading.get_ident()}"
+
+    def start(self, app=None):
+        """Recover orphaned jobs and start the worker pool."""
+        app = app or self.app
+        if self._workers or self.num_workers <= 0:
+            return
+
+        with app.app_context():
+            recovered = self.recover_orphans()
+            if recovered:
+                logger.info(f"Re-queued {recovered} orphaned extraction(s)")
+
+        self._stop.clear()
+        for index in range(self.num_workers):
+            if self.mode == 'process':
+                ctx = multiprocessing.get_context('spawn')
+                worker = ctx.Process(target=_process_worker_main,
+                                     args=(index, self.poll_interval),
+                                     name=f'extraction-worker-{index}',
+                                     daemon=True)
+            else:
+                worker = threading.Thread(target=self._worker_loop,
+                                          args=(app, index),
+                                          name=f'extraction-worker-{index}',
+                                          daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        logger.info(f"Started {self.num_workers} extraction worker(s) in {self.mode} mode")
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        for worker in self._workers:
+            if isinstance(worker, threading.Thread):
+                worker.join(timeout=1)
+            else:
+                worker.terminate()
+        self._workers = []
+
+    def enqueue(self, extraction_id: int):
+        """Signal that a new pending extraction is available.
+
+        The row itself is the queue entry; this only wakes up idle workers in
+        this process. Workers elsewhere pick the job up on their next poll.
+        """
+        logger.info(f"Queued extraction {extraction_id}")
+        self._wakeup.set()
+
+    def claim_next(self) -> Optional[int]:
+        """Atomically claim the oldest pending extraction. Returns its id."""
+        candidates = db.session.query(SubtitleExtraction.id)\
+            .filter(SubtitleExtraction.status == 'pending')\
+            .order_by(SubtitleExtraction.created_at, SubtitleExtraction.id)\
+            .limit(5).all()
+
+        for (extraction_id,) in candidates:
+            result = db.session.execute(
+                db.update(SubtitleExtraction)
+                .where(SubtitleExtraction.id == extraction_id,
+                       SubtitleExtraction.status == 'pending')
+                .values(status='processing',
+                        claimed_by=self.worker_id,
+                        started_at=datetime.utcnow(),
+                        heartbeat_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+            if result.rowcount == 1:
+                return extraction_id
+        return None
+
+    def recover_orphans(self) -> int:
+        """Put jobs whose worker died back in the queue.
+
+        A processing job is orphaned when it has no owner, when its lease
+        (``heartbeat_at``, or ``started_at`` for jobs claimed before leases)
+        expired, or when its owner ran on this host and that process no
+        longer exists.
+        """
+        hostname = socket.gethostname()
+        cutoff = datetime.utcnow() - timedelta(seconds=self.lease_seconds)
+        orphaned = []
+        for extraction in SubtitleExtraction.query.filter_by(status='processing').all():
+            renewed_at = extraction.heartbeat_at or extraction.started_at
+            if not extraction.claimed_by or not renewed_at or renewed_at < cutoff:
+                orphaned.append(extraction)
+                continue
+            host, _, rest = extraction.claimed_by.partition(':')
+            pid = rest.split(':', 1)[0]
+            if host == hostname and pid.isdigit() and not _pid_alive(int(pid)):
+                orphaned.append(extraction)
+
+        requeued = []
+        for extraction in orphaned:
+            # Only if nobody renewed or finished the job since it was read
+            result = db.session.execute(
+                db.update(SubtitleExtraction)
+                .where(SubtitleExtraction.id == extraction.id,
+                       SubtitleExtraction.status == 'processing',
+                       SubtitleExtraction.claimed_by.is_not_distinct_from(extraction.claimed_by),
+                       SubtitleExtraction.heartbeat_at.is_not_distinct_from(extraction.heartbeat_at))
+                .values(status='pending', progress=0, claimed_by=None, started_at=None, heartbeat_at=None)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 1:
+                logger.warning(f"Re-queueing extraction {extraction.id}, orphaned by {extraction.claimed_by}")
+                requeued.append(extraction.id)
+        if requeued:
+            db.session.commit()
+            for extraction in SubtitleExtraction.query.filter(SubtitleExtraction.id.in_(requeued)).all():
+                publish_extraction(extraction)
+        return len(requeued)
+
+    def renew_leases(self) -> int:
+        """Renew the lease of the jobs run by this process. Returns how many were renewed."""
+        running = self.running_here()
+        if not running:
+            return 0
+        result = db.session.execute(
+            db.update(SubtitleExtraction)
+            .where(SubtitleExtraction.id.in_(running),
+                   SubtitleExtraction.status == 'processing',
+                   SubtitleExtraction.claimed_by.startswith(f"{self.process_id}:"))
+            .values(heartbeat_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        if result.rowcount < len(running):
+            logger.warning(f"{len(running) - result.rowcount} job(s) run by {self.process_id} "
+                           f"lost their lease or finished")
+        return result.rowcount
+
+    def stats(self) -> dict:
+        """Return queue depth and wait-time figures."""
+        now = datetime.utcnow()
+        depth = SubtitleExtraction.query.filter_by(status='pending').count()
+        running = SubtitleExtraction.query.filter_by(status='processing').count()
+
+        oldest = db.session.query(db.func.min(SubtitleExtraction.created_at))\
+            .filter(SubtitleExtraction.status == 'pending').scalar()
+        oldest_wait = (now - oldest).total_seconds() if oldest else 0.0
+
+        recent = db.session.query(SubtitleExtraction.created_at, SubtitleExtraction.started_at)\
+            .filter(SubtitleExtraction.started_at.isnot(None),
+                    SubtitleExtraction.started_at >= now - timedelta(hours=1))\
+            .all()
+        waits = [(started - created).total_seconds() for created, started in recent if created]
+        avg_wait = sum(waits) / len(waits) if waits else 0.0
+
+        return {
+            'depth': depth,
+            'running': running,
+            'workers': self.num_workers,
+            'mode': self.mode,
+            'oldest_wait_seconds': oldest_wait,
+            'avg_wait_seconds': avg_wait,
+        }
+
+    def _collect_metrics(self):
+        # Read from the database, so jobs of every worker process are counted
+        stats = self.stats()
+        QUEUE_JOBS.set(stats['depth'], state='pending')
+        QUEUE_JOBS.set(stats['running'], state='processing')
+        QUEUE_OLDEST_WAIT.set(stats['oldest_wait_seconds'] or 0)
+
+    def _start_heartbeat(self, app):
+        with self._heartbeat_lock:
+            if self._heartbeat is not None or not self.heartbeat_interval:
+                return
+            self._heartbeat = threading.Thread(target=self._heartbeat_loop, args=(app,),
+                                               name='job-heartbeat', daemon=True)
+            self._heartbeat.start()
+
+    def _heartbeat_loop(self, app):
+        """Renew this process's leases and re-queue expired ones elsewhere."""
+        while not self._stop.wait(self.heartbeat_interval):
+            with app.app_context():
+                try:
+                    self.renew_leases()
+                    recovered = self.recover_orphans()
+                    if recovered:
+                        self._wakeup.set()
+                except Exception as e:
+                    logger.error(f"Job heartbeat failed: {str(e)}")
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+        with self._heartbeat_lock:
+            self._heartbeat = None
+
+    def _worker_loop(self, app, index):
+        logger.info(f"Extraction worker {index} started")
+        self._start_heartbeat(app)
+        while not self._stop.is_set():
+            with app.app_context():
+                try:
+                    extraction_id = self.claim_next()
+                except Exception as e:
+                    logger.error(f"Worker {index} failed to claim a job: {str(e)}")
+                    db.session.rollback()
+                    extraction_id = None
+
+                if extraction_id is not None:
+                    self._run(app, extraction_id)
+                    continue
+
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _run(self, app, extraction_id):
+        from app.services.subtitle_extractor import SubtitleExtractor
+        from app.services.profiling import job_profiler
+
+        logger.info(f"Worker {self.worker_id} processing extraction {extraction_id}")
+        with self._running_lock:
+            self._running.add(extraction_id)
+        with metrics.count_commits() as commits:
+            try:
+                extractor = SubtitleExtractor(app.config['UPLOAD_FOLDER'])
+                with job_profiler.profile_job(extraction_id, app.config['UPLOAD_FOLDER']):
+                    extractor.process_extraction(extraction_id)
+            except Exception as e:
+                logger.error(f"Error processing file: {str(e)}")
+                db.session.rollback()
+                extraction = SubtitleExtraction.query.get(extraction_id)
+                if extraction:
+                    extraction.status = 'failed'
+                    extraction.error_message = str(e)
+                    credit_ledger.refund(extraction)
+                    db.session.commit()
+                    publish_extraction(extraction)
+            finally:
+                with self._running_lock:
+                    self._running.discard(extraction_id)
+        JOB_DB_COMMITS.observe(commits[0])
+
+
+job_queue = JobQueue()
@@ -0,0 +1,237 @@
+import hmac
+import time
+import bisect
+import threading
+import logging
+from contextlib import contextmanager
+from typing import Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'extract_subtitle_'
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """A named metric with one value per combination of label values."""
+
+    kind = 'untyped'
+
+    def __init__(self, registry: 'Metrics', name: str, documentation: str, labels: Iterable[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, '')) for name in self.labels)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels):
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    """Observations counted into cumulative buckets, with their sum and count."""
+
+    kind = 'histogram'
+
+    def __init__(self, registry, name, documentation, labels=(), buckets=DURATION_BUCKETS):
+        super().__init__(registry, name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the seconds spent in the ``with`` block, also when it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted((key, ([*counts], total, count)) for key, (counts, total, count) in self._values.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class Metrics:
+    """In-process counters, gauges and histograms, exposed in the Prometheus text format.
+
+    Recording is a dict update under a lock, and a no-op when
+    ``METRICS_ENABLED`` is off. Values are kept per process; gauges that
+    describe shared state (the job queue) are refreshed from the database
+    by collectors when the metrics are rendered.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.token = None
+        self._metrics = {}
+        self._collectors = []
+        self._commits = threading.local()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        from sqlalchemy import event
+        from sqlalchemy.orm import Session
+
+        self.enabled = app.config.get('METRICS_ENABLED', self.enabled)
+        self.token = app.config.get('METRICS_TOKEN') or None
+        if not event.contains(Session, 'after_commit', self._count_commit):
+            event.listen(Session, 'after_commit', self._count_commit)
+        app.extensions['metrics'] = self
+
+    def _register(self, metric_class, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(PREFIX + name)
+            if metric is None:
+                metric = self._metrics[PREFIX + name] = metric_class(self, PREFIX + name, *args, **kwargs)
+            return metric
+
+    def counter(self, name: str, documentation: str, labels: Iterable[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labels)
+
+    def gauge(self, name: str, documentation: str, labels: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labels)
+
+    def histogram(self, name: str, documentation: str, labels: Iterable[str] = (),
+                  buckets: Iterable[float] = DURATION_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, labels, buckets)
+
+    def add_collector(self, collector: Callable[[], None]):
+        """Call ``collector`` before every render, to refresh gauges. Runs in an app context."""
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def _count_commit(self, session):
+        if getattr(self._commits, 'count', None) is not None:
+            self._commits.count += 1
+
+    @contextmanager
+    def count_commits(self):
+        """Count the database commits made by this thread in the ``with`` block.
+
+        Yields a one-item list holding the count, final once the block exits.
+        """
+        previous = getattr(self._commits, 'count', None)
+        self._commits.count = 0
+        result = [0]
+        try:
+            yield result
+        finally:
+            result[0] = self._commits.count
+            self._commits.count = None if previous is None else previous + result[0]
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                logger.error("Metrics collector %s failed: %s", getattr(collector, '__qualname__', collector), e)
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+        lines = []
+        for _, metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    @property
+    def exposed(self) -> bool:
+        """Whether /metrics is served at all: only with recording on and a token configured."""
+        return self.enabled and bool(self.token)
+
+    def authorized(self, authorization: Optional[str]) -> bool:
+        if not self.token:
+            return False
+        return hmac.compare_digest((authorization or '').encode('utf-8'), f"Bearer {self.token}".encode('utf-8'))
+
+
+metrics = Metrics()
+
+JOBS = metrics.counter('jobs_total', 'Extraction jobs finished, by outcome', ['status'])
+STAGE_SECONDS = metrics.histogram('stage_seconds', 'Seconds spent in each stage of the pipeline', ['stage'])
+REAL_TIME_FACTOR = metrics.histogram('real_time_factor', 'Media seconds transcribed per wall second', ['model'],
+                                     buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32, 64))
+JOB_DB_COMMITS = metrics.histogram('job_db_commits', 'Database commits made while running one job',
+                                   buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000))
+TRANSLATION_REQUEST_SECONDS = metrics.histogram('translation_request_seconds',
+                                                'Latency of requests to the translation backend', ['backend'])
+TRANSLATION_ERRORS = metrics.counter('translation_errors_total', 'Failed translation backend requests', ['backend'])
+MODEL_LOADS = metrics.counter('model_loads_total', 'Whisper models loaded', ['model', 'device', 'precision'])
+MODEL_LOAD_SECONDS = metrics.histogram('model_load_seconds', 'Seconds spent loading Whisper models', ['model'])
+MODEL_EVICTIONS = metrics.counter('model_evictions_total', 'Whisper models evicted from the registry', ['model'])
+QUEUE_JOBS = metrics.gauge('queue_jobs', 'Extractions in the job queue, by state', ['state'])
+QUEUE_OLDEST_WAIT = metrics.gauge('queue_oldest_wait_seconds', 'Seconds the oldest pending extraction has waited')
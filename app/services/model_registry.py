@@ -0,0 +1,236 @@
+import os
+import threading
+import logging
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.services.metrics import MODEL_LOADS, MODEL_LOAD_SECONDS, MODEL_EVICTIONS
+
+logger = logging.getLogger(__name__)
+
+ModelKey = Tuple[str, str, str]
+
+PRECISIONS = ('fp16', 'fp32', 'int8')
+
+
+def parse_precisions(value: Optional[str]) -> dict:
+    """Parse a ``name=precision,...`` mapping such as ``large=int8,base=fp32``."""
+    precisions = {}
+    for item in (value or '').split(','):
+        name, _, precision = item.partition('=')
+        if name.strip() and precision.strip():
+            precisions[name.strip()] = precision.strip()
+    return precisions
+
+
+class ModelRegistry:
+    """Process-wide cache of loaded Whisper models with LRU eviction.
+
+    Models are keyed by (model name, device, precision) and kept in memory
+    until the configured memory budget is exceeded, at which point the least
+    recently used models are dropped. On CPU a model can be loaded with
+    precision ``int8``: its linear layers are dynamically quantized, which
+    is typically much faster at a small accuracy cost.
+
+    Torch thread pools are sized on the first load (``num_threads`` intra-op
+    threads, by default the cores divided by the workers sharing the
+    machine) so concurrent jobs do not oversubscribe the CPU.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self._models = OrderedDict()  # key -> (model, size_bytes)
+        self._lock = threading.Lock()
+        self._loading = {}  # key -> threading.Lock, so each key loads only once
+        self.precision = None  # Default precision, None = fp16 on GPU, fp32 on CPU
+        self.precisions = {}  # Per model name overrides
+        self.num_threads = 0  # Torch intra-op threads, 0 = cores / workers
+        self.interop_threads = 0  # Torch inter-op threads, 0 = torch default
+        self.workers = 1
+        self._threads_configured = False
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def init_app(self, app):
+        """Read the registry settings from the Flask config."""
+        self.max_bytes = app.config.get('WHISPER_MODEL_CACHE_BYTES', self.max_bytes)
+        self.precision = app.config.get('WHISPER_PRECISION') or None
+        self.precisions = parse_precisions(app.config.get('WHISPER_MODEL_PRECISIONS'))
+        self.num_threads = app.config.get('TORCH_NUM_THREADS', self.num_threads)
+        self.interop_threads = app.config.get('TORCH_INTEROP_THREADS', self.interop_threads)
+        self.workers = max(1, app.config.get('JOB_WORKERS', self.workers))
+        app.extensions['model_registry'] = self
+
+    @staticmethod
+    def default_device() -> str:
+        """Return the device new models should be loaded on."""
+        import torch
+        return 'cuda' if torch.cuda.is_available() else 'cpu'
+
+    def configured_precision(self, name: Optional[str] = None) -> Optional[str]:
+        """Return the precision configured for a model, or None for the device default."""
+        return self.precisions.get(name) or self.precision
+
+    def default_precision(self, device: str, name: Optional[str] = None) -> str:
+        """Return the configured precision for a model, or Whisper's default on the device."""
+        precision = self.configured_precision(name)
+        if precision == 'int8' and device != 'cpu':
+            precision = None  # Dynamic quantization only runs on CPU
+        return precision or ('fp16' if device == 'cuda' else 'fp32')
+
+    def get(self, name: str, device: Optional[str] = None, precision: Optional[str] = None):
+        """Return a loaded model, loading it on first use."""
+        device = device or self.default_device()
+        precision = precision or self.default_precision(device, name)
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unsupported precision {precision}, expected one of {', '.join(PRECISIONS)}")
+        if precision == 'int8' and device != 'cpu':
+            raise ValueError('int8 precision is only available on CPU')
+        key = (name, device, precision)
+
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return self._models[key][0]
+            key_lock = self._loading.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Another thread may have finished loading while we waited
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    self.hits += 1
+                    return self._models[key][0]
+
+            model = self._load(name, device, precision)
+            size = self._model_size(model)
+
+            with self._lock:
+                self._models[key] = (model, size)
+                self._models.move_to_end(key)
+                self.loads += 1
+                self._evict(keep=key)
+                self._loading.pop(key, None)
+            return model
+
+    def put(self, name: str, model, device: str = 'cpu', precision: str = 'fp32'):
+        """Register an already constructed model (e.g. a stub used in benchmarks)."""
+        key = (name, device, precision)
+        with self._lock:
+            self._models[key] = (model, self._model_size(model))
+            self._models.move_to_end(key)
+            self._evict(keep=key)
+
+    def evict(self, name: str, device: Optional[str] = None, precision: Optional[str] = None) -> bool:
+        """Drop a model from the registry. Returns True if it was loaded."""
+        with self._lock:
+            for key in list(self._models):
+                if key[0] != name:
+                    continue
+                if device is not None and key[1] != device:
+                    continue
+                if precision is not None and key[2] != precision:
+                    continue
+                del self._models[key]
+                self.evictions += 1
+                MODEL_EVICTIONS.inc(model=key[0])
+                return True
+        return False
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+    def loaded(self) -> list:
+        """Return (key, size_bytes) pairs, least recently used first."""
+        with self._lock:
+            return [(key, size) for key, (_, size) in self._models.items()]
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(size for _, size in self._models.values())
+
+    def _evict(self, keep: ModelKey):
+        """Evict least recently used models until the budget is respected.
+
+        Must be called with the registry lock held. The model identified by
+        ``keep`` is never evicted, even if it alone exceeds the budget.
+        """
+        if not self.max_bytes:
+            return
+        total = sum(size for _, size in self._models.values())
+        for key in list(self._models):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            _, size = self._models.pop(key)
+            total -= size
+            self.evictions += 1
+            MODEL_EVICTIONS.inc(model=key[0])
+            logger.info(f"Evicted Whisper model {key} from registry ({size} bytes)")
+
+    def thread_count(self) -> int:
+        """Torch intra-op threads each worker uses."""
+        return self.num_threads or max(1, (os.cpu_count() or 1) // self.workers)
+
+    def configure_threads(self):
+        """Size torch's thread pools once per process, before the first model runs."""
+        if self._threads_configured:
+            return
+        self._threads_configured = True
+        import torch
+
+        torch.set_num_threads(self.thread_count())
+        if self.interop_threads:
+            try:
+                torch.set_num_interop_threads(self.interop_threads)
+            except RuntimeError as e:
+                # Only allowed before any inter-op parallel work has started
+                logger.warning(f"Could not set torch inter-op threads: {str(e)}")
+        logger.info(f"Torch using {torch.get_num_threads()} intra-op and "
+                    f"{torch.get_num_interop_threads()} inter-op thread(s)")
+
+    def _load(self, name: str, device: str, precision: str):
+        import whisper
+
+        self.configure_threads()
+        logger.info(f"Loading Whisper model {name} on {device} ({precision})...")
+        with MODEL_LOAD_SECONDS.time(model=name):
+            model = whisper.load_model(name, device=device)
+            if precision == 'int8':
+                model = quantize_int8(model)
+        MODEL_LOADS.inc(model=name, device=device, precision=precision)
+        logger.info(f"Whisper model {name} loaded successfully")
+        return model
+
+    @staticmethod
+    def _model_size(model) -> int:
+        """Estimate the memory used by a model's parameters and buffers."""
+        try:
+            size = sum(p.numel() * p.element_size() for p in model.parameters())
+            size += sum(b.numel() * b.element_size() for b in model.buffers())
+            return size
+        except Exception:
+            return 0
+
+
+def quantize_int8(model):
+    """Dynamically quantize a Whisper model's linear layers to int8 (CPU only).
+
+    Whisper's Linear subclass only adds a dtype cast to ``forward``, which is
+    a no-op in fp32, so the layers are turned into plain ``nn.Linear`` first:
+    ``quantize_dynamic`` matches module types exactly.
+    """
+    import torch
+
+    for module in model.modules():
+        if isinstance(module, torch.nn.Linear) and type(module) is not torch.nn.Linear:
+            module.__class__ = torch.nn.Linear
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,153 @@
+import os
+import random
+import pstats
+import cProfile
+import logging
+import threading
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+
+from app import db
+from app.models import SubtitleExtraction
+from app.services import subtitle_files
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SUFFIX = '.prof'
+TORCH_PROFILE_SUFFIX = '.torch.txt'
+SORT_KEYS = {
+    'cumulative': lambda row: row['cumulative_seconds'],
+    'tottime': lambda row: row['total_seconds'],
+    'calls': lambda row: row['calls'],
+}
+
+
+def profile_path_for(srt_path: str) -> str:
+    return os.path.splitext(srt_path)[0] + PROFILE_SUFFIX
+
+
+def torch_profile_path_for(srt_path: str) -> str:
+    return os.path.splitext(srt_path)[0] + TORCH_PROFILE_SUFFIX
+
+
+def srt_filename_of(extraction: SubtitleExtraction) -> str:
+    # Same name the extractor gives the SRT, also for jobs that failed before setting it
+    return extraction.srt_filename or os.path.splitext(os.path.basename(extraction.original_filename))[0] + '.srt'
+
+
+def top_functions(path: str, limit: int = 30, sort: str = 'cumulative') -> dict:
+    """The ``limit`` functions of a saved cProfile run with the highest ``sort`` value."""
+    stats = pstats.Stats(path)
+    rows = []
+    for (filename, line, function), (primitive_calls, calls, total, cumulative, _) in stats.stats.items():
+        rows.append({
+            'function': function,
+            'file': filename,
+            'line': line,
+            'calls': calls,
+            'primitive_calls': primitive_calls,
+            'total_seconds': total,
+            'cumulative_seconds': cumulative,
+            'cumulative_per_call_seconds': cumulative / calls if calls else 0.0,
+        })
+    rows.sort(key=SORT_KEYS[sort], reverse=True)
+    return {
+        'total_calls': stats.total_calls,
+        'total_seconds': stats.total_tt,
+        'sort': sort,
+        'functions': rows[:limit],
+    }
+
+
+class JobProfiler:
+    """Opt-in profiling of single extraction jobs.
+
+    A job is profiled when an admin asked for it at upload time
+    (``profile_requested``) or when it is drawn at ``sample_rate``. The job
+    runs under cProfile, and under the torch CPU profiler when
+    ``torch_enabled`` is set; the artifacts are saved next to the SRT as
+    ``<base>.prof`` and ``<base>.torch.txt``. Only one job per process is
+    profiled at a time; chunk worker processes are not profiled.
+    """
+
+    def __init__(self):
+        self.sample_rate = 0.0
+        self.torch_enabled = False
+        self.admin_emails = frozenset()
+        self.captured = 0
+        self._active = threading.Lock()
+
+    def init_app(self, app):
+        self.sample_rate = app.config.get('PROFILE_SAMPLE_RATE', self.sample_rate)
+        self.torch_enabled = app.config.get('PROFILE_TORCH', self.torch_enabled)
+        self.admin_emails = frozenset(email.strip().lower() for email in app.config.get('ADMIN_EMAILS') or ()
+                                      if email.strip())
+        app.extensions['job_profiler'] = self
+
+    def is_admin(self, user) -> bool:
+        return bool(getattr(user, 'is_authenticated', False) and user.email
+                    and user.email.lower() in self.admin_emails)
+
+    def wanted(self, extraction: SubtitleExtraction) -> bool:
+        return bool(extraction.profile_requested) or random.random() < self.sample_rate
+
+    @contextmanager
+    def profile_job(self, extraction_id: int, upload_folder: str):
+        """Profile the job run in the ``with`` block if it was requested or sampled."""
+        extraction = db.session.get(SubtitleExtraction, extraction_id)
+        if extraction is None or not self.wanted(extraction):
+            yield
+            return
+        if not self._active.acquire(blocking=False):
+            logger.warning(f"Not profiling extraction {extraction_id}: another job is being profiled")
+            yield
+            return
+
+        profiler = cProfile.Profile()
+        torch_profiler = None
+        try:
+            with ExitStack() as stack:
+                if self.torch_enabled:
+                    torch_profiler = stack.enter_context(self._torch_profiler())
+                logger.info(f"Profiling extraction {extraction_id}")
+                profiler.enable()
+                try:
+                    yield
+                finally:
+                    profiler.disable()
+            self._save(extraction_id, upload_folder, profiler, torch_profiler)
+        finally:
+            self._active.release()
+
+    @staticmethod
+    def _torch_profiler():
+        from torch.profiler import ProfilerActivity, profile
+
+        return profile(activities=[ProfilerActivity.CPU], record_shapes=False)
+
+    def _save(self, extraction_id: int, upload_folder: str, profiler, torch_profiler):
+        try:
+            # The job committed or rolled back its own session; read the row again
+            db.session.rollback()
+            extraction = db.session.get(SubtitleExtraction, extraction_id)
+            srt_path = os.path.join(upload_folder, srt_filename_of(extraction))
+
+            path = profile_path_for(srt_path)
+            tmp_path = subtitle_files.temp_path_for(path)
+            profiler.dump_stats(tmp_path)
+            os.replace(tmp_path, path)
+            if torch_profiler is not None:
+                with open(torch_profile_path_for(srt_path), 'w', encoding='utf-8') as f:
+                    f.write(torch_profiler.key_averages().table(sort_by='self_cpu_time_total', row_limit=50))
+
+            extraction.profiled_at = datetime.utcnow()
+            extraction.storage_bytes = None
+            db.session.commit()
+            self.captured += 1
+            logger.info(f"Saved profile of extraction {extraction_id} to {path}")
+        except Exception as e:
+            logger.error(f"Error saving profile of extraction {extraction_id}: {str(e)}")
+            db.session.rollback()
+
+
+job_profiler = JobProfiler()
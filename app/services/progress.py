@@ -0,0 +1,58 @@
+import time
+import logging
+from app import db
+from app.services.progress_events import extraction_event, publish_extraction
+
+logger = logging.getLogger(__name__)
+
+# Progress range the extractor maps the transcribed position of the media onto
+TRANSCRIBE_PROGRESS_START = 20
+TRANSCRIBE_PROGRESS_END = 95
+
+
+class ProgressReporter:
+    """Coalesce progress updates for an extraction into few database commits.
+
+    ``update`` records the latest progress on the model but only commits when
+    at least ``min_interval`` seconds have passed since the last commit and
+    the progress moved by at least ``min_delta`` percentage points. Status
+    changes and the final value should be written with ``force=True``.
+    Every commit is also published to the in-process progress broker.
+    """
+
+    def __init__(self, extraction, min_interval=2.0, min_delta=1.0):
+        self.extraction = extraction
+        self.min_interval = min_interval
+        self.min_delta = min_delta
+        self.commits = 0
+        self._last_commit_at = 0.0
+        self._last_committed = extraction.progress or 0.0
+        self._dirty = False
+
+    def update(self, progress, force=False):
+        """Record new progress, committing it if the throttle allows."""
+        progress = max(0.0, min(100.0, float(progress)))
+        self.extraction.progress = progress
+        self._dirty = True
+
+        now = time.monotonic()
+        if force or (now - self._last_commit_at >= self.min_interval
+                     and abs(progress - self._last_committed) >= self.min_delta):
+            self._commit(now)
+            return True
+        return False
+
+    def flush(self):
+        """Commit any progress that was held back by the throttle."""
+        if self._dirty:
+            self._commit(time.monotonic())
+
+    def _commit(self, now):
+        # Snapshot before committing, as the commit expires the instance
+        event = extraction_event(self.extraction)
+        db.session.commit()
+        self.commits += 1
+        self._last_commit_at = now
+        self._last_committed = event['progress'] or 0.0
+        self._dirty = False
+        publish_extraction(self.extraction, event)
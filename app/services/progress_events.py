@@ -0,0 +1,98 @@
+import threading
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """A subscriber's view of progress events for one user.
+
+    Events are coalesced per extraction: if several updates for the same job
+    arrive before the subscriber reads them, only the latest is delivered.
+    """
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self._pending = {}
+        self._condition = threading.Condition()
+
+    def push(self, event: dict):
+        with self._condition:
+            self._pending[event['id']] = event
+            self._condition.notify()
+
+    def wait(self, timeout: Optional[float] = None) -> list:
+        """Block until events are available (or the timeout expires) and return them."""
+        with self._condition:
+            if not self._pending:
+                self._condition.wait(timeout)
+            events = list(self._pending.values())
+            self._pending.clear()
+            return events
+
+
+class ProgressBroker:
+    """In-process pub/sub for extraction progress and status changes.
+
+    Workers running in this process publish here whenever they commit a
+    progress or status change; the SSE endpoint relays the events to the
+    user's open tabs without touching the database.
+    """
+
+    def __init__(self):
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, user_id) -> Subscription:
+        subscription = Subscription(user_id)
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+    def publish(self, user_id, event: dict):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+            self.published += 1
+        for subscription in subscriptions:
+            subscription.push(event)
+
+
+progress_broker = ProgressBroker()
+
+
+def extraction_event(extraction) -> dict:
+    """Build the progress event payload for an extraction."""
+    return {
+        'id': extraction.id,
+        'user_id': extraction.user_id,
+        'progress': extraction.progress,
+        'status': extraction.status,
+        'error_message': extraction.error_message,
+    }
+
+
+def publish_extraction(extraction, event: Optional[dict] = None):
+    """Publish the progress and status of an extraction to its owner.
+
+    Pass an ``event`` built with ``extraction_event`` before committing to
+    avoid reloading the expired instance afterwards.
+    """
+    try:
+        event = event or extraction_event(extraction)
+        progress_broker.publish(event['user_id'], event)
+    except Exception as e:
+        logger.error(f"Error publishing extraction progress: {str(e)}")
@@ -0,0 +1,101 @@
+import time
+import logging
+import threading
+from typing import Dict, Iterable
+
+from app import db
+from app.models import SubtitleExtraction
+from app.services.progress_events import publish_extraction
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ('pending', 'processing')
+
+
+def extraction_state(extraction: SubtitleExtraction) -> tuple:
+    return extraction.status, extraction.progress, extraction.error_message
+
+
+class ProgressPoller:
+    """Relays the progress of jobs run by other processes to the local progress broker.
+
+    Jobs are claimed database-wide, so a job watched by a stream here may run
+    in another web process, in ``flask worker`` or in a worker process, and
+    its events never reach this process. Streams register the unfinished
+    jobs they watch; one thread per process reads those jobs in a single
+    query every ``interval`` seconds and publishes the ones that changed.
+    Jobs run by this process publish their own events and are not polled,
+    and nothing is queried while no watched job runs elsewhere.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.interval = 5.0
+        self.polls = 0
+        self._watched = {}  # extraction id -> [streams watching it, last published state]
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def init_app(self, app):
+        self.app = app
+        self.interval = app.config.get('PROGRESS_STREAM_POLL_INTERVAL', self.interval)
+        app.extensions['progress_poller'] = self
+
+    def watch(self, states: Dict[int, tuple]):
+        """Watch jobs, given their state as the stream last saw it."""
+        with self._lock:
+            for extraction_id, state in states.items():
+                entry = self._watched.setdefault(extraction_id, [0, state])
+                entry[0] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name='progress-poller', daemon=True)
+                self._thread.start()
+
+    def unwatch(self, extraction_ids: Iterable[int]):
+        with self._lock:
+            for extraction_id in extraction_ids:
+                entry = self._watched.get(extraction_id)
+                if entry:
+                    entry[0] -= 1
+                    if entry[0] <= 0:
+                        del self._watched[extraction_id]
+
+    def _due(self) -> list:
+        from app.services.job_queue import job_queue
+
+        running_here = job_queue.running_here()
+        with self._lock:
+            return [extraction_id for extraction_id, (_, state) in self._watched.items()
+                    if state[0] in ACTIVE_STATUSES and extraction_id not in running_here]
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            due = self._due()
+            if not due:
+                continue
+            with self.app.app_context():
+                try:
+                    self.poll(due)
+                except Exception as e:
+                    logger.error(f"Error polling extraction progress: {str(e)}")
+                finally:
+                    db.session.remove()
+
+    def poll(self, extraction_ids: list) -> int:
+        """Publish the jobs among ``extraction_ids`` whose state changed. Returns how many."""
+        self.polls += 1
+        changed = 0
+        for extraction in SubtitleExtraction.query.filter(SubtitleExtraction.id.in_(extraction_ids)).all():
+            state = extraction_state(extraction)
+            with self._lock:
+                entry = self._watched.get(extraction.id)
+                if entry is None or entry[1] == state:
+                    continue
+                entry[1] = state
+            publish_extraction(extraction)
+            changed += 1
+        return changed
+
+
+progress_poller = ProgressPoller()
@@ -0,0 +1,303 @@
+import os
+import time
+import shutil
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: sweeps are not serialized between processes
+    fcntl = None
+
+import click
+from app import db
+from app.models import SubtitleExtraction, UploadSession
+from app.services import subtitle_files
+from app.services.audio_store import audio_store
+from app.services.cue_store import cue_path_for
+from app.services.profiling import profile_path_for, torch_profile_path_for, srt_filename_of
+from app.services.transcript_index import words_path_for
+from app.services.translated_variants import variant_filename
+from app.services.uploads import upload_manager
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = ('completed', 'failed')
+SWEEP_LOCK_FILENAME = '.janitor.lock'
+
+
+class StorageJanitor:
+    """Retention policies for the upload folder, applied by a periodic sweep.
+
+    A sweep deletes the source media of extractions finished more than
+    ``media_retention_hours`` ago (subtitles are kept, gzip-compressed),
+    deletes abandoned resumable uploads, and brings every user back under
+    ``user_quota_bytes`` by dropping their oldest media early. Subtitles are
+    never deleted: a user whose subtitles alone exceed the quota stays over
+    it. A sweep already running in another process on this host is not
+    repeated. Everything is driven by indexed database queries
+    and the known file names of each extraction, never by listing the
+    upload folder. The bytes used by each extraction are recorded on its row
+    (``storage_bytes``, NULL when it needs measuring again).
+    """
+
+    def __init__(self):
+        self.app = None
+        self.upload_folder = None
+        self.media_retention_hours = 24.0
+        self.user_quota_bytes = 0
+        self.interval = 3600.0
+        self.compress_subtitles = True
+        self.last_sweep = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def init_app(self, app):
+        self.app = app
+        self.upload_folder = app.config['UPLOAD_FOLDER']
+        self.media_retention_hours = app.config.get('STORAGE_MEDIA_RETENTION_HOURS', self.media_retention_hours)
+        self.user_quota_bytes = app.config.get('STORAGE_USER_QUOTA_BYTES', self.user_quota_bytes)
+        self.interval = app.config.get('STORAGE_JANITOR_INTERVAL', self.interval)
+        self.compress_subtitles = app.config.get('SUBTITLE_GZIP', self.compress_subtitles)
+        app.extensions['storage_janitor'] = self
+
+        @app.cli.command('janitor')
+        def janitor_command():
+            """Apply the storage retention policies once and report disk usage."""
+            report = self.sweep()
+            for key, value in report.items():
+                click.echo(f"{key}: {value}")
+
+    def start(self, app=None):
+        """Run a sweep every ``interval`` seconds in a background thread."""
+        app = app or self.app
+        if self._thread or not self.interval:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, args=(app,), name='storage-janitor', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def _loop(self, app):
+        while not self._stop.wait(self.interval):
+            with app.app_context():
+                try:
+                    self.sweep()
+                except Exception as e:
+                    logger.error(f"Storage sweep failed: {str(e)}")
+                    db.session.rollback()
+
+    # Files of an extraction ---------------------------------------------
+
+    def media_path(self, extraction: SubtitleExtraction) -> str:
+        return os.path.join(self.upload_folder, extraction.original_filename)
+
+    def subtitle_paths(self, extraction: SubtitleExtraction) -> list:
+        """The SRT of an extraction and its translated variants."""
+        if not extraction.srt_filename:
+            return []
+        paths = [os.path.join(self.upload_folder, extraction.srt_filename)]
+        for language in filter(None, (extraction.variant_languages or '').split(',')):
+            paths.append(os.path.join(self.upload_folder, variant_filename(
+                extraction.srt_filename, extraction.target_language, language)))
+        return paths
+
+    def profile_paths(self, extraction: SubtitleExtraction) -> list:
+        """Profile artifacts saved for an extraction, if it was profiled."""
+        if not extraction.profiled_at:
+            return []
+        srt_path = os.path.join(self.upload_folder, srt_filename_of(extraction))
+        return [profile_path_for(srt_path), torch_profile_path_for(srt_path)]
+
+    def measure(self, extraction: SubtitleExtraction) -> int:
+        """Bytes on disk used by an extraction: media (until deleted), subtitles, cues and word timings."""
+        total = 0
+        if not extraction.media_deleted_at:
+            total += _file_size(self.media_path(extraction))
+        for path in self.subtitle_paths(extraction):
+            total += subtitle_files.size(path) + _file_size(cue_path_for(path)) + _file_size(words_path_for(path))
+        for path in self.profile_paths(extraction):
+            total += _file_size(path)
+        return total
+
+    def delete_media(self, extraction: SubtitleExtraction, report: dict) -> bool:
+        """Delete the source media of a finished extraction and compress its subtitles."""
+        media_path = self.media_path(extraction)
+        # The same media file may be waiting for another extraction (form uploads reuse file names)
+        in_use = SubtitleExtraction.query.filter(
+            SubtitleExtraction.original_filename == extraction.original_filename,
+            SubtitleExtraction.status.in_(('pending', 'processing'))
+        ).count()
+        if in_use:
+            return False
+
+        report['bytes_freed'] += _remove(media_path)
+        audio_store.evict(media_path)
+        extraction.media_deleted_at = datetime.utcnow()
+        extraction.storage_bytes = None
+        report['media_deleted'] += 1
+        if self.compress_subtitles:
+            for path in self.subtitle_paths(extraction):
+                if os.path.exists(path):
+                    report['bytes_freed'] += subtitle_files.compress(path)
+                    report['subtitles_compressed'] += 1
+        return True
+
+    # Policies -------------------------------------------------------------
+
+    def sweep(self, now: Optional[datetime] = None) -> dict:
+        """Apply the retention policies once. Returns what was done and the disk usage.
+
+        Returns only the disk usage, with ``skipped`` set, when another
+        process is sweeping.
+        """
+        os.makedirs(self.upload_folder, exist_ok=True)
+        with open(os.path.join(self.upload_folder, SWEEP_LOCK_FILENAME), 'a') as lock_file:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    logger.info("Storage sweep already running in another process, skipping")
+                    return dict(self.stats(), skipped=True)
+            return self._sweep(now)
+
+    def _sweep(self, now: Optional[datetime]) -> dict:
+        started = time.monotonic()
+        now = now or datetime.utcnow()
+        report = {
+            'media_deleted': 0,
+            'uploads_expired': 0,
+            'subtitles_compressed': 0,
+            'bytes_freed': 0,
+        }
+
+        if self.media_retention_hours:
+            cutoff = now - timedelta(hours=self.media_retention_hours)
+            self._expire_media(cutoff, report)
+            self._expire_uploads(cutoff, report)
+            db.session.commit()
+
+        self._measure()
+        db.session.commit()
+
+        if self.user_quota_bytes:
+            self._enforce_quotas(report)
+            db.session.commit()
+
+        report['seconds'] = time.monotonic() - started
+        report['finished_at'] = now.isoformat()
+        self.last_sweep = report
+        logger.info(f"Storage sweep: deleted {report['media_deleted']} media file(s), "
+                    f"expired {report['uploads_expired']} upload(s), freed {report['bytes_freed']} bytes in {report['seconds']:.1f}s")
+        return dict(report, **self.stats())
+
+    def _expire_media(self, cutoff: datetime, report: dict):
+        finished_at = db.func.coalesce(SubtitleExtraction.completed_at, SubtitleExtraction.created_at)
+        extractions = SubtitleExtraction.query.filter(
+            SubtitleExtraction.status.in_(FINISHED_STATUSES),
+            SubtitleExtraction.media_deleted_at.is_(None),
+            finished_at < cutoff
+        ).all()
+        for extraction in extractions:
+            self.delete_media(extraction, report)
+
+    def _expire_uploads(self, cutoff: datetime, report: dict):
+        """Delete resumable uploads that were abandoned, failed, or left probing by a process that died."""
+        uploads = UploadSession.query.filter(
+            UploadSession.status.in_(('uploading', 'probing', 'failed')),
+            UploadSession.updated_at < cutoff
+        ).all()
+        for upload in uploads:
+            path = os.path.join(self.upload_folder, upload.stored_filename)
+            report['bytes_freed'] += _remove(path)
+            audio_store.evict(path)
+            upload_manager.forget(upload.id)
+            upload.status = 'expired'
+            report['uploads_expired'] += 1
+
+    def _measure(self):
+        extractions = SubtitleExtraction.query.filter(
+            SubtitleExtraction.status.in_(FINISHED_STATUSES),
+            SubtitleExtraction.storage_bytes.is_(None)
+        ).all()
+        for extraction in extractions:
+            extraction.storage_bytes = self.measure(extraction)
+
+    def _enforce_quotas(self, report: dict):
+        used_bytes = db.func.sum(SubtitleExtraction.storage_bytes)
+        over_quota = db.session.query(SubtitleExtraction.user_id, used_bytes)\
+            .group_by(SubtitleExtraction.user_id)\
+            .having(used_bytes > self.user_quota_bytes)\
+            .all()
+        for user_id, used in over_quota:
+            logger.info(f"User {user_id} uses {used} bytes, over the quota of {self.user_quota_bytes}")
+            finished = SubtitleExtraction.query.filter(
+                SubtitleExtraction.user_id == user_id,
+                SubtitleExtraction.status.in_(FINISHED_STATUSES)
+            ).order_by(SubtitleExtraction.created_at, SubtitleExtraction.id).all()
+
+            for extraction in finished:
+                if used <= self.user_quota_bytes:
+                    break
+                if extraction.media_deleted_at:
+                    continue
+                before = extraction.storage_bytes or 0
+                if self.delete_media(extraction, report):
+                    extraction.storage_bytes = self.measure(extraction)
+                    used -= before - extraction.storage_bytes
+            if used > self.user_quota_bytes:
+                logger.warning(f"User {user_id} still uses {used} bytes in subtitles, over the quota of "
+                               f"{self.user_quota_bytes}; subtitles are kept")
+
+    # Metrics --------------------------------------------------------------
+
+    def usage(self, user_id: int) -> int:
+        """Bytes used by a user's extractions, as of the last measurement."""
+        return db.session.query(db.func.coalesce(db.func.sum(SubtitleExtraction.storage_bytes), 0))\
+            .filter(SubtitleExtraction.user_id == user_id).scalar()
+
+    def stats(self) -> dict:
+        from app.services.transcription_cache import transcription_cache
+
+        disk = shutil.disk_usage(self.upload_folder)
+        extraction_bytes, media_files = db.session.query(
+            db.func.coalesce(db.func.sum(SubtitleExtraction.storage_bytes), 0),
+            db.func.coalesce(db.func.sum(db.case((SubtitleExtraction.media_deleted_at.is_(None), 1), else_=0)), 0)
+        ).one()
+        return {
+            'disk_total_bytes': disk.total,
+            'disk_used_bytes': disk.used,
+            'disk_free_bytes': disk.free,
+            'extraction_bytes': extraction_bytes,
+            'media_files': media_files,
+            'cache_bytes': transcription_cache.stats()['size_bytes'],
+            'audio_store_bytes': audio_store.stats()['bytes'],
+            'media_retention_hours': self.media_retention_hours,
+            'user_quota_bytes': self.user_quota_bytes,
+        }
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _remove(path: str) -> int:
+    try:
+        freed = os.path.getsize(path)
+        os.remove(path)
+        return freed
+    except FileNotFoundError:
+        return 0
+
+
+storage_janitor = StorageJanitor()
@@ -1,23 +1,122 @@
 import os
-import whisper
+import time
 from datetime import datetime
+import numpy as np
+from flask import current_app, has_app_context
 from app import db
 from app.models import SubtitleExtraction
-from app.config.languages import SUPPORTED_LANGUAGES, get_whisper_model
+from app.config.languages import SUPPORTED_LANGUAGES, get_whisper_model, supported_language_for, whisper_language_code
+from app.services.audio_store import audio_store
+from app.services import subtitle_files
+from app.services.subtitle_files import PARTIAL_SUFFIX
+from app.services.cue_store import CueStore, load_cues, save_cues
+from app.services.model_registry import model_registry
+from app.services.chunked_transcriber import (
+    SAMPLE_RATE, SegmentStitcher, find_split_points, get_chunked_transcriber, plan_chunks
+)
+from app.services.progress import ProgressReporter, TRANSCRIBE_PROGRESS_START, TRANSCRIBE_PROGRESS_END
+from app.services.progress_events import publish_extraction
+from app.services.transcription_cache import transcription_cache
+from app.services.transcript_index import transcript_index, words_from_segment, words_path_for
+from app.services.throughput import throughput_stats
+from app.services.metrics import JOBS, STAGE_SECONDS
+from app.services.credits import credit_ledger
+from config import Config
 from werkzeug.utils import secure_filename
 import logging
 
 logger = logging.getLogger(__name__)
 
+PROMPT_CHARS = 200  # Text carried over between streamed windows as context
+
 class SubtitleExtractor:
-    def __init__(self, upload_folder):
+    # Decode options; they are part of the transcription cache key
+    TASK = 'transcribe'  # Use transcribe to keep original language
+    WORD_TIMESTAMPS = True
+
+    def __init__(self, upload_folder, model_name=None, language=None, precision=None):
         self.upload_folder = upload_folder
-        logger.info(f"Initializing SubtitleExtractor with upload folder: {upload_folder}")
-        logger.info("Loading Whisper model...")
-        self.model = whisper.load_model("large")
-        logger.info("Whisper model loaded successfully")
+        self.language = whisper_language_code(language)  # Passed to Whisper; None = detect
+        self.model_name = model_name or self._resolve_model_name(language)
+        self._model_fixed = model_name is not None  # Explicit models are not re-routed by language
+        self._precision = precision
+        # None = the registry's setting for this model (int8 on CPU, fp32 or fp16 by default)
+        self.precision = precision or model_registry.configured_precision(self.model_name)
+        self.run_info = {}  # Language and engine configuration of the last transcription
+        logger.info(f"Initializing SubtitleExtractor with upload folder: {upload_folder} "
+                    f"(model: {self.model_name}, precision: {self.precision or 'default'})")
         os.makedirs(upload_folder, exist_ok=True)
 
+    @property
+    def model(self):
+        """The Whisper model, fetched lazily from the shared model registry."""
+        device = 'cpu' if self.precision == 'int8' else None
+        return model_registry.get(self.model_name, device=device, precision=self.precision)
+
+    @property
+    def model_label(self):
+        """Model name qualified with an explicit precision, as used in the transcription cache key."""
+        return f"{self.model_name}@{self.precision}" if self.precision else self.model_name
+
+    def routed_model_label(self, language):
+        """The model label route_language() switches to for a detected Whisper language code."""
+        model_name = self.model_name if self._model_fixed else self._resolve_model_name(supported_language_for(language))
+        precision = self._precision or model_registry.configured_precision(model_name)
+        return f"{model_name}@{precision}" if precision else model_name
+
+    @staticmethod
+    def _resolve_model_name(language=None):
+        """Pick the Whisper model for a job, preferring the per-language mapping."""
+        if language in SUPPORTED_LANGUAGES:
+            return get_whisper_model(language)
+        if has_app_context():
+            return current_app.config.get('WHISPER_MODEL', Config.WHISPER_MODEL)
+        return Config.WHISPER_MODEL
+
+    def detect_language(self, audio):
+        """Detect the spoken language from the first 30 seconds with a small model.
+
+        Returns (Whisper language code, probability), or (None, 0.0) when
+        detection is disabled.
+        """
+        model_name = current_app.config.get('LANGUAGE_DETECT_MODEL')
+        if not model_name:
+            return None, 0.0
+        import whisper
+
+        model = model_registry.get(model_name)
+        window = whisper.pad_or_trim(np.asarray(audio[:whisper.audio.N_SAMPLES]))
+        mel = whisper.log_mel_spectrogram(window, n_mels=model.dims.n_mels).to(model.device)
+        _, probabilities = model.detect_language(mel)
+        language = max(probabilities, key=probabilities.get)
+        return language, probabilities[language]
+
+    def route_language(self, audio):
+        """Pre-detect the language and switch to the model configured for it.
+
+        Sets ``self.language`` so the transcription model skips its own
+        detection. Low-confidence or failed detections leave the job on
+        auto-detection with the default model.
+        """
+        try:
+            language, probability = self.detect_language(audio)
+        except Exception as e:
+            logger.error(f"Language pre-detection failed: {str(e)}")
+            return None
+        if not language:
+            return None
+        min_probability = current_app.config.get('LANGUAGE_DETECT_MIN_PROBABILITY', 0.5)
+        if probability < min_probability:
+            logger.info(f"Language pre-detection unsure ({language}, p={probability:.2f}), using auto-detection")
+            return None
+
+        self.language = language
+        if not self._model_fixed:
+            self.model_name = self._resolve_model_name(supported_language_for(language))
+            self.precision = self._precision or model_registry.configured_precision(self.model_name)
+        logger.info(f"Pre-detected language {language} (p={probability:.2f}), routing to model {self.model_name}")
+        return language
+
     def save_file(self, file, extraction_id):
         logger.info(f"Saving file: {file.filename}")
         try:
@@ -44,74 +143,155 @@ class SubtitleExtractor:
 
     def extract_subtitles(self, file_path, extraction_id):
         logger.info(f"Starting subtitle extraction for {file_path}")
+        partial_path = None
         try:
             # Update progress to 15% - Starting transcription
             extraction = SubtitleExtraction.query.get(extraction_id)
             if not extraction:
                 raise Exception(f"Extraction {extraction_id} not found")
             
+            config = current_app.config
+            reporter = ProgressReporter(
+                extraction,
+                min_interval=config.get('PROGRESS_MIN_INTERVAL', 2.0),
+                min_delta=config.get('PROGRESS_MIN_DELTA', 1.0)
+            )
             extraction.status = 'processing'
-            extraction.progress = 15
-            db.session.commit()
+            reporter.update(15, force=True)
 
-            # Update progress to 20% - Model loaded and ready
-            extraction.progress = 20
-            db.session.commit()
+            # Generate SRT filename. Cues are appended to a partial file while
+            # transcribing so the preview can show them before the job ends.
+            srt_filename = self._srt_filename_for(file_path)
+            srt_path = os.path.join(self.upload_folder, srt_filename)
+            partial_path = srt_path + PARTIAL_SUFFIX
+            extraction.srt_filename = srt_filename
+
+            audio = self._load_audio(file_path)
+            duration = len(audio) / SAMPLE_RATE
+            extraction.duration_seconds = duration
+
+            # Update progress to 20% - Audio decoded and ready
+            reporter.update(TRANSCRIBE_PROGRESS_START, force=True)
 
             # Transcribe the audio - let Whisper detect the language automatically
-            logger.info("Starting transcription...")
-            result = self.model.transcribe(
-                file_path,
-                task="transcribe",  # Use transcribe to keep original language
-                verbose=True,
-                word_timestamps=True
-            )
+            logger.info(f"Starting transcription, writing cues to {partial_path}")
+            info = self.run_info = {}
+            cues = CueStore()
+            words = CueStore()  # One entry per word, for transcript search
+            with STAGE_SECONDS.time(stage='transcribe'), open(partial_path, 'w', encoding='utf-8') as f:
+                segments = self._iter_segments(
+                    audio,
+                    info,
+                    task=self.TASK,
+                    word_timestamps=self.WORD_TIMESTAMPS,
+                    language=self.language
+                )
+                for i, segment in enumerate(segments, start=1):
+                    f.write(self._format_cue(i, segment))
+                    cues.add_segment(segment)
+                    words_from_segment(words, segment)
+
+                    # Progress follows the transcribed position in the media (20-95%)
+                    position = min(segment['end'] / duration, 1.0) if duration else 1.0
+                    span = TRANSCRIBE_PROGRESS_END - TRANSCRIBE_PROGRESS_START
+                    if reporter.update(TRANSCRIBE_PROGRESS_START + position * span):
+                        f.flush()
+            with STAGE_SECONDS.time(stage='srt_write'):
+                os.replace(partial_path, srt_path)
+                save_cues(srt_path, cues)
+                if current_app.config.get('SUBTITLE_GZIP'):
+                    subtitle_files.compress(srt_path)
+                if len(words):
+                    words.save(words_path_for(srt_path))
             logger.info("Transcription completed successfully")
             
             # Get detected language from result
-            detected_language = result.get('language', 'unknown')
+            detected_language = info.get('language') or 'unknown'
             logger.info(f"Detected language: {detected_language}")
 
-            # Update progress to 60% - Transcription complete
-            extraction.progress = 60
-            db.session.commit()
-
-            # Generate SRT filename
-            srt_filename = os.path.splitext(os.path.basename(file_path))[0] + '.srt'
-            srt_path = os.path.join(self.upload_folder, srt_filename)
-            logger.info(f"Generating SRT file: {srt_filename}")
-
-            # Write SRT file
-            with open(srt_path, 'w', encoding='utf-8') as f:
-                total_segments = len(result['segments'])
-                for i, segment in enumerate(result['segments'], start=1):
-                    start = self._format_timestamp(segment['start'])
-                    end = self._format_timestamp(segment['end'])
-                    text = segment['text'].strip()
-                    f.write(f"{i}\n{start} --> {end}\n{text}\n\n")
-                    
-                    # Update progress based on segments processed (60-95%)
-                    progress = 60 + (i / total_segments * 35)
-                    extraction.progress = progress
-                    db.session.commit()
-
             # Update progress to 95% - SRT file generated
-            extraction.progress = 95
-            db.session.commit()
+            reporter.update(TRANSCRIBE_PROGRESS_END, force=True)
 
             logger.info("SRT file generated successfully")
             return srt_filename, detected_language
 
         except Exception as e:
             logger.error(f"Error in extract_subtitles: {str(e)}")
+            if partial_path and os.path.exists(partial_path):
+                os.remove(partial_path)
             # Update extraction status to failed
+            db.session.rollback()
             extraction = SubtitleExtraction.query.get(extraction_id)
             if extraction:
                 extraction.status = 'failed'
                 extraction.error_message = str(e)
                 db.session.commit()
+                publish_extraction(extraction)
             raise Exception(f"Error extracting subtitles: {str(e)}")
 
+    def _load_audio(self, file_path):
+        """Return 16 kHz mono float32 samples, mapped from the audio store (decoded once per job)."""
+        return audio_store.load(file_path)
+
+    def _iter_segments(self, audio, info, **options):
+        """Yield transcribed segments in order as Whisper produces them.
+
+        Short media is transcribed window by window (cut at silent points and
+        conditioned on the previous window's text) so cues and progress are
+        available during the run; long media goes to the parallel chunked
+        transcriber when enabled. ``info['language']`` receives the detected
+        language, and ``engine``, ``threads`` and ``workers`` the configuration
+        that ran, for the throughput statistics.
+        """
+        config = current_app.config
+        duration = len(audio) / SAMPLE_RATE
+
+        if config.get('TRANSCRIBE_PARALLEL') and duration >= config.get('TRANSCRIBE_PARALLEL_MIN_SECONDS', 600):
+            transcriber = get_chunked_transcriber(
+                self.model_name,
+                precision=self.precision,
+                workers=config.get('TRANSCRIBE_CHUNK_WORKERS') or None,
+                chunk_seconds=config.get('TRANSCRIBE_CHUNK_SECONDS', 300),
+                overlap_seconds=config.get('TRANSCRIBE_CHUNK_OVERLAP', 2.0),
+            )
+            info.update(engine='chunked', workers=transcriber.workers,
+                        threads=max(1, (os.cpu_count() or 1) // transcriber.workers))
+            yield from transcriber.iter_transcribe(audio, info, samples_path=getattr(audio, 'filename', None),
+                                                   **options)
+            return
+
+        info.update(engine='stream', workers=1, threads=model_registry.thread_count())
+        window_seconds = config.get('TRANSCRIBE_STREAM_SECONDS', 120)
+        splits = find_split_points(audio, window_seconds, search_seconds=5.0) if window_seconds else []
+        language = options.pop('language', None)
+        prompt = None
+        stitcher = SegmentStitcher()
+        for chunk in plan_chunks(len(audio), splits, overlap_seconds=0):
+            start, end = chunk[0], chunk[1]
+            result = self.model.transcribe(
+                audio[start:end],
+                language=language,
+                initial_prompt=prompt,
+                # Whisper prints every segment when verbose; only worth it when debugging
+                verbose=True if logger.isEnabledFor(logging.DEBUG) else None,
+                **options
+            )
+            # Keep the first window's language for the rest of the file
+            language = language or result.get('language')
+            prompt = result.get('text', '')[-PROMPT_CHARS:] or None
+            yield from stitcher.add(chunk, result['segments'])
+        info['language'] = language
+
+    @staticmethod
+    def _srt_filename_for(file_path):
+        return os.path.splitext(os.path.basename(file_path))[0] + '.srt'
+
+    def _format_cue(self, index, segment):
+        start = self._format_timestamp(segment['start'])
+        end = self._format_timestamp(segment['end'])
+        text = segment['text'].strip()
+        return f"{index}\n{start} --> {end}\n{text}\n\n"
+
     def _format_timestamp(self, seconds):
         hours = int(seconds // 3600)
         minutes = int((seconds % 3600) // 60)
@@ -126,15 +306,61 @@ class SubtitleExtractor:
             logger.error(f"Extraction {extraction_id} not found")
             return
 
+        file_path = os.path.join(self.upload_folder, extraction.original_filename)
+        started = time.monotonic()
         try:
             logger.info(f"Updating extraction {extraction_id} status to processing")
             extraction.status = 'processing'
             extraction.progress = 0
             db.session.commit()
+            publish_extraction(extraction)
 
-            file_path = os.path.join(self.upload_folder, extraction.original_filename)
             logger.info(f"Processing file: {file_path}")
-            srt_filename, detected_language = self.extract_subtitles(file_path, extraction_id)
+
+            # A repeat upload reuses the transcription made after routing its language, without
+            # decoding the media and detecting the language again
+            routing = not self.language and current_app.config.get('LANGUAGE_DETECT_MODEL')
+            cached = None
+            if routing and extraction.media_hash:
+                cached = transcription_cache.lookup_routed(extraction.media_hash, self.TASK,
+                                                           self.WORD_TIMESTAMPS, self.routed_model_label)
+
+            # Pick the model for the spoken language before the cache lookup (both are part of the key)
+            if routing and not cached:
+                if self.route_language(self._load_audio(file_path)):
+                    extraction.target_language = self.language
+                    db.session.commit()
+
+            # Reuse an earlier transcription of the same media with the same options
+            cache_options = dict(model=self.model_label, task=self.TASK,
+                                 word_timestamps=self.WORD_TIMESTAMPS, language=self.language)
+            if not cached and extraction.media_hash:
+                cached = transcription_cache.lookup(extraction.media_hash, **cache_options)
+
+            if cached:
+                logger.info(f"Reusing cached transcription {cached.cache_key} for extraction {extraction_id}")
+                srt_filename = self._srt_filename_for(file_path)
+                srt_path = os.path.join(self.upload_folder, srt_filename)
+                transcription_cache.restore(cached, srt_path, words_path=words_path_for(srt_path))
+                load_cues(srt_path)  # Parse the restored SRT once for the exporters
+                detected_language = cached.detected_language
+                extraction.cache_entry_id = cached.id
+            else:
+                srt_filename, detected_language = self.extract_subtitles(file_path, extraction_id)
+                if extraction.media_hash:
+                    try:
+                        entry = transcription_cache.store(
+                            extraction.media_hash,
+                            srt_path=os.path.join(self.upload_folder, srt_filename),
+                            detected_language=detected_language,
+                            words_path=words_path_for(os.path.join(self.upload_folder, srt_filename)),
+                            **cache_options
+                        )
+                        if entry is not None:
+                            extraction.cache_entry_id = entry.id
+                    except Exception as e:
+                        logger.error(f"Error caching transcription for extraction {extraction_id}: {str(e)}")
+                        db.session.rollback()
 
             logger.info(f"Extraction completed successfully. SRT file: {srt_filename}, Detected language: {detected_language}")
             extraction.srt_filename = srt_filename
@@ -142,16 +368,54 @@ class SubtitleExtractor:
             extraction.status = 'completed'
             extraction.progress = 100
             extraction.completed_at = datetime.utcnow()
+            credit_ledger.capture(extraction)
+            if not cached:
+                self._record_throughput(extraction, time.monotonic() - started)
+            try:
+                with db.session.begin_nested():
+                    transcript_index.index_extraction(extraction, self.upload_folder)
+            except Exception as e:
+                logger.error(f"Error indexing transcript of extraction {extraction_id}: {str(e)}")
             db.session.commit()
+            publish_extraction(extraction)
+            JOBS.inc(status='cached' if cached else 'completed')
 
         except Exception as e:
             logger.error(f"Error processing extraction {extraction_id}: {str(e)}")
+            db.session.rollback()
             extraction.status = 'failed'
             extraction.error_message = str(e)
+            credit_ledger.refund(extraction)
             db.session.commit()
+            publish_extraction(extraction)
+            JOBS.inc(status='failed')
+        finally:
+            STAGE_SECONDS.observe(time.monotonic() - started, stage='job')
+            # The decoded samples are only needed while the job runs
+            audio_store.evict(file_path)
+
+    def _record_throughput(self, extraction, wall_seconds):
+        info = self.run_info
+        try:
+            with db.session.begin_nested():
+                throughput_stats.record(
+                    extraction,
+                    model=self.model_label,
+                    engine=info.get('engine', 'stream'),
+                    device='cpu' if self.precision == 'int8' else model_registry.default_device(),
+                    threads=info.get('threads', model_registry.thread_count()),
+                    workers=info.get('workers', 1),
+                    media_seconds=extraction.duration_seconds,
+                    wall_seconds=wall_seconds
+                )
+        except Exception as e:
+            logger.error(f"Error recording throughput of extraction {extraction.id}: {str(e)}")
 
     def get_media_duration(self, media_path):
         """Get the duration of an audio or video file in seconds."""
+        duration = audio_store.duration(media_path)
+        if duration is not None:
+            return duration
         try:
             import subprocess
             import json
@@ -165,7 +429,8 @@ class SubtitleExtractor:
                 media_path
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            with STAGE_SECONDS.time(stage='probe'):
+                result = subprocess.run(cmd, capture_output=True, text=True)
             if result.returncode == 0:
                 data = json.loads(result.stdout)
                 duration = float(data['format']['duration'])
@@ -173,15 +438,14 @@ class SubtitleExtractor:
                 return duration
             else:
                 logger.error(f"Error getting media duration: {result.stderr}")
-                # Try alternative method with Whisper's audio loading
+                # Fall back to decoding the audio; the samples are kept for transcription
                 try:
-                    import whisper
-                    audio = whisper.load_audio(media_path)
-                    duration = len(audio) / whisper.audio.SAMPLE_RATE  # Convert samples to seconds
+                    audio_store.decode(media_path)
+                    duration = audio_store.duration(media_path)
                     logger.info(f"Fallback: Media duration for {media_path}: {duration} seconds")
                     return duration
-                except Exception as whisper_e:
-                    logger.error(f"Whisper fallback failed: {str(whisper_e)}")
+                except Exception as decode_e:
+                    logger.error(f"Decode fallback failed: {str(decode_e)}")
                     return 60  # Default to 1 minute if we can't get the duration
                 
         except Exception as e:
@@ -0,0 +1,123 @@
+import os
+import gzip
+import uuid
+import shutil
+from typing import Optional
+
+GZIP_SUFFIX = '.gz'
+PARTIAL_SUFFIX = '.part'  # Suffix of the SRT being written while a job runs
+GZIP_LEVEL = 6
+
+
+def temp_path_for(path: str) -> str:
+    """A temporary name next to ``path``, unique per writer so concurrent writers never share it."""
+    return f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+
+
+def stored_path(path: str) -> Optional[str]:
+    """Return where the subtitle file ``path`` is stored: as is, gzip-compressed, or None if missing.
+
+    A plain file wins over a compressed one, as it is only written by newer edits.
+    """
+    if os.path.exists(path):
+        return path
+    if os.path.exists(path + GZIP_SUFFIX):
+        return path + GZIP_SUFFIX
+    return None
+
+
+def exists(path: str) -> bool:
+    return stored_path(path) is not None
+
+
+def is_compressed(path: str) -> bool:
+    return path.endswith(GZIP_SUFFIX)
+
+
+def size(path: str) -> int:
+    """Bytes used on disk by a subtitle file, 0 if missing."""
+    stored = stored_path(path)
+    return os.path.getsize(stored) if stored else 0
+
+
+def mtime(path: str) -> Optional[float]:
+    stored = stored_path(path)
+    return os.path.getmtime(stored) if stored else None
+
+
+def read_bytes(path: str) -> bytes:
+    stored = stored_path(path)
+    if stored is None:
+        raise FileNotFoundError(path)
+    if is_compressed(stored):
+        with gzip.open(stored, 'rb') as f:
+            return f.read()
+    with open(stored, 'rb') as f:
+        return f.read()
+
+
+def read_text(path: str) -> str:
+    return read_bytes(path).decode('utf-8')
+
+
+def _write_gzip(path: str, data: bytes):
+    # mtime=0 keeps the output identical for identical content
+    with open(path, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=GZIP_LEVEL, mtime=0) as f:
+        f.write(data)
+
+
+def write_text(path: str, content: str, compress: bool = True):
+    """Atomically write a subtitle file, gzip-compressed or not, replacing the other form."""
+    data = content.encode('utf-8')
+    target = path + GZIP_SUFFIX if compress else path
+    tmp_path = temp_path_for(target)
+    if compress:
+        _write_gzip(tmp_path, data)
+    else:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+    os.replace(tmp_path, target)
+    _remove(path if compress else path + GZIP_SUFFIX)
+
+
+def compress(path: str) -> int:
+    """Replace a plain subtitle file with its gzip-compressed form. Returns the bytes saved."""
+    if not os.path.exists(path):
+        return 0
+    before = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        data = f.read()
+    tmp_path = temp_path_for(path + GZIP_SUFFIX)
+    _write_gzip(tmp_path, data)
+    # Keep the modification time, so derived files (cues) stay fresh
+    stat = os.stat(path)
+    os.utime(tmp_path, (stat.st_atime, stat.st_mtime))
+    os.replace(tmp_path, path + GZIP_SUFFIX)
+    os.remove(path)
+    return before - os.path.getsize(path + GZIP_SUFFIX)
+
+
+def copy(source: str, destination: str):
+    """Copy a subtitle file in the form it is stored in."""
+    stored = stored_path(source)
+    if stored is None:
+        raise FileNotFoundError(source)
+    target = destination + GZIP_SUFFIX if is_compressed(stored) else destination
+    tmp_path = temp_path_for(target)
+    shutil.copyfile(stored, tmp_path)
+    os.replace(tmp_path, target)
+    _remove(destination if is_compressed(stored) else destination + GZIP_SUFFIX)
+
+
+def remove(path: str) -> int:
+    """Delete a subtitle file in either form. Returns the bytes freed."""
+    return _remove(path) + _remove(path + GZIP_SUFFIX)
+
+
+def _remove(path: str) -> int:
+    try:
+        freed = os.path.getsize(path)
+        os.remove(path)
+        return freed
+    except FileNotFoundError:
+        return 0
@@ -0,0 +1,187 @@
+import time
+import threading
+import logging
+from datetime import datetime
+from typing import Optional
+
+from app import db
+from app.models import JobStat, SubtitleExtraction
+from app.services.metrics import REAL_TIME_FACTOR
+from app.services.progress import TRANSCRIBE_PROGRESS_START, TRANSCRIBE_PROGRESS_END
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (10, 50, 90, 99)
+
+
+def percentile(values: list, pct: float) -> Optional[float]:
+    """Linearly interpolated percentile of sorted values."""
+    if not values:
+        return None
+    rank = (len(values) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+def transcribed_fraction(progress: Optional[float]) -> float:
+    """Fraction of the media transcribed, from the progress percentage reported by the extractor."""
+    span = TRANSCRIBE_PROGRESS_END - TRANSCRIBE_PROGRESS_START
+    return max(0.0, min(1.0, ((progress or 0.0) - TRANSCRIBE_PROGRESS_START) / span))
+
+
+class ThroughputStats:
+    """Measured transcription throughput, for ETAs, queue-wait estimates and capacity planning.
+
+    Every transcribed job records its real-time factor (media seconds per
+    wall second) with the model, engine, device and thread configuration
+    that ran it. Estimates use the median over the last ``window`` jobs; the
+    percentiles are recomputed at most every ``ttl`` seconds.
+    """
+
+    def __init__(self):
+        self.window = 500
+        self.ttl = 60.0
+        self._summary = None  # (groups, all real-time factors, media seconds, expires at)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.window = app.config.get('THROUGHPUT_STATS_WINDOW', self.window)
+        self.ttl = app.config.get('THROUGHPUT_STATS_TTL', self.ttl)
+        app.extensions['throughput_stats'] = self
+
+    def record(self, extraction: SubtitleExtraction, model: str, engine: str, device: str,
+               threads: int, workers: int, media_seconds: float, wall_seconds: float) -> Optional[JobStat]:
+        """Add the throughput of a finished job. Does not commit."""
+        if not media_seconds or wall_seconds <= 0:
+            return None
+        queue_wait = None
+        if extraction.started_at and extraction.created_at:
+            queue_wait = (extraction.started_at - extraction.created_at).total_seconds()
+        stat = JobStat(
+            extraction_id=extraction.id,
+            model=model,
+            engine=engine,
+            device=device,
+            threads=threads,
+            workers=workers,
+            media_seconds=media_seconds,
+            wall_seconds=wall_seconds,
+            real_time_factor=media_seconds / wall_seconds,
+            queue_wait_seconds=queue_wait
+        )
+        db.session.add(stat)
+        REAL_TIME_FACTOR.observe(stat.real_time_factor, model=model)
+        with self._lock:
+            self._summary = None
+        logger.info(f"Extraction {extraction.id}: {media_seconds:.1f}s of media in {wall_seconds:.1f}s "
+                    f"({stat.real_time_factor:.2f}x real time, {model}, {engine}, {threads} thread(s))")
+        return stat
+
+    def _load(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._summary and self._summary[3] > now:
+                return self._summary
+
+        rows = db.session.query(JobStat.model, JobStat.engine, JobStat.device, JobStat.threads,
+                                JobStat.workers, JobStat.real_time_factor, JobStat.media_seconds)\
+            .order_by(JobStat.created_at.desc(), JobStat.id.desc())\
+            .limit(self.window).all()
+        groups = {}
+        for model, engine, device, threads, workers, rtf, _ in rows:
+            groups.setdefault((model, engine, device, threads, workers), []).append(rtf)
+        for values in groups.values():
+            values.sort()
+        summary = (groups, sorted(row[5] for row in rows), sorted(row[6] for row in rows), now + self.ttl)
+        with self._lock:
+            self._summary = summary
+        return summary
+
+    def real_time_factor(self, model: Optional[str] = None) -> Optional[float]:
+        """Median real-time factor of recent jobs (of ``model`` when it has data), None without data."""
+        groups, everything, _, _ = self._load()
+        if model:
+            values = sorted(rtf for key, rtfs in groups.items() if key[0] == model for rtf in rtfs)
+            if values:
+                return percentile(values, 50)
+        return percentile(everything, 50)
+
+    def estimate_seconds(self, media_seconds: float, model: Optional[str] = None) -> Optional[float]:
+        """Expected processing time for media of the given length."""
+        rtf = self.real_time_factor(model)
+        return media_seconds / rtf if rtf else None
+
+    def eta(self, extraction: SubtitleExtraction, now: Optional[datetime] = None) -> Optional[float]:
+        """Seconds until a processing extraction completes.
+
+        Starts from the historical estimate and moves to the speed observed
+        on this job as more of the media is transcribed.
+        """
+        duration = extraction.duration_seconds
+        if extraction.status != 'processing' or not duration:
+            return None
+        now = now or datetime.utcnow()
+        elapsed = (now - extraction.started_at).total_seconds() if extraction.started_at else 0.0
+        fraction = transcribed_fraction(extraction.progress)
+        remaining = duration * (1 - fraction)
+
+        rtf = self.real_time_factor()
+        historical = max(0.0, duration / rtf - elapsed) if rtf else None
+        if fraction <= 0 or elapsed <= 0:
+            return historical
+        live = remaining / (duration * fraction / elapsed)
+        if historical is None:
+            return live
+        return fraction * live + (1 - fraction) * min(historical, remaining / rtf)
+
+    def estimate_queue_wait(self, workers: int) -> Optional[float]:
+        """Seconds before a job queued now would start, given ``workers`` workers."""
+        rtf = self.real_time_factor()
+        if not rtf:
+            return None
+        _, _, media, _ = self._load()
+        typical = percentile(media, 50)
+
+        rows = db.session.query(SubtitleExtraction.status, SubtitleExtraction.progress,
+                                SubtitleExtraction.duration_seconds)\
+            .filter(SubtitleExtraction.status.in_(('pending', 'processing')))\
+            .all()
+        backlog = 0.0
+        for status, progress, duration in rows:
+            duration = duration or typical
+            if status == 'processing':
+                duration *= 1 - transcribed_fraction(progress)
+            backlog += duration
+        return backlog / rtf / max(1, workers)
+
+    def summary(self, workers: int = 1) -> dict:
+        """Real-time factor percentiles per configuration, and the capacity they imply."""
+        groups, everything, _, _ = self._load()
+        configurations = []
+        for (model, engine, device, threads, chunk_workers), values in sorted(groups.items()):
+            entry = {
+                'model': model,
+                'engine': engine,
+                'device': device,
+                'threads': threads,
+                'workers': chunk_workers,
+                'jobs': len(values),
+            }
+            for pct in PERCENTILES:
+                entry[f'p{pct}_real_time_factor'] = percentile(values, pct)
+            configurations.append(entry)
+
+        rtf = percentile(everything, 50)
+        data = {
+            'jobs': len(everything),
+            'configurations': configurations,
+            # Media one worker pool gets through per hour at the median speed
+            'capacity_media_seconds_per_hour': rtf * 3600 * max(1, workers) if rtf else None,
+        }
+        for pct in PERCENTILES:
+            data[f'p{pct}_real_time_factor'] = percentile(everything, pct)
+        return data
+
+
+throughput_stats = ThroughputStats()
@@ -0,0 +1,172 @@
+import os
+import re
+import logging
+from array import array
+from typing import Optional
+
+import click
+from app import db
+from app.models import SubtitleExtraction, TranscriptTerm
+from app.services.cue_store import CueStore
+
+logger = logging.getLogger(__name__)
+
+WORDS_SUFFIX = '.words'
+TOKEN_RE = re.compile(r'\w+')
+MAX_TERM_LENGTH = 64
+SNIPPET_WORDS = 6  # Words of context on each side of a hit
+
+
+def tokenize(text: str) -> list:
+    return TOKEN_RE.findall(text.casefold())
+
+
+def words_path_for(srt_path: str) -> str:
+    return os.path.splitext(srt_path)[0] + WORDS_SUFFIX
+
+
+def words_from_segment(words: CueStore, segment: dict):
+    """Append the word timings of a Whisper segment to a word store."""
+    for word in segment.get('words') or ():
+        text = word['word'].strip()
+        if text:
+            words.append(int(round(word['start'] * 1000)), int(round(word['end'] * 1000)), text)
+
+
+def load_words(srt_path: str) -> Optional[CueStore]:
+    """Return the word store saved next to an SRT, or None if there is none."""
+    path = words_path_for(srt_path)
+    if not os.path.exists(path):
+        return None
+    return CueStore.load(path)
+
+
+def _tokens(words: CueStore):
+    """Yield (term, word index) for every token of the transcript, in order."""
+    for index, text in enumerate(words.texts()):
+        for term in tokenize(text):
+            yield term[:MAX_TERM_LENGTH], index
+
+
+class TranscriptIndex:
+    """Inverted index of word-level transcripts, per user.
+
+    Words with their timings are stored per extraction as a columnar
+    ``.words`` file (a CueStore with one entry per word). The index keeps one
+    TranscriptTerm row per (extraction, term) with the packed token positions,
+    so a search reads only the postings of the query terms through the
+    (user_id, term) index and opens the word files of matching extractions
+    to turn positions into timestamps.
+    """
+
+    def init_app(self, app):
+        app.extensions['transcript_index'] = self
+
+        @app.cli.command('index-transcripts')
+        def index_transcripts_command():
+            """(Re)build the transcript search index from the saved word files."""
+            indexed = 0
+            for extraction in SubtitleExtraction.query.filter_by(status='completed').all():
+                if extraction.srt_filename and self.index_extraction(extraction, app.config['UPLOAD_FOLDER']):
+                    indexed += 1
+            db.session.commit()
+            click.echo(f"Indexed {indexed} transcript(s)")
+
+    def index_extraction(self, extraction: SubtitleExtraction, upload_folder: str) -> bool:
+        """Replace the postings of an extraction with those of its saved words.
+
+        Does not commit. Returns False when the extraction has no word file.
+        """
+        words = load_words(os.path.join(upload_folder, extraction.srt_filename))
+        self.remove_extraction(extraction.id)
+        if words is None:
+            return False
+
+        postings = {}
+        for position, (term, _) in enumerate(_tokens(words)):
+            postings.setdefault(term, array('i')).append(position)
+        if postings:
+            db.session.execute(db.insert(TranscriptTerm), [
+                {
+                    'user_id': extraction.user_id,
+                    'extraction_id': extraction.id,
+                    'term': term,
+                    'positions': positions.tobytes(),
+                }
+                for term, positions in postings.items()
+            ])
+        logger.info(f"Indexed {len(postings)} terms for extraction {extraction.id}")
+        return True
+
+    def remove_extraction(self, extraction_id: int):
+        TranscriptTerm.query.filter_by(extraction_id=extraction_id).delete(synchronize_session=False)
+
+    def search(self, user_id: int, query: str, upload_folder: str, limit: int = 20,
+               max_hits: int = 20) -> list:
+        """Find extractions where the query phrase is spoken, with timestamps.
+
+        Returns up to ``limit`` extractions, newest first, each with up to
+        ``max_hits`` occurrences.
+        """
+        terms = [term[:MAX_TERM_LENGTH] for term in tokenize(query)]
+        if not terms:
+            return []
+
+        rows = db.session.query(TranscriptTerm.extraction_id, TranscriptTerm.term, TranscriptTerm.positions)\
+            .filter(TranscriptTerm.user_id == user_id, TranscriptTerm.term.in_(set(terms)))\
+            .all()
+        postings = {}
+        for extraction_id, term, packed in rows:
+            positions = array('i')
+            positions.frombytes(packed)
+            postings.setdefault(extraction_id, {})[term] = positions
+
+        # Phrase match: each following term must occur at the next position
+        matches = {}
+        for extraction_id, by_term in postings.items():
+            if len(by_term) < len(set(terms)):
+                continue
+            following = [set(by_term[term]) for term in terms[1:]]
+            starts = [
+                position for position in by_term[terms[0]]
+                if all(position + offset in positions for offset, positions in enumerate(following, start=1))
+            ]
+            if starts:
+                matches[extraction_id] = starts
+        if not matches:
+            return []
+
+        extractions = SubtitleExtraction.query\
+            .filter(SubtitleExtraction.id.in_(matches.keys()))\
+            .order_by(SubtitleExtraction.created_at.desc())\
+            .limit(limit).all()
+
+        results = []
+        for extraction in extractions:
+            words = load_words(os.path.join(upload_folder, extraction.srt_filename))
+            if words is None:
+                continue
+            token_words = array('i', (index for _, index in _tokens(words)))
+            texts = words.texts()
+            hits = []
+            for position in matches[extraction.id][:max_hits]:
+                first = token_words[position]
+                last = token_words[position + len(terms) - 1]
+                hits.append({
+                    'start': words.starts[first] / 1000,
+                    'end': words.ends[last] / 1000,
+                    'text': ' '.join(texts[max(0, first - SNIPPET_WORDS):last + SNIPPET_WORDS + 1]),
+                })
+            results.append({
+                'extraction_id': extraction.id,
+                'original_filename': extraction.original_filename,
+                'srt_filename': extraction.srt_filename,
+                'language': extraction.target_language,
+                'created_at': extraction.created_at.isoformat() if extraction.created_at else None,
+                'total_hits': len(matches[extraction.id]),
+                'hits': hits,
+            })
+        return results
+
+
+transcript_index = TranscriptIndex()
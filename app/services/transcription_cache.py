@@ -0,0 +1,230 @@
+import os
+import shutil
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import SubtitleExtraction, TranscriptionCacheEntry
+from app.services import subtitle_files
+from app.services.metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+WORDS_SUFFIX = '.words'  # Word timings stored next to a cached SRT
+
+
+def save_with_hash(file, file_path: str) -> str:
+    """Save an uploaded file to disk, returning the SHA-256 of its content.
+
+    The hash is computed while the data is streamed to disk, so the file is
+    read only once.
+    """
+    digest = hashlib.sha256()
+    stream = file.stream if hasattr(file, 'stream') else file
+    with STAGE_SECONDS.time(stage='save'), open(file_path, 'wb') as f:
+        while True:
+            chunk = stream.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            f.write(chunk)
+    return digest.hexdigest()
+
+
+class TranscriptionCache:
+    """Content-addressed store of finished transcriptions.
+
+    Entries are keyed by (media hash, model, task, word_timestamps, language)
+    so a repeat upload of the same media with the same decode options reuses
+    the stored SRT instead of running Whisper again. The SRT artifacts live in
+    ``<UPLOAD_FOLDER>/cache`` and are evicted least recently used first once
+    their total size exceeds ``max_bytes``.
+    """
+
+    def __init__(self):
+        self.cache_dir = None
+        self.max_bytes = None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.cache_dir = os.path.join(app.config['UPLOAD_FOLDER'], 'cache')
+        self.max_bytes = app.config.get('TRANSCRIPTION_CACHE_BYTES')
+        app.extensions['transcription_cache'] = self
+
+    @staticmethod
+    def make_key(media_hash: str, model: str, task: str, word_timestamps: bool,
+                 language: Optional[str]) -> str:
+        raw = '|'.join([media_hash, model, task, str(bool(word_timestamps)), language or 'auto'])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def path_for(self, entry: TranscriptionCacheEntry) -> str:
+        return os.path.join(self.cache_dir, entry.srt_filename)
+
+    def words_path_for(self, srt_filename: str) -> str:
+        return os.path.join(self.cache_dir, os.path.splitext(srt_filename)[0] + WORDS_SUFFIX)
+
+    def lookup(self, media_hash: str, model: str, task: str, word_timestamps: bool,
+               language: Optional[str] = None) -> Optional[TranscriptionCacheEntry]:
+        """Return the cached entry for these options, or None on a miss."""
+        key = self.make_key(media_hash, model, task, word_timestamps, language)
+        entry = TranscriptionCacheEntry.query.filter_by(cache_key=key).first()
+        if entry and not subtitle_files.exists(self.path_for(entry)):
+            logger.warning(f"Cached SRT for {key} is missing, dropping the entry")
+            self._delete(entry)
+            db.session.commit()
+            entry = None
+
+        with self._lock:
+            if entry:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if entry:
+            entry.hits = (entry.hits or 0) + 1
+            entry.last_used_at = datetime.utcnow()
+            db.session.commit()
+        return entry
+
+    def lookup_routed(self, media_hash: str, task: str, word_timestamps: bool,
+                      model_label_for: Callable[[str], str]) -> Optional[TranscriptionCacheEntry]:
+        """Return an entry made with a pre-detected language, or None.
+
+        Such an entry matches when its model is the one ``model_label_for``
+        picks for its language, so the lookup needs no language detection.
+        """
+        candidates = TranscriptionCacheEntry.query\
+            .filter_by(media_hash=media_hash, task=task, word_timestamps=bool(word_timestamps))\
+            .filter(TranscriptionCacheEntry.language != 'auto').all()
+        for candidate in candidates:
+            if candidate.model == model_label_for(candidate.language):
+                return self.lookup(media_hash, candidate.model, task, word_timestamps, candidate.language)
+        return None
+
+    def store(self, media_hash: str, model: str, task: str, word_timestamps: bool,
+              language: Optional[str], srt_path: str, detected_language: str,
+              words_path: Optional[str] = None) -> Optional[TranscriptionCacheEntry]:
+        """Copy a finished SRT (and its word timings, if any) into the cache and record it.
+
+        The SRT is kept in the form it is stored in (gzip-compressed or not).
+        Returns None, caching nothing, when the artifacts alone exceed the budget.
+        """
+        key = self.make_key(media_hash, model, task, word_timestamps, language)
+        entry = TranscriptionCacheEntry.query.filter_by(cache_key=key).first()
+        if entry:
+            return entry
+
+        if words_path and not os.path.exists(words_path):
+            words_path = None
+        if self.max_bytes:
+            needed = subtitle_files.size(srt_path) + (os.path.getsize(words_path) if words_path else 0)
+            if needed > self.max_bytes:
+                logger.info(f"Transcription {key} ({needed} bytes) exceeds the cache budget, not caching it")
+                return None
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        srt_filename = f"{key}.srt"
+        subtitle_files.copy(srt_path, os.path.join(self.cache_dir, srt_filename))
+        size_bytes = subtitle_files.size(os.path.join(self.cache_dir, srt_filename))
+        if words_path:
+            cached_words_path = self.words_path_for(srt_filename)
+            tmp_path = subtitle_files.temp_path_for(cached_words_path)
+            shutil.copyfile(words_path, tmp_path)
+            os.replace(tmp_path, cached_words_path)
+            size_bytes += os.path.getsize(cached_words_path)
+
+        entry = TranscriptionCacheEntry(
+            cache_key=key,
+            media_hash=media_hash,
+            model=model,
+            task=task,
+            word_timestamps=bool(word_timestamps),
+            language=language or 'auto',
+            srt_filename=srt_filename,
+            detected_language=detected_language,
+            size_bytes=size_bytes,
+            hits=0,
+            last_used_at=datetime.utcnow()
+        )
+        try:
+            with db.session.begin_nested():
+                db.session.add(entry)
+        except IntegrityError:
+            # An identical job finished at the same time and stored the same artifacts first
+            logger.info(f"Transcription {key} was cached concurrently, using the existing entry")
+            return TranscriptionCacheEntry.query.filter_by(cache_key=key).one()
+        db.session.commit()
+        self.evict(keep=entry.id)
+        return entry
+
+    def restore(self, entry: TranscriptionCacheEntry, srt_path: str, words_path: Optional[str] = None):
+        """Materialize a cached SRT at ``srt_path`` (and its word timings at ``words_path``).
+
+        The file is copied rather than linked because users can edit their
+        own SRT afterwards, which must not alter the shared artifact.
+        """
+        subtitle_files.copy(self.path_for(entry), srt_path)
+
+        cached_words_path = self.words_path_for(entry.srt_filename)
+        if words_path and os.path.exists(cached_words_path):
+            tmp_path = subtitle_files.temp_path_for(words_path)
+            shutil.copyfile(cached_words_path, tmp_path)
+            os.replace(tmp_path, words_path)
+
+    def evict(self, keep: Optional[int] = None) -> int:
+        """Drop least recently used entries until the cache fits its budget, never the entry ``keep``."""
+        if not self.max_bytes:
+            return 0
+        total = db.session.query(db.func.coalesce(db.func.sum(TranscriptionCacheEntry.size_bytes), 0)).scalar()
+        if total <= self.max_bytes:
+            return 0
+
+        evicted = 0
+        candidates = TranscriptionCacheEntry.query.filter(TranscriptionCacheEntry.id != keep) if keep \
+            else TranscriptionCacheEntry.query
+        for entry in candidates.order_by(TranscriptionCacheEntry.last_used_at).all():
+            if total <= self.max_bytes:
+                break
+            total -= entry.size_bytes or 0
+            self._delete(entry)
+            evicted += 1
+        db.session.commit()
+        logger.info(f"Evicted {evicted} transcription cache entr{'y' if evicted == 1 else 'ies'}")
+        return evicted
+
+    def stats(self) -> dict:
+        entries, size = db.session.query(
+            db.func.count(TranscriptionCacheEntry.id),
+            db.func.coalesce(db.func.sum(TranscriptionCacheEntry.size_bytes), 0)
+        ).one()
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            'entries': entries,
+            'size_bytes': size,
+            'max_bytes': self.max_bytes,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / lookups if lookups else 0.0,
+        }
+
+    def _delete(self, entry: TranscriptionCacheEntry):
+        SubtitleExtraction.query.filter_by(cache_entry_id=entry.id)\
+            .update({'cache_entry_id': None}, synchronize_session=False)
+        subtitle_files.remove(self.path_for(entry))
+        words_path = self.words_path_for(entry.srt_filename)
+        if os.path.exists(words_path):
+            os.remove(words_path)
+        db.session.delete(entry)
+
+
+transcription_cache = TranscriptionCache()
@@ -0,0 +1,293 @@
+import os
+import json
+import time
+import logging
+import threading
+from contextlib import ExitStack, contextmanager
+from typing import Dict, Iterable, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock is used
+    fcntl = None
+
+from flask import current_app
+from app import db
+from app.models import SubtitleExtraction
+from app.services import subtitle_files
+from app.services.cue_store import cue_path_for, load_cues, save_cues
+from app.services.metrics import STAGE_SECONDS
+from app.services.translation_backends import backend_from_config
+
+logger = logging.getLogger(__name__)
+
+LOCK_SUFFIX = '.lock'
+PROGRESS_SUFFIX = '.progress'  # Next to the original SRT: {language: [cues done, cues total]}
+PROGRESS_WRITE_INTERVAL = 0.5  # Seconds between progress file updates of one generation
+PROGRESS_STALE_SECONDS = 300  # Progress not updated for this long was left by a process that died
+
+
+def variant_filename(srt_filename: str, original_language: str, language: str) -> str:
+    """File name of the ``language`` variant of a subtitle file: ``<base>_<language>.srt``."""
+    if language == original_language:
+        return srt_filename
+    # Get the base filename without language suffix
+    base_filename = srt_filename.replace('_' + original_language + '.srt', '.srt')
+    return base_filename.replace('.srt', f'_{language}.srt')
+
+
+def progress_path_for(srt_path: str) -> str:
+    return os.path.splitext(srt_path)[0] + PROGRESS_SUFFIX
+
+
+@contextmanager
+def _file_lock(path: str):
+    """Exclusive lock on ``path`` shared by all processes on this host (no-op without fcntl)."""
+    if fcntl is None:
+        yield
+        return
+    with open(path, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class TranslatedVariants:
+    """Translated subtitle files, generated the first time they are requested.
+
+    A variant is translated from the stored cues of the original subtitles,
+    written atomically next to them as ``<base>_<language>.srt`` (gzipped
+    when ``SUBTITLE_GZIP`` is set) and served from disk afterwards.
+    Generation is single-flight: concurrent requests for the same
+    (extraction, language) wait on one lock, per process and across
+    processes through a ``.lock`` file, and only the first one translates.
+    Several languages can be generated together (``ensure_many``): the cues
+    are loaded once and all languages are translated concurrently, and their
+    progress is kept in a ``.progress`` file next to the original so that
+    every web process can report it.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.workers = 8
+        self._translator = None
+        self._lock = threading.Lock()
+        self._generating = {}  # (extraction id, language) -> [lock, callers holding or waiting for it]
+        self.generated = 0
+
+    def init_app(self, app):
+        self.app = app
+        self.workers = app.config.get('TRANSLATION_WORKERS', self.workers)
+        app.extensions['translated_variants'] = self
+
+    @property
+    def translator(self):
+        # Created on first use so that the translation backend is not set up at import time
+        if self._translator is None:
+            from app.services.translator import SubtitleTranslator
+            from app.services.translation_memory import translation_memory
+            with self._lock:
+                if self._translator is None:
+                    backend = backend_from_config(self.app.config) if self.app else None
+                    self._translator = SubtitleTranslator(backend=backend, memory=translation_memory)
+        return self._translator
+
+    def _normalize(self, extraction: SubtitleExtraction, language: str) -> str:
+        """Normalize a requested language; ValueError unless the backend supports it.
+
+        Requested languages end up in file names, so nothing else is accepted.
+        """
+        if language == extraction.target_language:
+            return language
+        normalized = self.translator._normalize_language_code(language)
+        if not self.translator._validate_language_code(normalized):
+            raise ValueError(f"Unsupported language: {language}")
+        return normalized
+
+    @contextmanager
+    def _locked(self, extraction_id: int, paths: Dict[str, str]):
+        """Hold the generation locks of several variants, taken in a fixed order so callers cannot deadlock."""
+        # A lock is dropped only once no caller holds or waits for it, and lock files are never
+        # removed: a new lock or inode would let a later caller run alongside a waiting one
+        keys = [(extraction_id, language) for language in sorted(paths)]
+        with self._lock:
+            entries = [self._generating.setdefault(key, [threading.Lock(), 0]) for key in keys]
+            for entry in entries:
+                entry[1] += 1
+        try:
+            with ExitStack() as stack:
+                for (_, language), (key_lock, _) in zip(keys, entries):
+                    stack.enter_context(key_lock)
+                    stack.enter_context(_file_lock(paths[language] + LOCK_SUFFIX))
+                yield
+        finally:
+            with self._lock:
+                for key, entry in zip(keys, entries):
+                    entry[1] -= 1
+                    if not entry[1]:
+                        self._generating.pop(key, None)
+
+    def _record(self, extraction: SubtitleExtraction, languages: Iterable[str]):
+        # Recorded for the storage janitor, which measures the extraction again
+        recorded = set(filter(None, (extraction.variant_languages or '').split(',')))
+        extraction.variant_languages = ','.join(sorted(recorded | set(languages)))
+        extraction.storage_bytes = None
+        db.session.commit()
+
+    def ensure(self, extraction: SubtitleExtraction, language: str, upload_folder: str) -> str:
+        """Return the file name of the ``language`` variant of an extraction, generating it if missing."""
+        language = self._normalize(extraction, language)
+        filename = variant_filename(extraction.srt_filename, extraction.target_language, language)
+        path = os.path.join(upload_folder, filename)
+        if filename == extraction.srt_filename or subtitle_files.exists(path):
+            return filename
+
+        with self._locked(extraction.id, {language: path}):
+            # Another request may have finished the variant while we waited
+            if not subtitle_files.exists(path):
+                self._generate(extraction, language, os.path.join(upload_folder, extraction.srt_filename), path)
+                self._record(extraction, [language])
+        return filename
+
+    def ensure_many(self, extraction: SubtitleExtraction, languages: Iterable[str],
+                    upload_folder: str) -> Dict[str, Optional[str]]:
+        """Make sure the variants in several languages exist, translating the missing ones together.
+
+        Returns the variant file name per (normalized) language, None for
+        languages whose translation failed.
+        """
+        filenames = {}
+        for language in languages:
+            language = self._normalize(extraction, language)
+            filenames[language] = variant_filename(extraction.srt_filename, extraction.target_language, language)
+        paths = {
+            language: os.path.join(upload_folder, filename)
+            for language, filename in filenames.items()
+            if filename != extraction.srt_filename and not subtitle_files.exists(os.path.join(upload_folder, filename))
+        }
+        if paths:
+            with self._locked(extraction.id, paths):
+                missing = {language: path for language, path in paths.items() if not subtitle_files.exists(path)}
+                if missing:
+                    generated = self._generate_many(extraction, missing,
+                                                    os.path.join(upload_folder, extraction.srt_filename))
+                    self._record(extraction, generated)
+            for language, path in paths.items():
+                if not subtitle_files.exists(path):
+                    filenames[language] = None
+        return filenames
+
+    def invalidate(self, extraction: SubtitleExtraction, upload_folder: str) -> int:
+        """Delete the variants of an extraction whose original subtitles changed. Returns how many.
+
+        Variants being generated are waited for and deleted too. The caller commits.
+        """
+        languages = set(filter(None, (extraction.variant_languages or '').split(',')))
+        with self._lock:
+            languages.update(language for key_id, language in self._generating if key_id == extraction.id)
+        languages.discard(extraction.target_language)
+        paths = {
+            language: os.path.join(upload_folder, variant_filename(extraction.srt_filename,
+                                                                   extraction.target_language, language))
+            for language in languages
+        }
+        removed = 0
+        if paths:
+            with self._locked(extraction.id, paths):
+                for path in paths.values():
+                    if subtitle_files.remove(path):
+                        removed += 1
+                    if os.path.exists(cue_path_for(path)):
+                        os.remove(cue_path_for(path))
+        extraction.variant_languages = None
+        extraction.storage_bytes = None
+        if removed:
+            logger.info(f"Deleted {removed} translated variant(s) of extraction {extraction.id}")
+        return removed
+
+    def _update_progress(self, source_path: str, counts: Dict[str, tuple] = None, finished: Iterable[str] = ()):
+        """Merge the counts of some languages into the progress file and drop the finished ones."""
+        path = progress_path_for(source_path)
+        with self._lock, _file_lock(path + LOCK_SUFFIX):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    progress = json.load(f)
+            except (OSError, ValueError):
+                progress = {}
+            progress.update(counts or {})
+            for language in finished:
+                progress.pop(language, None)
+            if progress:
+                tmp_path = subtitle_files.temp_path_for(path)
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(progress, f)
+                os.replace(tmp_path, path)
+                return
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def progress(self, extraction: SubtitleExtraction, upload_folder: str) -> Dict[str, float]:
+        """Fraction done of each variant of an extraction being generated, by any process on this host."""
+        path = progress_path_for(os.path.join(upload_folder, extraction.srt_filename))
+        try:
+            if time.time() - os.path.getmtime(path) > PROGRESS_STALE_SECONDS:
+                return {}
+            with open(path, encoding='utf-8') as f:
+                progress = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return {language: done / total if total else 1.0 for language, (done, total) in progress.items()}
+
+    def _generate(self, extraction: SubtitleExtraction, language: str, source_path: str, path: str):
+        cues = load_cues(source_path)
+        if cues is None:
+            raise FileNotFoundError(f"Subtitles of extraction {extraction.id} not found")
+
+        logger.info(f"Translating extraction {extraction.id} from {extraction.target_language} to {language}")
+        with STAGE_SECONDS.time(stage='translate'):
+            translated, _ = self.translator.translate_cues(cues, language, source_lang=extraction.target_language,
+                                                           strict=True)
+
+        self._write(path, translated)
+
+    def _generate_many(self, extraction: SubtitleExtraction, paths: Dict[str, str], source_path: str) -> list:
+        cues = load_cues(source_path)
+        if cues is None:
+            raise FileNotFoundError(f"Subtitles of extraction {extraction.id} not found")
+
+        pending = {}
+        last_write = [0.0]
+
+        def on_progress(language, done, total):
+            # Called from the translating thread only; the file is rewritten at most every PROGRESS_WRITE_INTERVAL
+            pending[language] = (done, total)
+            if time.monotonic() - last_write[0] >= PROGRESS_WRITE_INTERVAL:
+                self._update_progress(source_path, dict(pending))
+                pending.clear()
+                last_write[0] = time.monotonic()
+
+        logger.info(f"Translating extraction {extraction.id} from {extraction.target_language} "
+                    f"to {', '.join(sorted(paths))}")
+        try:
+            with STAGE_SECONDS.time(stage='translate'):
+                translated, _ = self.translator.translate_cues_many(cues, paths,
+                                                                    source_lang=extraction.target_language,
+                                                                    max_workers=self.workers,
+                                                                    on_progress=on_progress, strict=True)
+            for language, language_cues in translated.items():
+                self._write(paths[language], language_cues)
+        finally:
+            self._update_progress(source_path, finished=paths)
+        return list(translated)
+
+    def _write(self, path: str, cues):
+        subtitle_files.write_text(path, cues.to_srt(), compress=current_app.config.get('SUBTITLE_GZIP', False))
+        save_cues(path, cues)
+        self.generated += 1
+
+
+translated_variants = TranslatedVariants()
@@ -0,0 +1,230 @@
+import time
+import logging
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TranslationBackend:
+    """Interface implemented by translation services used by SubtitleTranslator."""
+
+    name = 'base'
+    max_chunk_length = 5000  # Maximum characters per translation request
+
+    def translate(self, text: str, target: str, source: str = 'auto') -> str:
+        raise NotImplementedError
+
+    def detect(self, text: str) -> Optional[str]:
+        """Return the language of ``text``, or None if the backend cannot tell."""
+        return None
+
+    def supported_languages(self) -> set:
+        """Return the language codes accepted as translation targets."""
+        raise NotImplementedError
+
+
+class GoogleTranslationBackend(TranslationBackend):
+    """Google Translate through deep_translator."""
+
+    name = 'google'
+    # Codes we normalize to that Google spells differently
+    CODE_ALIASES = {
+        'zh': 'zh-CN',
+        'zh_cn': 'zh-CN',
+        'zh_tw': 'zh-TW',
+    }
+
+    def __init__(self):
+        self._translators = {}
+        self._lock = threading.Lock()
+        self._languages = None
+
+    def _translator(self, source: str, target: str):
+        from deep_translator import GoogleTranslator
+
+        key = (source, target)
+        with self._lock:
+            if key not in self._translators:
+                self._translators[key] = GoogleTranslator(source=source, target=target)
+            return self._translators[key]
+
+    def translate(self, text: str, target: str, source: str = 'auto') -> str:
+        target = self.CODE_ALIASES.get(target, target)
+        source = self.CODE_ALIASES.get(source, source)
+        return self._translator(source, target).translate(text)
+
+    def detect(self, text: str) -> Optional[str]:
+        translator = self._translator('auto', 'en')
+        if not hasattr(translator, 'detect'):
+            return None
+        return translator.detect(text)
+
+    def supported_languages(self) -> set:
+        if self._languages is None:
+            # Static table shipped with deep_translator, no network round-trip
+            from deep_translator.constants import GOOGLE_LANGUAGES_TO_CODES
+            self._languages = set(GOOGLE_LANGUAGES_TO_CODES.values()) | set(self.CODE_ALIASES)
+        return self._languages
+
+
+class FakeTranslationBackend(TranslationBackend):
+    """In-process backend for offline tests and benchmarks.
+
+    "Translates" by swapping the case of letters, which keeps digits,
+    punctuation and line structure intact like a well-behaved service. An
+    optional per-request latency simulates network round-trips, and request
+    and character counters show how much traffic a real backend would get.
+    """
+
+    name = 'fake'
+
+    def __init__(self, latency: float = 0.0, max_chunk_length: int = 5000, languages=None):
+        self.latency = latency
+        self.max_chunk_length = max_chunk_length
+        self.languages = set(languages) if languages else {'en', 'pt', 'es', 'fr', 'de', 'it', 'ja', 'ko', 'zh', 'ru'}
+        self.requests = 0
+        self.characters = 0
+        self._lock = threading.Lock()
+
+    def translate(self, text: str, target: str, source: str = 'auto') -> str:
+        if len(text) > self.max_chunk_length:
+            raise ValueError(f"Request of {len(text)} characters exceeds {self.max_chunk_length}")
+        with self._lock:
+            self.requests += 1
+            self.characters += len(text)
+        if self.latency:
+            time.sleep(self.latency)
+        return text.swapcase()
+
+    def detect(self, text: str) -> Optional[str]:
+        return 'en'
+
+    def supported_languages(self) -> set:
+        return self.languages
+
+
+class HTTPTranslationBackend(TranslationBackend):
+    """Self-hosted translation service speaking the LibreTranslate HTTP API.
+
+    ``POST /translate`` with ``q``, ``source`` and ``target``, ``POST /detect``
+    and ``GET /languages``. Requests rejected with 429 or 503 are retried up
+    to ``retries`` times, after the ``Retry-After`` delay when the service
+    sends one. Also used with the stub server in
+    ``benchmarks/stub_translation_server.py``.
+    """
+
+    name = 'http'
+
+    RETRY_STATUSES = (429, 503)
+
+    def __init__(self, url: str, api_key: Optional[str] = None, timeout: float = 30.0,
+                 max_chunk_length: int = 5000, retries: int = 3):
+        import requests
+
+        self.url = url.rstrip('/')
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_chunk_length = max_chunk_length
+        self.retries = retries
+        self._session = requests.Session()
+        self._languages = None
+
+    def _post(self, path: str, payload: dict):
+        if self.api_key:
+            payload = dict(payload, api_key=self.api_key)
+        for attempt in range(self.retries + 1):
+            response = self._session.post(f"{self.url}{path}", json=payload, timeout=self.timeout)
+            if response.status_code not in self.RETRY_STATUSES or attempt == self.retries:
+                break
+            try:
+                delay = float(response.headers.get('Retry-After', ''))
+            except ValueError:
+                delay = 0.5 * 2 ** attempt
+            logger.warning(f"Translation service answered {response.status_code}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+        response.raise_for_status()
+        return response.json()
+
+    def translate(self, text: str, target: str, source: str = 'auto') -> str:
+        return self._post('/translate', {'q': text, 'source': source, 'target': target, 'format': 'text'})['translatedText']
+
+    def detect(self, text: str) -> Optional[str]:
+        detections = self._post('/detect', {'q': text})
+        return detections[0]['language'] if detections else None
+
+    def supported_languages(self) -> set:
+        if self._languages is None:
+            response = self._session.get(f"{self.url}/languages", timeout=self.timeout)
+            response.raise_for_status()
+            self._languages = {language['code'] for language in response.json()}
+        return self._languages
+
+
+class RateLimitedBackend(TranslationBackend):
+    """Wraps a backend with a request rate limit and a cap on in-flight requests.
+
+    Requests are spaced to at most ``requests_per_second`` (token bucket
+    allowing bursts of ``burst``) and at most ``max_concurrent`` run at once,
+    however many threads share the backend. Keeps the wrapped backend's name,
+    so translation memory entries are shared with it.
+    """
+
+    def __init__(self, backend: TranslationBackend, requests_per_second: float = 0,
+                 max_concurrent: int = 0, burst: int = 1):
+        self.backend = backend
+        self.name = backend.name
+        self.max_chunk_length = backend.max_chunk_length
+        self.requests_per_second = requests_per_second
+        self.burst = max(1, burst)
+        self._semaphore = threading.BoundedSemaphore(max_concurrent) if max_concurrent else None
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waited = 0.0  # Seconds spent waiting for the rate limit, summed over threads
+
+    def _acquire(self):
+        if not self.requests_per_second:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.requests_per_second)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.requests_per_second
+                self.waited += delay
+            time.sleep(delay)
+
+    def _call(self, method, *args, **kwargs):
+        self._acquire()
+        if self._semaphore is None:
+            return method(*args, **kwargs)
+        with self._semaphore:
+            return method(*args, **kwargs)
+
+    def translate(self, text: str, target: str, source: str = 'auto') -> str:
+        return self._call(self.backend.translate, text, target=target, source=source)
+
+    def detect(self, text: str) -> Optional[str]:
+        return self._call(self.backend.detect, text)
+
+    def supported_languages(self) -> set:
+        return self.backend.supported_languages()
+
+
+def backend_from_config(config) -> TranslationBackend:
+    """Build the translation backend selected by TRANSLATION_BACKEND, with its rate limits."""
+    if config.get('TRANSLATION_BACKEND') == 'http':
+        backend = HTTPTranslationBackend(config['TRANSLATION_SERVICE_URL'],
+                                         api_key=config.get('TRANSLATION_SERVICE_API_KEY'))
+    else:
+        backend = GoogleTranslationBackend()
+    if config.get('TRANSLATION_RATE_LIMIT') or config.get('TRANSLATION_MAX_CONCURRENCY'):
+        backend = RateLimitedBackend(backend,
+                                     requests_per_second=config.get('TRANSLATION_RATE_LIMIT', 0),
+                                     max_concurrent=config.get('TRANSLATION_MAX_CONCURRENCY', 0),
+                                     burst=config.get('TRANSLATION_RATE_BURST', 1))
+    return backend
@@ -0,0 +1,161 @@
+import os
+import re
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+_SPACES_RE = re.compile(r'[ \t]+')
+
+
+def normalize_text(text: str) -> str:
+    """Normalize cue text for lookups: trim lines and collapse inner whitespace."""
+    return '\n'.join(_SPACES_RE.sub(' ', line).strip() for line in text.strip().split('\n'))
+
+
+class TranslationMemory:
+    """Persistent cue-level translation memory stored in a local SQLite file.
+
+    Entries are keyed by (normalized source text, source language, target
+    language, backend). The memory keeps at most ``max_entries`` rows and
+    drops the least recently used ones beyond that. It uses its own SQLite
+    file rather than the application database so translators can use it
+    outside a Flask app context.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 200000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.duplicates = 0
+        self.bytes_saved = 0
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.path = app.config.get('TRANSLATION_MEMORY_PATH') or os.path.join(
+            app.config['UPLOAD_FOLDER'], 'cache', 'translation_memory.db')
+        self.max_entries = app.config.get('TRANSLATION_MEMORY_MAX_ENTRIES', self.max_entries)
+        app.extensions['translation_memory'] = self
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def _connection(self) -> sqlite3.Connection:
+        # Must be called with the lock held
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS translation_memory ('
+                ' source_text TEXT NOT NULL,'
+                ' source_lang TEXT NOT NULL,'
+                ' target_lang TEXT NOT NULL,'
+                ' backend TEXT NOT NULL,'
+                ' translation TEXT NOT NULL,'
+                ' hits INTEGER NOT NULL DEFAULT 0,'
+                ' last_used REAL NOT NULL,'
+                ' PRIMARY KEY (source_text, source_lang, target_lang, backend))'
+            )
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS ix_translation_memory_last_used'
+                ' ON translation_memory (last_used)'
+            )
+            self._conn.commit()
+        return self._conn
+
+    def get_many(self, texts: Iterable[str], source_lang: str, target_lang: str,
+                 backend: str) -> Dict[str, str]:
+        """Look up normalized texts, returning the ones found and their translations."""
+        texts = list(texts)
+        if not self.enabled or not texts:
+            return {}
+
+        found = {}
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            # Stay below SQLite's bound-parameter limit
+            for start in range(0, len(texts), 500):
+                batch = texts[start:start + 500]
+                placeholders = ','.join('?' * len(batch))
+                rows = conn.execute(
+                    f'SELECT source_text, translation FROM translation_memory'
+                    f' WHERE source_lang = ? AND target_lang = ? AND backend = ?'
+                    f' AND source_text IN ({placeholders})',
+                    [source_lang, target_lang, backend, *batch]
+                ).fetchall()
+                found.update(rows)
+            if found:
+                conn.executemany(
+                    'UPDATE translation_memory SET hits = hits + 1, last_used = ?'
+                    ' WHERE source_text = ? AND source_lang = ? AND target_lang = ? AND backend = ?',
+                    [(now, text, source_lang, target_lang, backend) for text in found]
+                )
+                conn.commit()
+
+            self.hits += len(found)
+            self.misses += len(texts) - len(found)
+            self.bytes_saved += sum(len(text.encode('utf-8')) for text in found)
+        return found
+
+    def put_many(self, translations: Dict[str, str], source_lang: str, target_lang: str,
+                 backend: str):
+        """Store translations of normalized texts and trim the memory to its limit."""
+        if not self.enabled or not translations:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                'INSERT OR REPLACE INTO translation_memory'
+                ' (source_text, source_lang, target_lang, backend, translation, hits, last_used)'
+                ' VALUES (?, ?, ?, ?, ?, 0, ?)',
+                [(text, source_lang, target_lang, backend, translation, now)
+                 for text, translation in translations.items()]
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def record_duplicates(self, count: int, size: int):
+        """Account for repeated cues that were translated once per file."""
+        with self._lock:
+            self.duplicates += count
+            self.bytes_saved += size
+
+    def _evict(self, conn: sqlite3.Connection):
+        if not self.max_entries:
+            return
+        (count,) = conn.execute('SELECT COUNT(*) FROM translation_memory').fetchone()
+        if count > self.max_entries:
+            conn.execute(
+                'DELETE FROM translation_memory WHERE rowid IN ('
+                ' SELECT rowid FROM translation_memory ORDER BY last_used LIMIT ?)',
+                (count - self.max_entries,)
+            )
+
+    def stats(self) -> dict:
+        entries = 0
+        with self._lock:
+            if self.enabled:
+                (entries,) = self._connection().execute('SELECT COUNT(*) FROM translation_memory').fetchone()
+            lookups = self.hits + self.misses
+            return {
+                'entries': entries,
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'duplicates': self.duplicates,
+                'bytes_saved': self.bytes_saved,
+            }
+
+
+translation_memory = TranslationMemory()
@@ -1,10 +1,18 @@
-from deep_translator import GoogleTranslator
 import re
 import logging
-from typing import Optional, Tuple, Dict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from app.services.translation_backends import TranslationBackend, GoogleTranslationBackend
+from app.services.translation_memory import TranslationMemory, normalize_text
+from app.services.cue_store import CueStore
+from app.services.metrics import TRANSLATION_REQUEST_SECONDS, TRANSLATION_ERRORS
 
 logger = logging.getLogger(__name__)
 
+# Marker line placed before each cue when several cues share one request
+BATCH_MARKER = '[{}]'
+BATCH_MARKER_RE = re.compile(r'^[ \t]*\[(\d+)\][ \t]*$', re.MULTILINE)
+
 class SubtitleTranslator:
     # Language code mapping for common variations
     LANGUAGE_MAP = {
@@ -20,9 +28,14 @@ class SubtitleTranslator:
         'en_GB': 'en',
     }
     
-    def __init__(self):
-        self.translator = GoogleTranslator()
-        self.max_chunk_length = 5000  # Maximum characters per translation request
+    # Case-insensitive view of LANGUAGE_MAP, matching normalized codes
+    _LANGUAGE_MAP_LOWER = {key.lower().replace('-', '_'): value for key, value in LANGUAGE_MAP.items()}
+    
+    def __init__(self, backend: Optional[TranslationBackend] = None,
+                 memory: Optional[TranslationMemory] = None):
+        self.backend = backend or GoogleTranslationBackend()
+        self.memory = memory
+        self.max_chunk_length = self.backend.max_chunk_length  # Maximum characters per translation request
         
     def _normalize_language_code(self, lang_code: str) -> str:
         """Normalize language code to a standard format."""
@@ -33,23 +46,20 @@ class SubtitleTranslator:
         normalized = lang_code.lower().replace('-', '_')
         
         # Check if we have a mapping for this code
-        return self.LANGUAGE_MAP.get(normalized, normalized)
+        return self._LANGUAGE_MAP_LOWER.get(normalized, normalized)
         
     def _validate_language_code(self, lang_code: str) -> bool:
-        """Validate if the language code is supported."""
-        try:
-            # Try to translate a simple test string to validate the language code
-            self.translator.translate('test', target=lang_code)
+        """Validate if the language code is supported, using the backend's static list."""
+        if lang_code in self.backend.supported_languages():
             return True
-        except Exception as e:
-            logger.error(f"Invalid language code {lang_code}: {str(e)}")
-            return False
+        logger.error(f"Invalid language code {lang_code} for backend {self.backend.name}")
+        return False
             
     def _detect_language(self, text: str) -> Optional[str]:
         """Detect the language of the given text."""
         try:
-            detected = self.translator.detect(text)
-            return self._normalize_language_code(detected)
+            detected = self.backend.detect(text)
+            return self._normalize_language_code(detected) if detected else None
         except Exception as e:
             logger.error(f"Error detecting language: {str(e)}")
             return None
@@ -78,10 +88,252 @@ class SubtitleTranslator:
             
         return chunks
         
-    def translate_srt(self, content: str, target_lang: str) -> Tuple[str, Optional[str]]:
+    def _parse_blocks(self, content: str) -> list:
+        """Split SRT content into (number, timing, text_lines) tuples, skipping invalid blocks."""
+        blocks = []
+        for block in re.split(r'\n\s*\n', content.strip()):
+            lines = block.split('\n')
+            if len(lines) < 3:  # Skip invalid blocks
+                continue
+            blocks.append((lines[0], lines[1], lines[2:]))
+        return blocks
+
+    def _pack_batches(self, items: list) -> list:
+        """Group (index, text) pairs into requests of at most ``max_chunk_length`` characters."""
+        batches = []
+        current = []
+        current_length = 0
+        for index, text in items:
+            item_length = len(BATCH_MARKER.format(index)) + len(text) + 2
+            if current and current_length + item_length > self.max_chunk_length:
+                batches.append(current)
+                current = []
+                current_length = 0
+            current.append((index, text))
+            current_length += item_length
+        if current:
+            batches.append(current)
+        return batches
+
+    def _split_batch(self, translated: str) -> Dict[int, str]:
+        """Recover per-cue translations from a translated batch payload."""
+        markers = list(BATCH_MARKER_RE.finditer(translated))
+        parts = {}
+        for marker, following in zip(markers, markers[1:] + [None]):
+            end = following.start() if following else len(translated)
+            parts[int(marker.group(1))] = translated[marker.end():end].strip()
+        return parts
+
+    def _request(self, text: str, source_lang: str, target_lang: str) -> str:
+        """Send one translation request to the backend, recording its latency."""
+        try:
+            with TRANSLATION_REQUEST_SECONDS.time(backend=self.backend.name):
+                return self.backend.translate(text, target=target_lang, source=source_lang)
+        except Exception:
+            TRANSLATION_ERRORS.inc(backend=self.backend.name)
+            raise
+
+    def _translate_single(self, text: str, source_lang: str, target_lang: str) -> str:
+        """Translate one cue, splitting it into chunks if it is too long for one request."""
+        translated_chunks = [
+            self._request(chunk, source_lang, target_lang)
+            for chunk in self._chunk_text(text)
+        ]
+        return '\n'.join(translated_chunks)
+
+    def _translate_batch(self, batch: list, source_lang: str, target_lang: str) -> Dict[int, str]:
+        """Translate a batch of cues in one request.
+
+        If the backend does not give back exactly the markers it was sent, the
+        batch is split in half and retried, down to single cues.
+        """
+        if len(batch) == 1:
+            index, text = batch[0]
+            if len(text) > self.max_chunk_length:
+                return {index: self._translate_single(text, source_lang, target_lang)}
+
+        payload = '\n'.join(f"{BATCH_MARKER.format(index)}\n{text}" for index, text in batch)
+        translated = self._request(payload, source_lang, target_lang)
+        parts = self._split_batch(translated)
+        if set(parts) == {index for index, _ in batch}:
+            return parts
+
+        if len(batch) == 1:
+            # The marker got lost; translate the bare text instead
+            index, text = batch[0]
+            return {index: self._translate_single(text, source_lang, target_lang)}
+
+        logger.warning("Batch of %d cues came back with %d markers, splitting it", len(batch), len(parts))
+        middle = len(batch) // 2
+        parts = self._translate_batch(batch[:middle], source_lang, target_lang)
+        parts.update(self._translate_batch(batch[middle:], source_lang, target_lang))
+        return parts
+
+    def _unique_texts(self, texts: list) -> Tuple[list, list]:
+        """Normalize cue texts; returns (normalized texts, distinct non-empty texts in order)."""
+        normalized = [normalize_text(text) for text in texts]
+        return normalized, list(dict.fromkeys(text for text in normalized if text))
+
+    def _plan(self, normalized: list, unique: list, source_lang: str, target_lang: str) -> Tuple[dict, list]:
+        """Look cues up in the translation memory; returns (known translations, texts still to translate)."""
+        if self.memory is None:
+            return {}, list(unique)
+
+        duplicates = sum(1 for text in normalized if text) - len(unique)
+        if duplicates:
+            occurrences = {}
+            for text in normalized:
+                if text:
+                    occurrences[text] = occurrences.get(text, 0) + 1
+            saved = sum(len(text.encode('utf-8')) * (count - 1) for text, count in occurrences.items())
+            self.memory.record_duplicates(duplicates, saved)
+        translations = self.memory.get_many(unique, source_lang, target_lang, self.backend.name)
+        return translations, [text for text in unique if text not in translations]
+
+    def _finish(self, texts: list, normalized: list, translations: dict, fresh: dict,
+                source_lang: str, target_lang: str) -> list:
+        """Remember fresh translations and map every cue to its translation."""
+        if fresh and self.memory is not None:
+            self.memory.put_many(fresh, source_lang, target_lang, self.backend.name)
+        translations.update(fresh)
+        return [translations.get(key, text) if key else text for key, text in zip(normalized, texts)]
+
+    def _translate_texts(self, texts: list, source_lang: Optional[str], target_lang: str,
+                         strict: bool = False) -> list:
+        """Translate a list of cue texts, packing many cues into each backend request.
+
+        Repeated cues are translated once, and cues already in the translation
+        memory are not sent to the backend at all. Empty texts are passed
+        through, and cues whose batch fails keep their original text, unless
+        ``strict`` is set, in which case the first failure is raised.
+        """
+        source_lang = source_lang or 'auto'
+        normalized, unique = self._unique_texts(texts)
+        translations, missing = self._plan(normalized, unique, source_lang, target_lang)
+
+        fresh = {}
+        for batch in self._pack_batches(list(enumerate(missing))):
+            try:
+                for index, translated in self._translate_batch(batch, source_lang, target_lang).items():
+                    fresh[missing[index]] = translated
+            except Exception as e:
+                logger.error(f"Error translating text: {str(e)}")
+                if strict:
+                    if fresh and self.memory is not None:
+                        self.memory.put_many(fresh, source_lang, target_lang, self.backend.name)
+                    raise
+
+        return self._finish(texts, normalized, translations, fresh, source_lang, target_lang)
+
+    def _detect_source_language(self, texts: list) -> Optional[str]:
+        """Detect the source language from the first non-empty text block."""
+        for text in texts:
+            if text.strip():
+                return self._detect_language(text.strip())
+        return None
+
+    def _source_language(self, texts: list, source_lang: Optional[str]) -> Optional[str]:
+        """Use the known source language (e.g. detected during transcription), detecting it only if missing."""
+        if source_lang and source_lang != 'unknown':
+            return self._normalize_language_code(source_lang)
+        return self._detect_source_language(texts)
+
+    def translate_cues(self, cues: CueStore, target_lang: str, source_lang: Optional[str] = None,
+                       strict: bool = False) -> Tuple[CueStore, Optional[str]]:
+        """
+        Translate a cue store, keeping its timings.
+        Pass ``source_lang`` when it is known to skip language detection, and
+        ``strict`` to fail instead of keeping untranslated cues.
+        Returns a tuple of (translated_cues, source_lang)
+        """
+        target_lang = self._normalize_language_code(target_lang)
+        if not self._validate_language_code(target_lang):
+            raise ValueError(f"Unsupported target language: {target_lang}")
+        
+        texts = cues.texts()
+        source_lang = self._source_language(texts, source_lang)
+        if source_lang and source_lang == target_lang:
+            return cues, source_lang
+        
+        return cues.with_texts(self._translate_texts(texts, source_lang, target_lang, strict)), source_lang
+
+    def translate_cues_many(self, cues: CueStore, target_langs: Iterable[str], source_lang: Optional[str] = None,
+                            max_workers: int = 4, on_progress: Optional[Callable[[str, int, int], None]] = None,
+                            strict: bool = False) -> Tuple[Dict[str, CueStore], Optional[str]]:
+        """
+        Translate a cue store into several languages at once, keeping its timings.
+        The cue texts are normalized and the source language detected once, and
+        the backend requests of all languages run concurrently on ``max_workers``
+        threads (a rate-limited backend still paces them). ``on_progress`` is
+        called from this thread as ``on_progress(language, done, total)`` in
+        distinct cues. With ``strict``, a language whose request fails is left
+        out of the result instead of keeping untranslated cues.
+        Returns a tuple of ({language: translated_cues}, source_lang)
+        """
+        targets = list(dict.fromkeys(self._normalize_language_code(lang) for lang in target_langs))
+        for target_lang in targets:
+            if not self._validate_language_code(target_lang):
+                raise ValueError(f"Unsupported target language: {target_lang}")
+
+        texts = cues.texts()
+        source_lang = self._source_language(texts, source_lang)
+        source = source_lang or 'auto'
+        normalized, unique = self._unique_texts(texts)
+
+        results = {}
+        plans = {}  # language -> (translations, missing, fresh)
+        done = {}
+        tasks = []
+        for target_lang in targets:
+            if source_lang and source_lang == target_lang:
+                results[target_lang] = cues
+                continue
+            translations, missing = self._plan(normalized, unique, source, target_lang)
+            plans[target_lang] = (translations, missing, {})
+            done[target_lang] = len(unique) - len(missing)
+            tasks.extend((target_lang, batch) for batch in self._pack_batches(list(enumerate(missing))))
+        if on_progress:
+            for target_lang in targets:
+                on_progress(target_lang, done.get(target_lang, len(unique)), len(unique))
+
+        failed = set()
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='translate') as executor:
+            futures = {
+                executor.submit(self._translate_batch, batch, source, target_lang): (target_lang, batch)
+                for target_lang, batch in tasks
+            }
+            for future in as_completed(futures):
+                target_lang, batch = futures[future]
+                if target_lang in failed:
+                    continue
+                _, missing, fresh = plans[target_lang]
+                try:
+                    for index, translated in future.result().items():
+                        fresh[missing[index]] = translated
+                except Exception as e:
+                    logger.error(f"Error translating text to {target_lang}: {str(e)}")
+                    if strict:
+                        failed.add(target_lang)
+                        for other, (language, _) in futures.items():
+                            if language == target_lang:
+                                other.cancel()
+                        continue
+                done[target_lang] += len(batch)
+                if on_progress:
+                    on_progress(target_lang, done[target_lang], len(unique))
+
+        for target_lang, (translations, _, fresh) in plans.items():
+            translated = self._finish(texts, normalized, translations, fresh, source, target_lang)
+            if target_lang not in failed:
+                results[target_lang] = cues.with_texts(translated)
+        return results, source_lang
+
+    def translate_srt(self, content: str, target_lang: str,
+                      source_lang: Optional[str] = None) -> Tuple[str, Optional[str]]:
         """
         Translate SRT content to target language while preserving timing and formatting.
-        Returns a tuple of (translated_content, detected_source_lang)
+        Pass ``source_lang`` when it is known to skip language detection.
+        Returns a tuple of (translated_content, source_lang)
         """
         try:
             # Normalize and validate target language
@@ -89,63 +341,24 @@ class SubtitleTranslator:
             if not self._validate_language_code(target_lang):
                 raise ValueError(f"Unsupported target language: {target_lang}")
             
-            # Detect source language from the first non-empty text block
-            source_lang = None
-            for block in re.split(r'\n\s*\n', content.strip()):
-                lines = block.split('\n')
-                if len(lines) >= 3:
-                    text = '\n'.join(lines[2:]).strip()
-                    if text:
-                        source_lang = self._detect_language(text)
-                        break
+            # Split content into subtitle blocks
+            blocks = self._parse_blocks(content)
+            texts = ['\n'.join(text_lines) for _, _, text_lines in blocks]
+            
+            source_lang = self._source_language(texts, source_lang)
             
             # If source language is same as target, return original content
             if source_lang and source_lang == target_lang:
                 return content, source_lang
             
-            # Split content into subtitle blocks
-            blocks = re.split(r'\n\s*\n', content.strip())
-            translated_blocks = []
+            translated_texts = self._translate_texts(texts, source_lang, target_lang)
             
-            for block in blocks:
-                lines = block.split('\n')
-                if len(lines) < 3:  # Skip invalid blocks
-                    continue
-                    
-                # Keep the first line (subtitle number) and second line (timing) unchanged
-                translated_blocks.append(lines[0])  # Subtitle number
-                translated_blocks.append(lines[1])  # Timing
-                
-                # Get the text lines
-                text_lines = lines[2:]
-                text_to_translate = '\n'.join(text_lines)
-                
-                if text_to_translate.strip():
-                    try:
-                        # Split text into chunks if needed
-                        chunks = self._chunk_text(text_to_translate)
-                        translated_chunks = []
-                        
-                        for chunk in chunks:
-                            # Translate each chunk
-                            translated_chunk = self.translator.translate(
-                                chunk,
-                                target=target_lang
-                            )
-                            translated_chunks.append(translated_chunk)
-                        
-                        # Combine translated chunks
-                        translated_text = '\n'.join(translated_chunks)
-                        
-                        # Split translated text back into lines
-                        translated_lines = translated_text.split('\n')
-                        translated_blocks.extend(translated_lines)
-                    except Exception as e:
-                        logger.error(f"Error translating text: {str(e)}")
-                        translated_blocks.extend(text_lines)  # Keep original on error
-                else:
-                    translated_blocks.extend(text_lines)
-                
+            translated_blocks = []
+            for (number, timing, _), translated_text in zip(blocks, translated_texts):
+                # Keep the subtitle number and timing unchanged
+                translated_blocks.append(number)
+                translated_blocks.append(timing)
+                translated_blocks.extend(translated_text.split('\n'))
                 # Add empty line between blocks
                 translated_blocks.append('')
             
@@ -155,4 +368,4 @@ class SubtitleTranslator:
             
         except Exception as e:
             logger.error(f"Error in translate_srt: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
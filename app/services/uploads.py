@@ -0,0 +1,273 @@
+import os
+import uuid
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: chunks are only serialized within a process
+    fcntl = None
+
+from werkzeug.utils import secure_filename
+from app import db
+from app.models import SubtitleExtraction, UploadSession
+from app.services.audio_store import audio_store
+from app.services.credits import credit_ledger
+from app.services.history import extraction_history
+from app.services.job_queue import job_queue
+from app.services.metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+
+def required_credits_for(duration_seconds: float) -> int:
+    """Credits needed for a media file: 1 per minute, rounded to the nearest minute, minimum 1."""
+    return max(1, int((duration_seconds / 60) + 0.5))
+
+
+class UploadManager:
+    """Resumable, chunked uploads written straight to disk (tus-style offsets).
+
+    Each upload has a row in UploadSession recording its declared length and
+    the offset received so far. Chunks are appended at that offset while the
+    SHA-256 of the content is updated incrementally. Once the last byte
+    arrives the media is decoded into the audio store in a background thread,
+    credits are checked and the extraction is queued, so the request that
+    completes the upload returns immediately.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.upload_folder = None
+        self.max_bytes = None
+        self._hashers = {}  # upload id -> (hasher, bytes hashed)
+        self._locks = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def init_app(self, app):
+        self.app = app
+        self.upload_folder = app.config['UPLOAD_FOLDER']
+        self.max_bytes = app.config.get('UPLOAD_MAX_BYTES')
+        self._executor = ThreadPoolExecutor(max_workers=app.config.get('UPLOAD_PROBE_WORKERS', 2),
+                                            thread_name_prefix='upload-probe')
+        app.extensions['upload_manager'] = self
+
+    def path_for(self, upload: UploadSession) -> str:
+        return os.path.join(self.upload_folder, upload.stored_filename)
+
+    def _upload_lock(self, upload_id: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(upload_id, threading.Lock())
+
+    def forget(self, upload_id: str):
+        """Drop the lock and hasher of an upload that no longer receives chunks."""
+        with self._lock:
+            self._locks.pop(upload_id, None)
+            self._hashers.pop(upload_id, None)
+
+    def create(self, user_id: int, filename: str, length: int, profile: bool = False) -> UploadSession:
+        """Register a new upload and create its (empty) file. ``profile`` asks for the job to be profiled."""
+        if length <= 0:
+            raise ValueError('Upload length must be positive')
+        if self.max_bytes and length > self.max_bytes:
+            raise ValueError(f'Upload of {length} bytes exceeds the limit of {self.max_bytes} bytes')
+
+        upload_id = uuid.uuid4().hex
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        stored_filename = f"{timestamp}_{upload_id[:8]}_{secure_filename(filename)}"
+        upload = UploadSession(
+            id=upload_id,
+            user_id=user_id,
+            filename=secure_filename(filename),
+            stored_filename=stored_filename,
+            length=length,
+            offset=0,
+            status='uploading',
+            profile_requested=profile
+        )
+        os.makedirs(self.upload_folder, exist_ok=True)
+        open(self.path_for(upload), 'wb').close()
+        db.session.add(upload)
+        db.session.commit()
+        with self._lock:
+            self._hashers[upload_id] = (hashlib.sha256(), 0)
+        logger.info(f"Created upload {upload_id} for {stored_filename} ({length} bytes)")
+        return upload
+
+    def _hasher_at(self, upload: UploadSession):
+        """Return a hasher that has consumed exactly the first ``offset`` bytes.
+
+        After a restart, or when the previous chunk went to another process,
+        the received prefix is re-hashed from disk once.
+        """
+        with self._lock:
+            hasher, hashed = self._hashers.get(upload.id, (None, 0))
+        if hasher is not None and hashed == upload.offset:
+            return hasher
+
+        hasher = hashlib.sha256()
+        remaining = upload.offset
+        with open(self.path_for(upload), 'rb') as f:
+            while remaining:
+                chunk = f.read(min(WRITE_BUFFER_SIZE, remaining))
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                remaining -= len(chunk)
+        return hasher
+
+    def write_chunk(self, upload: UploadSession, offset: int, stream) -> int:
+        """Append data from ``stream`` at ``offset`` and return the new offset.
+
+        Raises ValueError if ``offset`` does not match the bytes received so
+        far, or if another request is writing to the upload. Data received
+        before a dropped connection is kept, so the client can resume from
+        the returned (or HEAD-reported) offset.
+        """
+        upload_id = upload.id
+        with self._upload_lock(upload_id), open(self.path_for(upload), 'r+b') as f:
+            # The part file is locked across processes; the offset is then only
+            # moved from the value this request started from
+            if fcntl is not None:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    raise ValueError('Upload is receiving another chunk')
+            db.session.refresh(upload)
+            if upload.status != 'uploading':
+                self.forget(upload.id)
+                raise ValueError(f'Upload is {upload.status}')
+            if offset != upload.offset:
+                raise ValueError(f'Offset {offset} does not match {upload.offset}')
+
+            hasher = self._hasher_at(upload)
+            written = 0
+            error = None
+            with STAGE_SECONDS.time(stage='save'):
+                f.seek(offset)
+                f.truncate()
+                try:
+                    while offset + written < upload.length:
+                        chunk = stream.read(min(WRITE_BUFFER_SIZE, upload.length - offset - written))
+                        if not chunk:
+                            break
+                        f.write(chunk)
+                        hasher.update(chunk)
+                        written += len(chunk)
+                except Exception as e:
+                    # Keep what arrived before the connection dropped
+                    error = e
+                f.flush()
+
+            new_offset = offset + written
+            complete = new_offset == upload.length
+            values = {'offset': new_offset, 'updated_at': datetime.utcnow()}
+            if complete:
+                values.update(sha256=hasher.hexdigest(), status='probing')
+            result = db.session.execute(
+                db.update(UploadSession)
+                .where(UploadSession.id == upload_id, UploadSession.offset == offset,
+                       UploadSession.status == 'uploading')
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+            db.session.expire(upload)
+            if result.rowcount != 1:
+                self.forget(upload_id)
+                raise ValueError(f'Upload {upload_id} changed while the chunk at offset {offset} was written')
+
+            if complete:
+                self.forget(upload_id)
+                logger.info(f"Upload {upload_id} complete, probing media")
+                self._executor.submit(self._finalize, upload_id)
+            else:
+                with self._lock:
+                    self._hashers[upload_id] = (hasher, new_offset)
+            if error is not None:
+                logger.warning(f"Upload {upload_id} interrupted at offset {new_offset}: {str(error)}")
+            return new_offset
+
+    def _finalize(self, upload_id: str):
+        """Decode a completed upload, reserve its credits and queue the extraction.
+
+        The audio is decoded once here into the audio store; its duration is
+        read from the decoded samples and the worker maps the same array. The
+        upload moves out of 'probing' with a conditional update in the
+        transaction that reserves the credits, so a second run for the same
+        upload reserves and queues nothing.
+        """
+        with self.app.app_context():
+            upload = db.session.get(UploadSession, upload_id)
+            if not upload:
+                return
+            file_path = self.path_for(upload)
+            try:
+                with STAGE_SECONDS.time(stage='probe'):
+                    audio_store.decode(file_path)
+                    duration_seconds = audio_store.duration(file_path)
+                required_credits = required_credits_for(duration_seconds)
+
+                logger.info(f"Upload {upload_id}: duration {duration_seconds} seconds, "
+                            f"required credits {required_credits}")
+
+                extraction = SubtitleExtraction(
+                    user_id=upload.user_id,
+                    original_filename=upload.stored_filename,
+                    target_language='unknown',
+                    status='pending',
+                    media_hash=upload.sha256,
+                    duration_seconds=duration_seconds,
+                    profile_requested=upload.profile_requested
+                )
+                db.session.add(extraction)
+                if not self._leave_probing(upload_id, 'queued', duration_seconds, required_credits):
+                    db.session.rollback()
+                    logger.info(f"Upload {upload_id} was already finalized")
+                    return
+                if not credit_ledger.reserve(extraction, required_credits):
+                    db.session.rollback()
+                    if self._leave_probing(upload_id, 'rejected', duration_seconds, required_credits):
+                        db.session.commit()
+                        audio_store.evict(file_path)
+                        if os.path.exists(file_path):
+                            os.remove(file_path)
+                    return
+
+                upload.extraction_id = extraction.id
+                db.session.commit()
+                extraction_history.invalidate(upload.user_id)
+                job_queue.enqueue(extraction.id)
+            except Exception as e:
+                logger.error(f"Error finalizing upload {upload_id}: {str(e)}")
+                db.session.rollback()
+                audio_store.evict(file_path)
+                upload = db.session.get(UploadSession, upload_id)
+                if upload and upload.status == 'probing':
+                    upload.status = 'failed'
+                    upload.error_message = str(e)
+                    db.session.commit()
+
+    def _leave_probing(self, upload_id: str, status: str, duration: float, required_credits: int) -> bool:
+        """Move an upload from 'probing' to ``status``; False if it already left it."""
+        result = db.session.execute(
+            db.update(UploadSession)
+            .where(UploadSession.id == upload_id, UploadSession.status == 'probing')
+            .values(status=status, duration=duration, required_credits=required_credits)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.expire_all()
+        return result.rowcount == 1
+
+    def get(self, upload_id: str, user_id: int) -> Optional[UploadSession]:
+        return UploadSession.query.filter_by(id=upload_id, user_id=user_id).first()
+
+
+upload_manager = UploadManager()
@@ -0,0 +1,337 @@
+"""Micro-benchmarks for the Python around the Whisper model.
+
+Covers SRT generation in ``extract_subtitles`` (with a fake model returning
+canned segments), ``_format_timestamp``, SRT block splitting and
+``_chunk_text`` in the translator, a full ``translate_srt`` against the
+in-process fake backend, the progress/DB write pattern, and parsing,
+persisting and rendering of the compact cue store. Runs offline
+on CPU; whisper and torch are not needed.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_hot_paths --sizes 10000,100000 --output bench.json
+    python -m benchmarks.bench_hot_paths --compare bench.json
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+
+from benchmarks.fake_whisper import FakeWhisperModel, make_segments, make_srt, silent_audio
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+class CommitCounter:
+    """Counts SQLAlchemy session commits while installed."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, session):
+        self.count += 1
+
+
+def make_app(workdir):
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ['JOB_QUEUE_AUTOSTART'] = '0'
+    from app import create_app
+    app = create_app()
+    app.config['TRANSCRIBE_STREAM_SECONDS'] = 0
+    app.config['TRANSCRIBE_PARALLEL'] = False
+    logging.disable(logging.INFO)
+    return app
+
+
+def make_extraction(upload_folder, filename):
+    from app import db
+    from app.models import User, SubtitleExtraction
+
+    user = User.query.first()
+    if user is None:
+        user = User(first_name='Bench', last_name='Mark', email='bench@example.com')
+        user.set_password('bench')
+        db.session.add(user)
+        db.session.commit()
+    open(os.path.join(upload_folder, filename), 'wb').close()
+    extraction = SubtitleExtraction(user_id=user.id, original_filename=filename,
+                                    target_language='unknown', status='pending')
+    db.session.add(extraction)
+    db.session.commit()
+    return extraction.id
+
+
+def bench_extractor_class():
+    from app.services.subtitle_extractor import SubtitleExtractor
+
+    class BenchExtractor(SubtitleExtractor):
+        """SubtitleExtractor with a fake model and no media decoding."""
+
+        def __init__(self, upload_folder, model, duration):
+            super().__init__(upload_folder, model_name='fake')
+            self._fake_model = model
+            self._duration = duration
+
+        @property
+        def model(self):
+            return self._fake_model
+
+        def _load_audio(self, file_path):
+            return silent_audio(self._duration)
+
+    return BenchExtractor
+
+
+@benchmark('format_timestamp')
+def bench_format_timestamp(ctx, n):
+    from app.services.subtitle_extractor import SubtitleExtractor
+    extractor = SubtitleExtractor(ctx['workdir'], model_name='fake')
+    values = [i * 1.337 for i in range(n)]
+    start = time.perf_counter()
+    for value in values:
+        extractor._format_timestamp(value)
+    return time.perf_counter() - start, {}
+
+
+@benchmark('srt_generation')
+def bench_srt_generation(ctx, n):
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    segments = ctx['segments'](n)
+    model = FakeWhisperModel(segments)
+    duration = segments[-1]['end'] + 1
+    extractor = bench_extractor_class()(ctx['workdir'], model, duration)
+    extraction_id = make_extraction(ctx['workdir'], f'bench_{n}_{time.time_ns()}.mp3')
+    file_path = os.path.join(ctx['workdir'], 'bench.mp3')
+
+    counter = CommitCounter()
+    event.listen(Session, 'after_commit', counter)
+    try:
+        start = time.perf_counter()
+        extractor.extract_subtitles(file_path, extraction_id)
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(Session, 'after_commit', counter)
+    return elapsed, {'db_commits': counter.count}
+
+
+@benchmark('translate_parse_blocks')
+def bench_parse_blocks(ctx, n):
+    from app.services.translator import SubtitleTranslator
+    from app.services.translation_backends import FakeTranslationBackend
+
+    content = ctx['srt'](n)
+    translator = SubtitleTranslator(backend=FakeTranslationBackend())
+    start = time.perf_counter()
+    blocks = translator._parse_blocks(content)
+    elapsed = time.perf_counter() - start
+    assert len(blocks) == n
+    return elapsed, {}
+
+
+@benchmark('translate_chunk_text')
+def bench_chunk_text(ctx, n):
+    from app.services.translator import SubtitleTranslator
+    from app.services.translation_backends import FakeTranslationBackend
+
+    text = '\n'.join(segment['text'] for segment in ctx['segments'](n))
+    translator = SubtitleTranslator(backend=FakeTranslationBackend())
+    start = time.perf_counter()
+    chunks = translator._chunk_text(text)
+    return time.perf_counter() - start, {'chunks': len(chunks)}
+
+
+@benchmark('translate_srt_fake_backend')
+def bench_translate_srt(ctx, n):
+    from app.services.translator import SubtitleTranslator
+    from app.services.translation_backends import FakeTranslationBackend
+
+    # Unique texts, so that the case measures batching rather than deduplication
+    content = make_srt(n, unique_texts=True)
+    backend = FakeTranslationBackend()
+    translator = SubtitleTranslator(backend=backend)
+    start = time.perf_counter()
+    translator.translate_srt(content, 'pt')
+    return time.perf_counter() - start, {'backend_requests': backend.requests}
+
+
+@benchmark('progress_reporter')
+def bench_progress_reporter(ctx, n):
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+    from app import db
+    from app.models import SubtitleExtraction
+    from app.services.progress import ProgressReporter
+
+    extraction_id = make_extraction(ctx['workdir'], f'progress_{n}_{time.time_ns()}.mp3')
+    extraction = db.session.get(SubtitleExtraction, extraction_id)
+    reporter = ProgressReporter(extraction)
+
+    counter = CommitCounter()
+    event.listen(Session, 'after_commit', counter)
+    try:
+        start = time.perf_counter()
+        for i in range(n):
+            reporter.update(i * 100.0 / n)
+        reporter.flush()
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(Session, 'after_commit', counter)
+    return elapsed, {'db_commits': counter.count}
+
+
+@benchmark('cue_parse_srt')
+def bench_cue_parse_srt(ctx, n):
+    from app.services.cue_store import CueStore
+
+    content = ctx['srt'](n)
+    start = time.perf_counter()
+    cues = CueStore.from_srt(content)
+    elapsed = time.perf_counter() - start
+    assert len(cues) == n
+    return elapsed, {}
+
+
+@benchmark('cue_save_load')
+def bench_cue_save_load(ctx, n):
+    from app.services.cue_store import CueStore
+
+    cues = CueStore.from_segments(ctx['segments'](n))
+    path = os.path.join(ctx['workdir'], f'bench_{n}.cues')
+    start = time.perf_counter()
+    cues.save(path)
+    loaded = CueStore.load(path)
+    elapsed = time.perf_counter() - start
+    assert len(loaded) == n
+    return elapsed, {'bytes': os.path.getsize(path)}
+
+
+def _bench_cue_render(fmt):
+    def bench(ctx, n):
+        from app.services.cue_store import CueStore
+
+        cues = CueStore.from_segments(ctx['segments'](n))
+        start = time.perf_counter()
+        output = cues.render(fmt)
+        return time.perf_counter() - start, {'chars': len(output)}
+    return bench
+
+
+for _fmt in ('srt', 'vtt', 'ass', 'json'):
+    benchmark(f'cue_render_{_fmt}')(_bench_cue_render(_fmt))
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def run(names, sizes, repeat):
+    cache = {}
+
+    def cached(kind, factory):
+        def get(n):
+            key = (kind, n)
+            if key not in cache:
+                cache[key] = factory(n)
+            return cache[key]
+        return get
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        app = make_app(workdir)
+        ctx = {
+            'workdir': workdir,
+            'segments': cached('segments', make_segments),
+            'srt': cached('srt', make_srt),
+        }
+        with app.app_context():
+            for name in names:
+                for n in sizes:
+                    timings = []
+                    extra = {}
+                    for _ in range(repeat):
+                        elapsed, extra = BENCHMARKS[name](ctx, n)
+                        timings.append(elapsed)
+                    best = min(timings)
+                    result = {
+                        'name': name,
+                        'n': n,
+                        'seconds': best,
+                        'mean_seconds': sum(timings) / len(timings),
+                        'per_item_us': best / n * 1e6,
+                        **extra,
+                    }
+                    results.append(result)
+                    print(f"{name:<28} n={n:<7} {best * 1000:10.2f} ms  {result['per_item_us']:8.3f} us/item"
+                          + ''.join(f"  {key}={value}" for key, value in extra.items()),
+                          file=sys.stderr)
+    return results
+
+
+def compare(results, previous_path):
+    with open(previous_path, encoding='utf-8') as f:
+        previous = {(r['name'], r['n']): r for r in json.load(f)['results']}
+    print(f"\nCompared with {previous_path}:", file=sys.stderr)
+    for result in results:
+        before = previous.get((result['name'], result['n']))
+        if not before:
+            continue
+        ratio = result['seconds'] / before['seconds'] if before['seconds'] else float('inf')
+        print(f"{result['name']:<28} n={result['n']:<7} {ratio:6.2f}x "
+              f"({before['seconds'] * 1000:.2f} ms -> {result['seconds'] * 1000:.2f} ms)",
+              file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10000,100000', help='Comma separated cue counts')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per benchmark, the best is reported')
+    parser.add_argument('--only', default=None, help='Comma separated benchmark names')
+    parser.add_argument('--output', default=None, help='Write JSON results to this file (default: stdout)')
+    parser.add_argument('--compare', default=None, help='Previous JSON results to compare against')
+    args = parser.parse_args(argv)
+
+    names = args.only.split(',') if args.only else list(BENCHMARKS)
+    sizes = [int(size) for size in args.sizes.split(',')]
+    results = run(names, sizes, args.repeat)
+
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': datetime.utcnow().isoformat(),
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Whisper CPU inference benchmark: real-time factor and text drift per precision.
+
+Transcribes the same audio with each requested precision (through the model
+registry, so int8 uses the same dynamic quantization as the workers) and
+reports the real-time factor (audio duration / processing time) and the word
+error rate of each transcript against the fp32 one. Needs whisper, torch and
+ffmpeg, and a real media file.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_inference --file talk.mp3 --model small --precisions fp32,int8 --threads 4
+"""
+import sys
+import json
+import time
+import argparse
+import platform
+from datetime import datetime
+
+from app.services.model_registry import ModelRegistry
+from benchmarks.bench_hot_paths import git_revision
+
+SAMPLE_RATE = 16000
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """Word-level Levenshtein distance divided by the reference length."""
+    ref = reference.lower().split()
+    hyp = hypothesis.lower().split()
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, start=1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, start=1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1,
+                             previous[j - 1] + (ref_word != hyp_word))
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--file', required=True, help='Media file to transcribe')
+    parser.add_argument('--model', default='base', help='Whisper model name')
+    parser.add_argument('--precisions', default='fp32,int8', help='Comma separated precisions; fp32 is the reference')
+    parser.add_argument('--threads', type=int, default=0, help='Torch intra-op threads (0 = all cores)')
+    parser.add_argument('--interop-threads', type=int, default=0, help='Torch inter-op threads (0 = torch default)')
+    parser.add_argument('--seconds', type=float, default=0, help='Only use the first N seconds of audio')
+    parser.add_argument('--language', default=None, help='Skip language detection')
+    parser.add_argument('--output', default=None, help='Write JSON results to this file (default: stdout)')
+    args = parser.parse_args(argv)
+
+    import whisper
+
+    audio = whisper.load_audio(args.file)
+    if args.seconds:
+        audio = audio[:int(args.seconds * SAMPLE_RATE)]
+    duration = len(audio) / SAMPLE_RATE
+
+    registry = ModelRegistry()
+    registry.num_threads = args.threads
+    registry.interop_threads = args.interop_threads
+
+    precisions = args.precisions.split(',')
+    if 'fp32' in precisions:
+        precisions.remove('fp32')
+    precisions.insert(0, 'fp32')
+
+    results = []
+    reference = None
+    for precision in precisions:
+        started = time.perf_counter()
+        model = registry.get(args.model, device='cpu', precision=precision)
+        load_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        result = model.transcribe(audio, language=args.language, fp16=False, word_timestamps=True)
+        elapsed = time.perf_counter() - started
+        text = result.get('text', '').strip()
+        if reference is None:
+            reference = text
+
+        entry = {
+            'precision': precision,
+            'load_seconds': load_seconds,
+            'transcribe_seconds': elapsed,
+            'real_time_factor': duration / elapsed if elapsed else None,
+            'model_bytes': registry.loaded()[-1][1],
+            'word_error_rate_vs_fp32': word_error_rate(reference, text),
+            'language': result.get('language'),
+            'text': text,
+        }
+        results.append(entry)
+        print(f"{precision:<5} {entry['real_time_factor']:.2f}x real time  WER vs fp32 {entry['word_error_rate_vs_fp32']:.3%}  "
+              f"({elapsed:.1f}s for {duration:.1f}s of audio)", file=sys.stderr)
+        registry.evict(args.model, 'cpu', precision)
+
+    import torch
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'torch': torch.__version__,
+            'threads': torch.get_num_threads(),
+            'interop_threads': torch.get_num_interop_threads(),
+            'model': args.model,
+            'file': args.file,
+            'audio_seconds': duration,
+            'timestamp': datetime.utcnow().isoformat(),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
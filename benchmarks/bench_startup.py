@@ -0,0 +1,147 @@
+"""Cold start benchmark of the web application.
+
+Every measurement runs in a fresh interpreter, so nothing is cached in
+``sys.modules``: importing ``app``, importing the routes, ``create_app()``
+and ``create_app()`` followed by a first request. Each result also records
+whether the heavy modules (torch, whisper, numpy) were imported, which a
+web process should never do. ``--imports`` lists the slowest imports of
+``create_app()`` from ``python -X importtime``.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_startup --repeat 5 --output startup.json
+    python -m benchmarks.bench_startup --compare startup.json --imports 15
+"""
+import os
+import sys
+import json
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+from statistics import median
+
+from benchmarks.bench_hot_paths import git_revision
+
+HEAVY_MODULES = ('torch', 'whisper', 'numpy')
+
+CASES = {
+    'import_app': 'import app',
+    'import_routes': 'import app.main.routes',
+    'create_app': 'from app import create_app\napp = create_app()',
+    'first_request': "from app import create_app\napp = create_app()\napp.test_client().get('/auth/login')",
+}
+
+CHILD = """
+import sys, json, time, logging
+logging.disable(logging.CRITICAL)
+started = time.perf_counter()
+{code}
+seconds = time.perf_counter() - started
+print(json.dumps({{'seconds': seconds, 'heavy': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def child_env(workdir):
+    env = dict(os.environ)
+    env['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'startup.db')}"
+    env['JOB_QUEUE_AUTOSTART'] = '0'
+    return env
+
+
+def run_child(code, env, extra_args=()):
+    result = subprocess.run([sys.executable, *extra_args, '-c', CHILD.format(code=code, heavy=HEAVY_MODULES)],
+                            capture_output=True, text=True, env=env, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def run(names, repeat):
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        env = child_env(workdir)
+        for name in names:
+            timings = []
+            heavy = []
+            for _ in range(repeat):
+                data, _ = run_child(CASES[name], env)
+                timings.append(data['seconds'])
+                heavy = data['heavy']
+            result = {
+                'name': name,
+                'ms': min(timings) * 1000,
+                'median_ms': median(timings) * 1000,
+                'heavy_modules': heavy,
+            }
+            results.append(result)
+            print(f"{name:<16} {result['ms']:9.1f} ms  (median {result['median_ms']:.1f} ms)"
+                  f"  heavy modules: {', '.join(heavy) or 'none'}", file=sys.stderr)
+    return results
+
+
+def slowest_imports(count):
+    """The ``count`` imports of create_app() with the highest self time."""
+    with tempfile.TemporaryDirectory() as workdir:
+        _, stderr = run_child(CASES['create_app'], child_env(workdir), extra_args=('-X', 'importtime'))
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        imports.append({'module': module.strip(), 'self_ms': int(self_us) / 1000,
+                        'cumulative_ms': int(cumulative_us) / 1000})
+    imports.sort(key=lambda entry: entry['self_ms'], reverse=True)
+    print(f"\nSlowest imports of create_app():", file=sys.stderr)
+    for entry in imports[:count]:
+        print(f"{entry['module']:<48} {entry['self_ms']:8.1f} ms  (cumulative {entry['cumulative_ms']:.1f} ms)",
+              file=sys.stderr)
+    return imports[:count]
+
+
+def compare(results, previous_path):
+    with open(previous_path, encoding='utf-8') as f:
+        previous = {r['name']: r for r in json.load(f)['results']}
+    print(f"\nCompared with {previous_path}:", file=sys.stderr)
+    for result in results:
+        before = previous.get(result['name'])
+        if not before:
+            continue
+        print(f"{result['name']:<16} {result['ms'] / before['ms']:6.2f}x "
+              f"({before['ms']:.1f} ms -> {result['ms']:.1f} ms)", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='Fresh interpreters per case, the best is reported')
+    parser.add_argument('--only', default=None, help='Comma separated case names')
+    parser.add_argument('--imports', type=int, default=0, help='Also list the N slowest imports of create_app()')
+    parser.add_argument('--output', default=None, help='Write JSON results to this file (default: stdout)')
+    parser.add_argument('--compare', default=None, help='Previous JSON results to compare against')
+    args = parser.parse_args(argv)
+
+    names = args.only.split(',') if args.only else list(CASES)
+    results = run(names, args.repeat)
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': datetime.utcnow().isoformat(),
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    if args.imports:
+        report['slowest_imports'] = slowest_imports(args.imports)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
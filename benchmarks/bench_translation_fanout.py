@@ -0,0 +1,111 @@
+"""Benchmark of translating one subtitle file into several languages.
+
+Starts ``benchmarks/stub_translation_server.py`` with an injected latency and
+translates the same cues into every target language, first one language
+after the other with ``translate_cues`` and then concurrently with
+``translate_cues_many``, both through ``HTTPTranslationBackend`` wrapped in
+``RateLimitedBackend``. Reports wall time, requests sent, the peak number
+of requests in flight and how many the stub rejected over its rate limit.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_translation_fanout --cues 2000 --languages pt,es,fr,de,it --latency 0.2
+"""
+import sys
+import json
+import time
+import logging
+import argparse
+
+from benchmarks.fake_whisper import make_segments
+from benchmarks.stub_translation_server import start_server
+
+
+def make_translator(url, rate_limit, burst, max_concurrent):
+    from app.services.translator import SubtitleTranslator
+    from app.services.translation_backends import HTTPTranslationBackend, RateLimitedBackend
+
+    backend = RateLimitedBackend(HTTPTranslationBackend(url, max_chunk_length=2000),
+                                 requests_per_second=rate_limit, max_concurrent=max_concurrent, burst=burst)
+    return SubtitleTranslator(backend=backend), backend
+
+
+def run_case(name, cues, languages, args, translate):
+    server = start_server(latency=args.latency, jitter=args.jitter, rate_limit=args.server_rate_limit)
+    try:
+        translator, backend = make_translator(server.url, args.rate_limit, args.burst, args.max_concurrent)
+        start = time.perf_counter()
+        translated = translate(translator, cues, languages)
+        elapsed = time.perf_counter() - start
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    result = {
+        'name': name,
+        'languages': len(languages),
+        'cues': len(cues),
+        'seconds': elapsed,
+        'translated_languages': len(translated),
+        'rate_limit_wait_seconds': backend.waited,
+        **server.stats(),
+    }
+    print(f"{name:<12} {elapsed:8.2f} s  requests={result['requests']}  max_in_flight={result['max_in_flight']}"
+          f"  rejected={result['rejected']}  rate_limit_wait={backend.waited:.2f}s", file=sys.stderr)
+    return result
+
+
+def sequential(translator, cues, languages):
+    return {language: translator.translate_cues(cues, language, source_lang='en', strict=True)[0]
+            for language in languages}
+
+
+def fan_out(workers):
+    def translate(translator, cues, languages):
+        return translator.translate_cues_many(cues, languages, source_lang='en', max_workers=workers,
+                                              strict=True)[0]
+    return translate
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cues', type=int, default=2000, help='Cues in the subtitle file')
+    parser.add_argument('--languages', default='pt,es,fr,de,it', help='Comma separated target languages')
+    parser.add_argument('--latency', type=float, default=0.2, help='Seconds the stub adds to every request')
+    parser.add_argument('--jitter', type=float, default=0.05, help='Random +/- seconds around the latency')
+    parser.add_argument('--workers', type=int, default=8, help='Threads used by the fan-out')
+    parser.add_argument('--rate-limit', type=float, default=20, help='Client requests per second (0 = unlimited)')
+    parser.add_argument('--burst', type=int, default=5, help='Client rate limit burst')
+    parser.add_argument('--max-concurrent', type=int, default=4, help='Client cap on requests in flight')
+    parser.add_argument('--server-rate-limit', type=float, default=0,
+                        help='Requests per second the stub accepts before answering 429 (0 = unlimited)')
+    parser.add_argument('--output', default=None, help='Write JSON results to this file (default: stdout)')
+    args = parser.parse_args(argv)
+
+    from app.services.cue_store import CueStore
+    logging.disable(logging.INFO)
+
+    segments = make_segments(args.cues)
+    for segment in segments:
+        # Unique texts, so that deduplication does not collapse the requests
+        segment['text'] = f"{segment['text']} {segment['id']}"
+    cues = CueStore.from_segments(segments)
+    languages = args.languages.split(',')
+    results = [
+        run_case('sequential', cues, languages, args, sequential),
+        run_case('fan_out', cues, languages, args, fan_out(args.workers)),
+    ]
+    if results[1]['seconds']:
+        print(f"speedup      {results[0]['seconds'] / results[1]['seconds']:8.2f}x", file=sys.stderr)
+
+    report = {'params': vars(args), 'results': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Synthetic transcripts and a stand-in Whisper model for benchmarks.
+
+Nothing here loads weights or decodes media, so benchmarks built on it
+measure only the Python code around the model.
+"""
+import numpy as np
+
+SAMPLE_RATE = 16000
+WORDS = ('thank', 'you', 'so', 'much', 'for', 'coming', 'today', 'we', 'will',
+         'talk', 'about', 'subtitles', 'and', 'how', 'they', 'are', 'made')
+
+
+def make_segments(count, spacing=2.0, words_per_segment=6):
+    """Return ``count`` Whisper-style segments, one every ``spacing`` seconds."""
+    segments = []
+    for i in range(count):
+        start = i * spacing
+        end = start + spacing * 0.8
+        step = (end - start) / words_per_segment
+        words = [
+            {'word': ' ' + WORDS[(i + j) % len(WORDS)], 'start': start + j * step, 'end': start + (j + 1) * step}
+            for j in range(words_per_segment)
+        ]
+        segments.append({
+            'id': i,
+            'start': start,
+            'end': end,
+            'text': ''.join(word['word'] for word in words),
+            'words': words,
+        })
+    return segments
+
+
+def make_srt(count, spacing=2.0, unique_texts=False):
+    """Return an SRT document with ``count`` cues.
+
+    The cue texts repeat every few cues; ``unique_texts`` numbers them so
+    that no two are equal, as in real speech.
+    """
+    def timestamp(seconds):
+        ms = int(round(seconds * 1000))
+        return f"{ms // 3600000:02d}:{ms // 60000 % 60:02d}:{ms // 1000 % 60:02d},{ms % 1000:03d}"
+
+    blocks = []
+    for i, segment in enumerate(make_segments(count, spacing), start=1):
+        text = f"{segment['text'].strip()} {i}" if unique_texts else segment['text'].strip()
+        blocks.append(f"{i}\n{timestamp(segment['start'])} --> {timestamp(segment['end'])}\n{text}\n")
+    return '\n'.join(blocks)
+
+
+def silent_audio(seconds):
+    """Return ``seconds`` of silence without allocating it (a zero-stride view)."""
+    return np.broadcast_to(np.zeros(1, dtype=np.float32), (int(seconds * SAMPLE_RATE),))
+
+
+class FakeWhisperModel:
+    """Returns canned segments from ``transcribe`` instead of running inference."""
+
+    def __init__(self, segments, language='en'):
+        self.segments = segments
+        self.language = language
+        self.calls = 0
+
+    def transcribe(self, audio, **options):
+        self.calls += 1
+        return {
+            'text': '',
+            'segments': [dict(segment) for segment in self.segments],
+            'language': self.language,
+        }
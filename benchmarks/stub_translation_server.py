@@ -0,0 +1,140 @@
+"""Local stub of a LibreTranslate-compatible translation service.
+
+Answers ``POST /translate``, ``POST /detect`` and ``GET /languages`` like the
+real service, "translating" by swapping the case of letters, after an
+injected latency. It can also reject requests over a rate limit with HTTP
+429, to check that the client-side limits keep requests under it. Used by
+``benchmarks/bench_translation_fanout.py``; point the app at it with
+``TRANSLATION_BACKEND=http TRANSLATION_SERVICE_URL=http://127.0.0.1:5005``.
+
+Usage (from the repository root):
+
+    python -m benchmarks.stub_translation_server --port 5005 --latency 0.2 --jitter 0.05
+"""
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LANGUAGES = ['en', 'pt', 'es', 'fr', 'de', 'it', 'ja', 'ko', 'zh', 'ru']
+
+
+class StubTranslationServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, jitter=0.0, rate_limit=0.0):
+        super().__init__(address, StubTranslationHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit  # Requests per second before answering 429 (0 = unlimited)
+        self.requests = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._window = []
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def admit(self) -> bool:
+        """Count a request; False if it is over the rate limit."""
+        now = time.monotonic()
+        with self._lock:
+            self.requests += 1
+            if self.rate_limit:
+                self._window = [t for t in self._window if now - t < 1.0]
+                if len(self._window) >= self.rate_limit:
+                    self.rejected += 1
+                    return False
+                self._window.append(now)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'requests': self.requests, 'rejected': self.rejected, 'max_in_flight': self.max_in_flight}
+
+
+class StubTranslationHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/languages':
+            self._send(200, [{'code': code, 'name': code, 'targets': LANGUAGES} for code in LANGUAGES])
+        else:
+            self._send(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            return self._send(400, {'error': 'Invalid JSON'})
+
+        server = self.server
+        if not server.admit():
+            return self._send(429, {'error': 'Too many requests'}, {'Retry-After': '1'})
+        try:
+            delay = server.latency + random.uniform(-server.jitter, server.jitter)
+            if delay > 0:
+                time.sleep(delay)
+            if self.path == '/translate':
+                if payload.get('target') not in LANGUAGES:
+                    return self._send(400, {'error': f"Unsupported target language {payload.get('target')}"})
+                self._send(200, {'translatedText': str(payload.get('q', '')).swapcase()})
+            elif self.path == '/detect':
+                self._send(200, [{'language': 'en', 'confidence': 90.0}])
+            else:
+                self._send(404, {'error': 'Not found'})
+        finally:
+            server.release()
+
+
+def start_server(host='127.0.0.1', port=0, latency=0.0, jitter=0.0, rate_limit=0.0) -> StubTranslationServer:
+    """Start a stub server in a background thread (port 0 picks a free port)."""
+    server = StubTranslationServer((host, port), latency=latency, jitter=jitter, rate_limit=rate_limit)
+    threading.Thread(target=server.serve_forever, name='stub-translation-server', daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5005)
+    parser.add_argument('--latency', type=float, default=0.2, help='Seconds added to every request')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Random +/- seconds around the latency')
+    parser.add_argument('--rate-limit', type=float, default=0, help='Requests per second before answering 429')
+    args = parser.parse_args(argv)
+
+    server = StubTranslationServer((args.host, args.port), latency=args.latency, jitter=args.jitter,
+                                   rate_limit=args.rate_limit)
+    print(f"Stub translation server on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -12,6 +12,33 @@ class Config:
     # Upload settings
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
     MAX_CONTENT_LENGTH = 500 * 1024 * 1024  # 500MB max file size
+    UPLOAD_MAX_BYTES = int(os.environ.get('UPLOAD_MAX_BYTES') or 20 * 1024 * 1024 * 1024)  # Resumable uploads, 20GB
+    UPLOAD_CHUNK_BYTES = int(os.environ.get('UPLOAD_CHUNK_BYTES') or 8 * 1024 * 1024)  # Chunk size used by the dashboard
+    UPLOAD_PROBE_WORKERS = int(os.environ.get('UPLOAD_PROBE_WORKERS') or 2)  # Threads probing completed uploads
+    
+    # Seconds the per-user extraction count used by the history pagination is cached
+    HISTORY_COUNT_TTL = float(os.environ.get('HISTORY_COUNT_TTL') or 60)
+    
+    # Storage janitor: delete source media N hours after the job finished (0 = keep), per-user quota (0 = none),
+    # seconds between sweeps (0 = only with `flask janitor`), and gzip-compress stored subtitles
+    STORAGE_MEDIA_RETENTION_HOURS = float(os.environ.get('STORAGE_MEDIA_RETENTION_HOURS') or 24)
+    STORAGE_USER_QUOTA_BYTES = int(os.environ.get('STORAGE_USER_QUOTA_BYTES') or 0)
+    STORAGE_JANITOR_INTERVAL = float(os.environ.get('STORAGE_JANITOR_INTERVAL') or 3600)
+    SUBTITLE_GZIP = os.environ.get('SUBTITLE_GZIP', '1') != '0'
+    
+    # Throughput statistics: ETAs and queue-wait estimates use the last N jobs, recomputed every N seconds
+    THROUGHPUT_STATS_WINDOW = int(os.environ.get('THROUGHPUT_STATS_WINDOW') or 500)
+    THROUGHPUT_STATS_TTL = float(os.environ.get('THROUGHPUT_STATS_TTL') or 60)
+    
+    # Prometheus metrics at /metrics (METRICS_TOKEN = bearer token required to read them, empty = not served)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN') or None
+    
+    # Per-job profiling: fraction of jobs profiled at random, also run the torch CPU profiler,
+    # and the users (comma separated e-mails) allowed to request profiles and read them
+    PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE') or 0)
+    PROFILE_TORCH = os.environ.get('PROFILE_TORCH', '0') != '0'
+    ADMIN_EMAILS = [email for email in (os.environ.get('ADMIN_EMAILS') or '').split(',') if email.strip()]
     
     # Session settings
     PERMANENT_SESSION_LIFETIME = timedelta(days=1)
@@ -21,7 +48,60 @@ class Config:
     BABEL_DEFAULT_LOCALE = 'en'
     
     # Whisper settings
-    WHISPER_MODEL = 'base'  # Options: tiny, base, small, medium, large
+    WHISPER_MODEL = os.environ.get('WHISPER_MODEL') or 'base'  # Options: tiny, base, small, medium, large
+    # Memory budget for loaded Whisper models, evicted LRU first (0 = unbounded)
+    WHISPER_MODEL_CACHE_BYTES = int(os.environ.get('WHISPER_MODEL_CACHE_BYTES') or 8 * 1024 * 1024 * 1024)
+    # Precision of Whisper models: fp32, fp16 (GPU) or int8 (dynamically quantized, CPU). Empty = device default
+    WHISPER_PRECISION = os.environ.get('WHISPER_PRECISION') or None
+    WHISPER_MODEL_PRECISIONS = os.environ.get('WHISPER_MODEL_PRECISIONS')  # Per model, e.g. "large=int8,base=fp32"
+    # Torch thread pools per process (0 = intra-op: cores / JOB_WORKERS, inter-op: torch default)
+    TORCH_NUM_THREADS = int(os.environ.get('TORCH_NUM_THREADS') or 0)
+    TORCH_INTEROP_THREADS = int(os.environ.get('TORCH_INTEROP_THREADS') or 0)
+    # Small model that pre-detects the language on the first 30s to route jobs (empty = disabled)
+    LANGUAGE_DETECT_MODEL = os.environ.get('LANGUAGE_DETECT_MODEL', 'tiny')
+    LANGUAGE_DETECT_MIN_PROBABILITY = float(os.environ.get('LANGUAGE_DETECT_MIN_PROBABILITY') or 0.5)
+    TRANSCRIBE_STREAM_SECONDS = float(os.environ.get('TRANSCRIBE_STREAM_SECONDS') or 120)  # Window for streamed cues (0 = single pass)
+    
+    # Progress reporting: commit at most every N seconds and only after a delta of N percent
+    PROGRESS_MIN_INTERVAL = float(os.environ.get('PROGRESS_MIN_INTERVAL') or 2.0)
+    PROGRESS_MIN_DELTA = float(os.environ.get('PROGRESS_MIN_DELTA') or 1.0)
+    PROGRESS_STREAM_KEEPALIVE = float(os.environ.get('PROGRESS_STREAM_KEEPALIVE') or 15)  # Seconds between SSE keep-alives
+    PROGRESS_STREAM_POLL_INTERVAL = float(os.environ.get('PROGRESS_STREAM_POLL_INTERVAL') or 5)  # Seconds between polls for jobs run elsewhere
+    
+    # Parallel chunked transcription of long media
+    TRANSCRIBE_PARALLEL = (os.environ.get('TRANSCRIBE_PARALLEL') or '0') == '1'
+    TRANSCRIBE_PARALLEL_MIN_SECONDS = float(os.environ.get('TRANSCRIBE_PARALLEL_MIN_SECONDS') or 600)  # Shorter files use a single pass
+    TRANSCRIBE_CHUNK_SECONDS = float(os.environ.get('TRANSCRIBE_CHUNK_SECONDS') or 300)  # Target window length
+    TRANSCRIBE_CHUNK_OVERLAP = float(os.environ.get('TRANSCRIBE_CHUNK_OVERLAP') or 2.0)  # Seconds shared by neighbouring windows
+    TRANSCRIBE_CHUNK_WORKERS = int(os.environ.get('TRANSCRIBE_CHUNK_WORKERS') or 0)  # 0 = half the CPU cores
+    
+    # Decoded 16 kHz PCM arrays shared by the stages of a job (defaults to <UPLOAD_FOLDER>/cache/audio)
+    AUDIO_STORE_PATH = os.environ.get('AUDIO_STORE_PATH')
+    
+    # Transcription cache budget, least recently used entries are evicted first (0 = unbounded)
+    TRANSCRIPTION_CACHE_BYTES = int(os.environ.get('TRANSCRIPTION_CACHE_BYTES') or 1024 * 1024 * 1024)
+    
+    # Translation memory (SQLite file, defaults to <UPLOAD_FOLDER>/cache/translation_memory.db)
+    TRANSLATION_MEMORY_PATH = os.environ.get('TRANSLATION_MEMORY_PATH')
+    TRANSLATION_MEMORY_MAX_ENTRIES = int(os.environ.get('TRANSLATION_MEMORY_MAX_ENTRIES') or 200000)
+    
+    # Translation backend: google, or http for a LibreTranslate-compatible service at TRANSLATION_SERVICE_URL
+    TRANSLATION_BACKEND = os.environ.get('TRANSLATION_BACKEND') or 'google'
+    TRANSLATION_SERVICE_URL = os.environ.get('TRANSLATION_SERVICE_URL') or 'http://localhost:5000'
+    TRANSLATION_SERVICE_API_KEY = os.environ.get('TRANSLATION_SERVICE_API_KEY')
+    # Backend limits shared by all translations in a process (0 = unlimited)
+    TRANSLATION_RATE_LIMIT = float(os.environ.get('TRANSLATION_RATE_LIMIT') or 5)  # Requests per second
+    TRANSLATION_RATE_BURST = int(os.environ.get('TRANSLATION_RATE_BURST') or 5)
+    TRANSLATION_MAX_CONCURRENCY = int(os.environ.get('TRANSLATION_MAX_CONCURRENCY') or 4)  # Requests in flight
+    TRANSLATION_WORKERS = int(os.environ.get('TRANSLATION_WORKERS') or 8)  # Threads translating several languages at once
+    TRANSLATION_MAX_LANGUAGES = int(os.environ.get('TRANSLATION_MAX_LANGUAGES') or 10)  # Per multi-language request
+    
+    # Job queue settings
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS') or 1)  # Concurrent extractions per process
+    JOB_WORKER_MODE = os.environ.get('JOB_WORKER_MODE') or 'thread'  # Options: thread, process
+    JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL') or 5.0)  # Seconds between queue polls
+    JOB_HEARTBEAT_INTERVAL = float(os.environ.get('JOB_HEARTBEAT_INTERVAL') or 30)  # Seconds between lease renewals
+    JOB_LEASE_SECONDS = float(os.environ.get('JOB_LEASE_SECONDS') or 300)  # Running jobs not renewed for this long are re-queued
     
     # Logging settings
     LOG_LEVEL = 'INFO' 
\ No newline at end of file
@@ -1,48 +1,178 @@
+from concurrent.futures import ThreadPoolExecutor
 from whisper.utils import get_writer
 
 import argparse
+import glob
+import hashlib
+import json
 import os
+import time
 import whisper
 
 
+MEDIA_PATTERNS = ("*.mp3", "*.mp4", "*.m4a", "*.wav", "*.mkv", "*.mov")
+MANIFEST_NAME = ".extract-subtitle-manifest.jsonl"
+
+
 print("Setting up requirements")
 parser = argparse.ArgumentParser()
 print("Defining command line arguments")
 parser.add_argument("--file", dest="file", type=str, help="MP3 file to extract the subtitles")
+parser.add_argument("--batch", dest="batch", type=str, help="Folder or glob pattern of media files to extract the subtitles in one run")
+parser.add_argument("--manifest", dest="manifest", type=str, help=f"Batch manifest of processed files and timings (default: {MANIFEST_NAME} in the source folder)")
 parser.add_argument("--home", dest="home", type=str, default=os.getenv('HOME'), help="User home directory")
 parser.add_argument("--source", dest="source", type=str, default="Downloads", help="Folder to look for video and write subtitles")
 parser.add_argument("--translate", dest="translate", type=str, help="Language to subtitles be translated to")
+parser.add_argument("--model", dest="model", type=str, default="large", help="Whisper model to use")
 print("Parsing command line arguments")
 args = parser.parse_args()
 
 
-if args.file is None:
-  raise Exception("You need to provide a file to extract the subtitles")
+if args.file is None and args.batch is None:
+  raise Exception("You need to provide a file (--file) or a folder/glob (--batch) to extract the subtitles")
+
+
+def sha256_of(path):
+  digest = hashlib.sha256()
+  with open(path, "rb") as f:
+    for chunk in iter(lambda: f.read(1024 * 1024), b""):
+      digest.update(chunk)
+  return digest.hexdigest()
+
+
+def srt_path_for(output_dir, file_path):
+  return os.path.join(output_dir, os.path.splitext(os.path.basename(file_path))[0] + ".srt")
+
 
-print("Loading whisper model...")
-model = whisper.load_model("large")
+def batch_files(pattern, source_folder):
+  """Media files matched by a folder or glob pattern, relative paths resolved against the source folder."""
+  if not os.path.isabs(pattern):
+    pattern = os.path.join(source_folder, pattern)
+  pattern = os.path.normpath(pattern)
+  if os.path.isdir(pattern):
+    files = [path for media in MEDIA_PATTERNS for path in glob.glob(os.path.join(pattern, media))]
+  else:
+    files = glob.glob(pattern)
+  return sorted(path for path in set(files) if os.path.isfile(path))
+
+
+def load_manifest(path):
+  """Content hashes already processed, read from a JSON lines manifest."""
+  hashes = set()
+  if os.path.exists(path):
+    with open(path, encoding="utf-8") as f:
+      for line in f:
+        try:
+          hashes.add(json.loads(line)["sha256"])
+        except (ValueError, KeyError):
+          continue
+  return hashes
+
+
+def prepare(file_path, done_hashes):
+  """Hash and decode a file ahead of transcription. Returns (hash, audio, seconds); audio is None when it was already processed."""
+  started = time.perf_counter()
+  content_hash = sha256_of(file_path)
+  if content_hash in done_hashes:
+    return content_hash, None, time.perf_counter() - started
+  audio = whisper.load_audio(file_path)
+  return content_hash, audio, time.perf_counter() - started
 
 
 print("Getting source folder")
 source_folder = f"{args.home}/{args.source}"
-print("Getting mp3 folder")
-file_path = f"{source_folder}/{args.file}"
-
 
 should_be_translated = args.translate is not None
 task = "translate" if should_be_translated else "transcribe"
-if should_be_translated: 
+if should_be_translated:
   print(f"The clips will be translated to {args.translate}")
 
-print("Extracting subtitles from audio file...")
-transcription = model.transcribe(file_path, language=args.translate, task=task, verbose=True, word_timestamps=True)
-
-print("Getting SRT writter")
-srt_writer = get_writer(output_format="srt", output_dir=source_folder)
-
-print("Writing srt file...")
-srt_writer(transcription, file_path, {
+writer_options = {
   "highlight_words": False,
   "max_line_count": 1,
   "max_line_width": 16
-})
+}
+
+if args.batch is None:
+  print("Loading whisper model...")
+  model = whisper.load_model(args.model)
+
+  print("Getting mp3 folder")
+  file_path = f"{source_folder}/{args.file}"
+
+  print("Extracting subtitles from audio file...")
+  transcription = model.transcribe(file_path, language=args.translate, task=task, verbose=True, word_timestamps=True)
+
+  print("Getting SRT writter")
+  srt_writer = get_writer(output_format="srt", output_dir=source_folder)
+
+  print("Writing srt file...")
+  srt_writer(transcription, file_path, writer_options)
+else:
+  files = batch_files(args.batch, source_folder)
+  manifest_path = args.manifest or os.path.join(source_folder, MANIFEST_NAME)
+  done_hashes = load_manifest(manifest_path)
+
+  # Files whose subtitles already exist are skipped without reading them
+  pending = [path for path in files if not os.path.exists(srt_path_for(os.path.dirname(path), path))]
+  print(f"Found {len(files)} file(s), {len(files) - len(pending)} already have subtitles")
+  if not pending:
+    raise SystemExit(0)
+
+  # The model is loaded on the first file that needs it, so a resumed run
+  # whose remaining files are all in the manifest does not pay for it
+  model = None
+
+  # Decoding runs one file ahead in a background thread (ffmpeg releases the GIL),
+  # so the next file is ready when the current transcription finishes
+  batch_started = time.perf_counter()
+  processed = skipped = failed = 0
+  with ThreadPoolExecutor(max_workers=1) as decoder, open(manifest_path, "a", encoding="utf-8") as manifest:
+    upcoming = decoder.submit(prepare, pending[0], done_hashes)
+    for index, file_path in enumerate(pending):
+      current = upcoming
+      if index + 1 < len(pending):
+        upcoming = decoder.submit(prepare, pending[index + 1], done_hashes)
+
+      print(f"[{index + 1}/{len(pending)}] {file_path}")
+      try:
+        content_hash, audio, decode_seconds = current.result()
+        if audio is None:
+          print("Already in the manifest, skipping")
+          skipped += 1
+          continue
+
+        if model is None:
+          print("Loading whisper model...")
+          model = whisper.load_model(args.model)
+
+        started = time.perf_counter()
+        transcription = model.transcribe(audio, language=args.translate, task=task, verbose=False, word_timestamps=True)
+        transcribe_seconds = time.perf_counter() - started
+
+        srt_writer = get_writer(output_format="srt", output_dir=os.path.dirname(file_path))
+        srt_writer(transcription, file_path, writer_options)
+      except Exception as e:
+        print(f"Failed: {e}")
+        failed += 1
+        continue
+
+      duration = len(audio) / whisper.audio.SAMPLE_RATE
+      record = {
+        "file": file_path,
+        "sha256": content_hash,
+        "srt": srt_path_for(os.path.dirname(file_path), file_path),
+        "duration_seconds": round(duration, 3),
+        "decode_seconds": round(decode_seconds, 3),
+        "transcribe_seconds": round(transcribe_seconds, 3),
+        # Media seconds per wall second, as in the web application's throughput statistics
+        "real_time_factor": round(duration / transcribe_seconds, 4) if transcribe_seconds else None,
+        "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+      }
+      manifest.write(json.dumps(record) + "\n")
+      manifest.flush()
+      done_hashes.add(content_hash)
+      processed += 1
+      print(f"Done in {transcribe_seconds:.1f}s (decode {decode_seconds:.1f}s, {duration:.1f}s of audio)")
+
+  print(f"Processed {processed}, skipped {skipped}, failed {failed} in {time.perf_counter() - batch_started:.1f}s")
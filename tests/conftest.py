@@ -0,0 +1,47 @@
+import os
+import tempfile
+
+import pytest
+
+# Configured before the app is imported: a throwaway database, and no background workers
+_DB_DIR = tempfile.mkdtemp(prefix='extract-subtitle-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+os.environ['JOB_QUEUE_AUTOSTART'] = '0'
+
+from app import create_app, db  # noqa: E402
+from app.models import User  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    app = create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    return app
+
+
+@pytest.fixture
+def db_session(app):
+    """An app context on empty tables."""
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield db.session
+        db.session.remove()
+
+
+@pytest.fixture
+def user(db_session):
+    user = User(first_name='Ada', last_name='Lovelace', email='ada@example.com', credit_balance=0.0)
+    user.set_password('secret')
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+@pytest.fixture
+def client(app, user):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+        session['_fresh'] = True
+    return client
@@ -0,0 +1,65 @@
+import numpy as np
+
+from app.services.chunked_transcriber import SegmentStitcher, find_split_points, plan_chunks, stitch_segments
+
+RATE = 10  # Samples per second, to keep the chunk arithmetic readable
+
+
+def _segment(start, end, text, words=None):
+    segment = {'start': start, 'end': end, 'text': text}
+    if words is not None:
+        segment['words'] = words
+    return segment
+
+
+def test_plan_chunks_overlap_around_the_cores():
+    chunks = plan_chunks(300, [100, 200], overlap_seconds=2, sample_rate=RATE)
+
+    assert chunks == [(0, 120, 0, 100), (80, 220, 100, 200), (180, 300, 200, 300)]
+
+
+def test_split_points_fall_in_silence():
+    rate = 1000
+    audio = np.ones(rate * 10, dtype=np.float32)
+    audio[int(rate * 4.5):int(rate * 4.6)] = 0.0  # A pause shortly before the 5 s target
+
+    splits = find_split_points(audio, window_seconds=5, search_seconds=1, sample_rate=rate)
+
+    assert len(splits) == 1
+    assert int(rate * 4.5) <= splits[0] < int(rate * 4.6)
+
+
+def test_segments_outside_the_core_belong_to_the_neighbour():
+    first, second = plan_chunks(200, [100], overlap_seconds=2, sample_rate=RATE)
+
+    merged = stitch_segments([
+        (first, [_segment(0, 5, 'a'), _segment(9, 11.5, 'owned by the next chunk')]),
+        (second, [_segment(0, 1, 'owned by the previous chunk'), _segment(1.5, 4, 'b')]),
+    ], sample_rate=RATE)
+
+    assert [segment['text'] for segment in merged] == ['a', 'b']
+    # Shifted by the second chunk's start (8 s) and renumbered
+    assert (merged[1]['start'], merged[1]['end'], merged[1]['id']) == (9.5, 12, 1)
+
+
+def test_repeated_segment_across_a_boundary_is_dropped():
+    stitcher = SegmentStitcher(sample_rate=RATE)
+    stitcher.add((0, 120, 0, 100), [_segment(8, 10.5, ' Hello  world')])
+
+    merged = stitcher.add((80, 220, 100, 200), [_segment(2.2, 3, 'hello world'), _segment(3, 5, 'next')])
+
+    assert [segment['text'] for segment in merged] == ['next']
+    assert merged[0]['id'] == 1
+
+
+def test_overlapping_segment_and_its_words_start_at_the_previous_end():
+    stitcher = SegmentStitcher(sample_rate=RATE)
+    stitcher.add((0, 120, 0, 100), [_segment(8, 10.5, 'first')])
+
+    words = [{'word': 'over', 'start': 2.2, 'end': 2.4}, {'word': 'lap', 'start': 2.6, 'end': 3.5}]
+    merged = stitcher.add((80, 220, 100, 200), [_segment(2.2, 4, 'over lap', words)])
+
+    segment = merged[0]
+    assert (segment['start'], segment['end']) == (10.5, 12)
+    assert [(word['start'], word['end']) for word in segment['words']] == [(10.5, 10.5), (10.6, 11.5)]
+    assert all(word['start'] >= segment['start'] for word in segment['words'])
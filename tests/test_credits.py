@@ -0,0 +1,93 @@
+import threading
+
+from app import db
+from app.models import CreditTransaction, SubtitleExtraction, User
+from app.services.credits import credit_ledger
+
+
+def _new_extraction(user_id):
+    return SubtitleExtraction(user_id=user_id, original_filename='talk.mp3', target_language='unknown',
+                              status='pending')
+
+
+def _balance(user_id):
+    db.session.expire_all()
+    return db.session.get(User, user_id).credit_balance
+
+
+def test_reserve_refuses_more_than_the_balance(db_session, user):
+    credit_ledger.add(user.id, 5)
+    db_session.commit()
+
+    extraction = _new_extraction(user.id)
+    db_session.add(extraction)
+    assert not credit_ledger.reserve(extraction, 6)
+    db_session.rollback()
+
+    assert _balance(user.id) == 5
+
+
+def test_concurrent_reservations_never_overdraw(app, db_session, user):
+    credit_ledger.add(user.id, 10)
+    db_session.commit()
+    user_id = user.id
+    results = []
+    barrier = threading.Barrier(8)
+
+    def reserve():
+        with app.app_context():
+            extraction = _new_extraction(user_id)
+            db.session.add(extraction)
+            barrier.wait()
+            if credit_ledger.reserve(extraction, 3):
+                db.session.commit()
+                results.append(True)
+            else:
+                db.session.rollback()
+                results.append(False)
+            db.session.remove()
+
+    threads = [threading.Thread(target=reserve) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count(True) == 3
+    assert _balance(user_id) == 1
+    assert credit_ledger.ledger_balance(user_id) == 1
+    assert CreditTransaction.query.filter_by(kind='reserve').count() == 3
+
+
+def test_reservation_is_settled_once(db_session, user):
+    credit_ledger.add(user.id, 10)
+    extraction = _new_extraction(user.id)
+    db_session.add(extraction)
+    assert credit_ledger.reserve(extraction, 4)
+    db_session.commit()
+
+    credit_ledger.capture(extraction)
+    credit_ledger.refund(extraction)
+    credit_ledger.capture(extraction)
+    db_session.commit()
+
+    assert extraction.credit_status == 'captured'
+    assert _balance(user.id) == 6
+    assert CreditTransaction.query.filter_by(kind='refund').count() == 0
+    assert CreditTransaction.query.filter_by(kind='capture').count() == 1
+
+
+def test_refund_returns_the_reservation_once(db_session, user):
+    credit_ledger.add(user.id, 10)
+    extraction = _new_extraction(user.id)
+    db_session.add(extraction)
+    assert credit_ledger.reserve(extraction, 4)
+    db_session.commit()
+
+    credit_ledger.refund(extraction)
+    credit_ledger.refund(extraction)
+    db_session.commit()
+
+    assert extraction.credit_status == 'refunded'
+    assert _balance(user.id) == 10
+    assert credit_ledger.ledger_balance(user.id) == 10
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import SubtitleExtraction
+from app.services.history import decode_cursor, encode_cursor, extraction_history
+
+
+@pytest.fixture
+def extractions(db_session, user):
+    # Two pairs share a creation time, so the id has to break the ties
+    now = datetime(2026, 10, 18, 12, 0, 0)
+    created = [now, now, now - timedelta(minutes=1), now - timedelta(minutes=2),
+               now - timedelta(minutes=2), now - timedelta(minutes=3), now - timedelta(minutes=4)]
+    rows = [SubtitleExtraction(user_id=user.id, original_filename=f'{index}.mp3', target_language='en',
+                               status='completed', created_at=created_at)
+            for index, created_at in enumerate(created)]
+    db_session.add_all(rows)
+    db_session.commit()
+    return sorted(rows, key=lambda row: (row.created_at, row.id), reverse=True)
+
+
+def test_cursor_round_trip(extractions):
+    extraction = extractions[0]
+
+    assert decode_cursor(encode_cursor(extraction)) == (extraction.created_at, extraction.id)
+
+
+@pytest.mark.parametrize('cursor', ['', 'not-a-cursor', 'WyJ4Il0', 'e30'])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 7, 10])
+def test_pages_cover_every_extraction_once(extractions, user, limit):
+    seen = []
+    cursor = None
+    while True:
+        items, cursor = extraction_history.page(user.id, limit, cursor=cursor)
+        assert len(items) <= limit
+        seen.extend(items)
+        if cursor is None:
+            break
+
+    assert [row.id for row in seen] == [row.id for row in extractions]
+
+
+def test_last_full_page_has_no_next_cursor(extractions, user):
+    items, cursor = extraction_history.page(user.id, len(extractions))
+
+    assert len(items) == len(extractions)
+    assert cursor is None
+
+
+def test_newer_page_walks_back(extractions, user):
+    first, cursor = extraction_history.page(user.id, 3)
+    second, _ = extraction_history.page(user.id, 3, cursor=cursor)
+
+    newer, has_newer = extraction_history.newer_page(user.id, 3, encode_cursor(second[0]))
+
+    assert [row.id for row in newer] == [row.id for row in first]
+    assert not has_newer
+
+
+def test_api_pages_by_cursor(client, extractions):
+    response = client.get('/api/extractions?limit=4&include_total=1')
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body['total'] == len(extractions)
+    assert [item['id'] for item in body['items']] == [row.id for row in extractions[:4]]
+
+    body = client.get(f"/api/extractions?limit=4&cursor={body['next_cursor']}").get_json()
+    assert [item['id'] for item in body['items']] == [row.id for row in extractions[4:]]
+    assert body['next_cursor'] is None
+
+
+def test_api_rejects_malformed_cursor(client, extractions):
+    assert client.get('/api/extractions?cursor=garbage').status_code == 400
@@ -0,0 +1,70 @@
+import threading
+from datetime import datetime, timedelta
+
+from app import db
+from app.models import SubtitleExtraction
+from app.services.job_queue import job_queue
+
+
+def _add_jobs(user_id, count, **values):
+    jobs = [SubtitleExtraction(user_id=user_id, original_filename=f'{index}.mp3', target_language='en',
+                               status='pending', **values)
+            for index in range(count)]
+    db.session.add_all(jobs)
+    db.session.commit()
+    return [job.id for job in jobs]
+
+
+def test_claim_next_takes_the_oldest_pending_job(db_session, user):
+    ids = _add_jobs(user.id, 3)
+
+    assert job_queue.claim_next() == ids[0]
+    claimed = db.session.get(SubtitleExtraction, ids[0])
+    assert claimed.status == 'processing'
+    assert claimed.claimed_by == job_queue.worker_id
+    assert claimed.heartbeat_at is not None
+
+
+def test_concurrent_claims_are_exclusive(app, db_session, user):
+    ids = _add_jobs(user.id, 20)
+    claimed = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(6)
+
+    def worker():
+        with app.app_context():
+            barrier.wait()
+            while True:
+                extraction_id = job_queue.claim_next()
+                if extraction_id is None:
+                    break
+                with lock:
+                    claimed.append(extraction_id)
+            db.session.remove()
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == sorted(ids)
+    assert job_queue.claim_next() is None
+
+
+def test_expired_leases_are_requeued_from_any_host(db_session, user):
+    expired = datetime.utcnow() - timedelta(seconds=job_queue.lease_seconds + 60)
+    stale, = _add_jobs(user.id, 1)
+    live, = _add_jobs(user.id, 1)
+    db.session.execute(db.update(SubtitleExtraction).where(SubtitleExtraction.id == stale)
+                       .values(status='processing', claimed_by='elsewhere:1:1',
+                               started_at=expired, heartbeat_at=expired))
+    db.session.execute(db.update(SubtitleExtraction).where(SubtitleExtraction.id == live)
+                       .values(status='processing', claimed_by='elsewhere:1:2',
+                               started_at=expired, heartbeat_at=datetime.utcnow()))
+    db.session.commit()
+
+    assert job_queue.recover_orphans() == 1
+    db.session.expire_all()
+    assert db.session.get(SubtitleExtraction, stale).status == 'pending'
+    assert db.session.get(SubtitleExtraction, live).status == 'processing'
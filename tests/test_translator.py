@@ -0,0 +1,87 @@
+import re
+
+import pytest
+
+from app.services.translation_backends import TranslationBackend
+from app.services.translator import SubtitleTranslator
+
+
+class FakeBackend(TranslationBackend):
+    """Upper-cases text; batches of more than ``max_markers`` cues lose their markers."""
+
+    name = 'fake'
+
+    def __init__(self, max_chunk_length=60, max_markers=None):
+        self.max_chunk_length = max_chunk_length
+        self.max_markers = max_markers
+        self.requests = []
+
+    def translate(self, text, target, source='auto'):
+        self.requests.append(text)
+        markers = re.findall(r'^\[\d+\]$', text, re.MULTILINE)
+        if self.max_markers is not None and len(markers) > self.max_markers:
+            text = re.sub(r'^\[\d+\]\n', '', text, flags=re.MULTILINE)
+        return text.upper()
+
+    def supported_languages(self):
+        return {'en', 'pt'}
+
+
+def test_pack_batches_respects_the_request_size():
+    translator = SubtitleTranslator(backend=FakeBackend(max_chunk_length=30))
+    items = list(enumerate(['hello', 'world', 'a longer line of text', 'x']))
+
+    batches = translator._pack_batches(items)
+
+    assert [pair for batch in batches for pair in batch] == items
+    for batch in batches:
+        payload = '\n'.join(f"[{index}]\n{text}" for index, text in batch)
+        assert len(batch) == 1 or len(payload) <= 30
+
+
+def test_split_batch_reads_markers_and_ignores_brackets_in_text():
+    translator = SubtitleTranslator(backend=FakeBackend())
+
+    parts = translator._split_batch("[0]\nHELLO [1] THERE\n  [1]  \nSECOND\nLINE\n[12]\n")
+
+    assert parts == {0: 'HELLO [1] THERE', 1: 'SECOND\nLINE', 12: ''}
+
+
+def test_batches_are_translated_in_one_request_each():
+    backend = FakeBackend(max_chunk_length=1000)
+    translator = SubtitleTranslator(backend=backend)
+
+    assert translator._translate_texts(['one', 'two', 'three'], 'en', 'pt') == ['ONE', 'TWO', 'THREE']
+    assert len(backend.requests) == 1
+
+
+def test_batch_losing_markers_is_bisected_down_to_single_cues():
+    backend = FakeBackend(max_chunk_length=1000, max_markers=1)
+    translator = SubtitleTranslator(backend=backend)
+    texts = ['one', 'two', 'three', 'four']
+
+    assert translator._translate_texts(texts, 'en', 'pt') == ['ONE', 'TWO', 'THREE', 'FOUR']
+    # 4 -> 2 + 2 -> four single cues, each still sent with its marker
+    assert len(backend.requests) == 1 + 2 + 4
+
+
+def test_repeated_cues_are_translated_once():
+    backend = FakeBackend(max_chunk_length=1000)
+    translator = SubtitleTranslator(backend=backend)
+
+    result = translator._translate_texts(['yes', '', 'no', 'yes'], 'en', 'pt')
+
+    assert result == ['YES', '', 'NO', 'YES']
+    assert backend.requests[0].count('yes') == 1
+
+
+def test_strict_translation_raises_backend_errors():
+    class FailingBackend(FakeBackend):
+        def translate(self, text, target, source='auto'):
+            raise RuntimeError('service down')
+
+    translator = SubtitleTranslator(backend=FailingBackend())
+
+    assert translator._translate_texts(['hello'], 'en', 'pt') == ['hello']
+    with pytest.raises(RuntimeError):
+        translator._translate_texts(['hello'], 'en', 'pt', strict=True)
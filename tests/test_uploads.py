@@ -0,0 +1,106 @@
+import io
+
+import pytest
+
+from app import db
+from app.models import UploadSession
+from app.services.uploads import upload_manager
+
+
+class RecordingExecutor:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        self.submitted.append(args)
+
+
+@pytest.fixture
+def uploads(db_session, tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_manager, 'upload_folder', str(tmp_path))
+    monkeypatch.setattr(upload_manager, '_executor', RecordingExecutor())
+    return upload_manager
+
+
+def _stored(upload):
+    with open(upload_manager.path_for(upload), 'rb') as f:
+        return f.read()
+
+
+def test_chunks_are_appended_at_the_offset(uploads, user):
+    upload = uploads.create(user.id, 'talk.mp3', 10)
+
+    assert uploads.write_chunk(upload, 0, io.BytesIO(b'01234')) == 5
+    assert uploads.write_chunk(upload, 5, io.BytesIO(b'56789')) == 10
+
+    db.session.refresh(upload)
+    assert upload.status == 'probing'
+    assert upload.sha256 is not None
+    assert _stored(upload) == b'0123456789'
+    assert uploads._executor.submitted == [(upload.id,)]
+
+
+def test_wrong_offset_is_rejected_and_nothing_written(uploads, user):
+    upload = uploads.create(user.id, 'talk.mp3', 10)
+    uploads.write_chunk(upload, 0, io.BytesIO(b'01234'))
+
+    for offset in (0, 3, 7):
+        with pytest.raises(ValueError):
+            uploads.write_chunk(upload, offset, io.BytesIO(b'xxxxx'))
+
+    assert upload.offset == 5
+    assert _stored(upload) == b'01234'
+
+
+def test_data_beyond_the_declared_length_is_ignored(uploads, user):
+    upload = uploads.create(user.id, 'talk.mp3', 4)
+
+    assert uploads.write_chunk(upload, 0, io.BytesIO(b'0123456789')) == 4
+    assert _stored(upload) == b'0123'
+
+
+def test_interrupted_chunk_keeps_what_arrived(uploads, user):
+    class DroppedStream:
+        def __init__(self):
+            self.reads = 0
+
+        def read(self, size):
+            self.reads += 1
+            if self.reads > 1:
+                raise IOError('connection reset')
+            return b'012'
+
+    upload = uploads.create(user.id, 'talk.mp3', 10)
+
+    assert uploads.write_chunk(upload, 0, DroppedStream()) == 3
+    assert uploads.write_chunk(upload, 3, io.BytesIO(b'3456789')) == 10
+    assert _stored(upload) == b'0123456789'
+
+
+def test_chunk_is_rejected_when_the_offset_moved_meanwhile(uploads, user):
+    upload = uploads.create(user.id, 'talk.mp3', 10)
+
+    class RacingStream(io.BytesIO):
+        """Another process records a chunk while this one is being written."""
+
+        def read(self, size):
+            data = super().read(size)
+            if data:
+                db.session.execute(db.update(UploadSession).where(UploadSession.id == upload.id)
+                                   .values(offset=5))
+                db.session.commit()
+            return data
+
+    with pytest.raises(ValueError):
+        uploads.write_chunk(upload, 0, RacingStream(b'01234'))
+    db.session.refresh(upload)
+    assert upload.offset == 5
+    assert uploads._executor.submitted == []
+
+
+def test_chunks_are_refused_after_the_upload_completed(uploads, user):
+    upload = uploads.create(user.id, 'talk.mp3', 3)
+    uploads.write_chunk(upload, 0, io.BytesIO(b'012'))
+
+    with pytest.raises(ValueError):
+        uploads.write_chunk(upload, 3, io.BytesIO(b'3'))
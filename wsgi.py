@@ -1,17 +1,16 @@
-from app import create_app
+from app import create_app, start_background_services
 import logging
 from flask import request
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 app = create_app()
+start_background_services(app)
 
 @app.before_request
 def log_request_info():
-    logger.debug('Headers: %s', request.headers)
-    logger.debug('Body: %s', request.get_data())
+    # Headers and bodies are not logged: they carry session cookies and passwords
+    logger.debug('%s %s', request.method, request.path)
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=8080, debug=True) 
\ No newline at end of file